@@ -7,47 +7,8 @@ import pandas as pd
 from supabase import create_client, Client
 from tqdm import tqdm
 import time
-import re
 
-def clean_arabic_text(text):
-    """Remove RTL marks and extra whitespace"""
-    if pd.isna(text):
-        return ''
-    text = str(text)
-    text = re.sub(r'[\u202a-\u202e\u200e\u200f]', '', text)
-    text = ' '.join(text.split())
-    return text.strip()
-
-def split_arabic_name(full_name):
-    """Split Arabic name into first, family, and middle names"""
-    full_name = clean_arabic_text(full_name)
-    
-    if not full_name:
-        return ('', '', '')
-    
-    parts = full_name.split()
-    
-    if len(parts) == 0:
-        return ('', '', '')
-    elif len(parts) == 1:
-        return (parts[0], '', '')
-    elif len(parts) == 2:
-        return (parts[0], parts[1], '')
-    else:
-        first_name = parts[0]
-        family_name = parts[-1]
-        middle_names = ' '.join(parts[1:-1])
-        return (first_name, family_name, middle_names)
-
-def arabic_to_english_number(text):
-    """Convert Arabic numerals to English"""
-    if pd.isna(text):
-        return text
-    text = str(text)
-    arabic_numerals = '٠١٢٣٤٥٦٧٨٩'
-    english_numerals = '0123456789'
-    translation_table = str.maketrans(arabic_numerals, english_numerals)
-    return text.translate(translation_table)
+from arabic_name_utils import split_arabic_name, arabic_to_english_number
 
 def load_config():
     with open('supabase_config.json', 'r') as f:
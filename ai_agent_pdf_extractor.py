@@ -6,28 +6,86 @@ Extracts structured, normalized data from Egyptian election PDF to create:
 - Voters Table (individual voter info, linked to locations)
 
 Based on specifications in logic.pdf
+
+Run with --gazetteer to resolve committee headers against "motobus  locations.csv"
+(location_gazetteer.py); the locations table then gets a gazetteer_location_id column.
 """
 
-import PyPDF2
 import pandas as pd
 import re
-import json
 import os
+import sys
 from datetime import datetime
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Tuple
 
 import logging
 
+from pipeline_metrics import metrics
+from profiling_hooks import memory_snapshot, run_main
+from voter_roll_io import save_streams
+from voter_store import VoterStore, voter_column, voters_dataframe
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Table column order from sample-data-guide
+LOCATION_COLUMNS = [
+    'location_id', 'location_number', 'location_name', 'location_address',
+    'governorate', 'district', 'main_committee_id', 'police_department', 'total_voters'
+]
+# Added to the locations table when a gazetteer is used: the canonical location_id
+# (location number in "motobus  locations.csv") the committee header resolved to
+GAZETTEER_COLUMN = 'gazetteer_location_id'
+VOTER_COLUMNS = ['voter_id', 'full_name', 'location_id', 'voter_sequence_number', 'source_page']
+
+# Defaults for the original single-district PDF (motobus .pdf)
+DEFAULT_GOVERNORATE = 'كفر الشيخ'
+DEFAULT_DISTRICT = 'مطوبس'
+
+TEXT_SOURCES = ('pypdf2', 'chars')
+
+# Page footer: "81 الصحفة رقممن 1021رقم اللجنة٨٧" from PyPDF2; the character text
+# (char_line_reassembly.py) puts spaces between the numbers and the words
+FOOTER_PATTERN = re.compile(r'(\d+)\s*الصحفة\s*رقممن\s*\d+\s*رقم\s*اللجنة\s*(\d+)')
+
 class EgyptElectionPDFExtractor:
     """AI Agent for extracting Egyptian election data from PDF"""
     
-    def __init__(self, pdf_path: str, output_dir: str = "output"):
+    def __init__(self, pdf_path: str, output_dir: str = "output", district: Optional[str] = None,
+                 governorate: Optional[str] = None, location_id_offset: int = 0, voter_id_offset: int = 0,
+                 id_allocator: Optional[Any] = None, ocr_fallback: Optional[Any] = None,
+                 page_router: Optional[Any] = None, text_source: str = 'pypdf2',
+                 page_guard: Optional[Any] = None, gazetteer: Optional[Any] = None):
         self.pdf_path = pdf_path
         self.output_dir = output_dir
+        # District defaults and id offsets let batch_district_runner.py run one
+        # extractor per district PDF without location_id/voter_id collisions
+        self.district = district or DEFAULT_DISTRICT
+        self.governorate = governorate or DEFAULT_GOVERNORATE
+        self.location_id_offset = location_id_offset
+        self.voter_id_offset = voter_id_offset
+        # id_allocator.py allocator; replaces the offsets when ids must be unique across loads
+        self.id_allocator = id_allocator
+        # ocr_fallback.OcrFallback; re-reads only the pages whose text layer is garbled
+        self.ocr_fallback = ocr_fallback
+        # page_quality.PageRouter; sends each page to text, word-coordinate or OCR parsing
+        self.page_router = page_router
+        if page_router is not None and ocr_fallback is not None:
+            # The router OCRs its 'ocr' pages itself; a second OCR pass would redo them
+            raise ValueError("Pass page_router or ocr_fallback, not both "
+                             "(give the router its OCR stage: PageRouter(..., ocr=OcrFallback(...)))")
+        # TEXT_SOURCES key: 'chars' rebuilds logical-order text from character boxes
+        # (char_line_reassembly.py) for PDFs that PyPDF2 reads one glyph per line
+        if text_source not in TEXT_SOURCES:
+            raise ValueError(f"Unknown text source {text_source!r} (choose from {', '.join(TEXT_SOURCES)})")
+        self.text_source = text_source
+        # page_timeouts.PageGuard; reads pages in killable workers with per-page time and
+        # memory limits, retrying cheaper strategies and quarantining pages that still fail
+        self.page_guard = page_guard
+        # location_gazetteer.LocationGazetteer; resolves committee headers to known locations
+        # (canonical name, address and location id) instead of string splits and defaults
+        self.gazetteer = gazetteer
         self.locations = []
         self.voters = []
         
@@ -53,6 +111,7 @@ class EgyptElectionPDFExtractor:
             r'بجوار\s+[\u0600-\u06FF\s]+'
         ]
     
+    @metrics.timed('extract_text_from_pdf')
     def extract_text_from_pdf(self) -> str:
         """Extract all text from PDF file"""
         logger.info(f"📄 Extracting text from PDF: {self.pdf_path}")
@@ -61,31 +120,48 @@ class EgyptElectionPDFExtractor:
             raise FileNotFoundError(f"PDF file not found: {self.pdf_path}")
         
         try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                logger.info(f"📊 Total pages: {total_pages}")
-                
-                all_text = ""
-                for page_num in range(total_pages):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    all_text += f"\n--- PAGE {page_num + 1} ---\n{text}\n"
-                
-                logger.info(f"📝 Extracted {len(all_text)} characters from PDF")
-                
-                # Save raw text for debugging
-                raw_text_file = os.path.join(self.output_dir, "raw_pdf_text.txt")
-                with open(raw_text_file, 'w', encoding='utf-8') as f:
-                    f.write(all_text)
-                logger.info(f"💾 Raw text saved to: {raw_text_file}")
-                
-                return all_text
+            all_text = ""
+            for page_num, text in self.page_texts():
+                all_text += f"\n--- PAGE {page_num} ---\n{text}\n"
+            
+            logger.info(f"📝 Extracted {len(all_text)} characters from PDF")
+            
+            # Save raw text for debugging
+            raw_text_file = os.path.join(self.output_dir, "raw_pdf_text.txt")
+            with open(raw_text_file, 'w', encoding='utf-8') as f:
+                f.write(all_text)
+            logger.info(f"💾 Raw text saved to: {raw_text_file}")
+            
+            return all_text
                 
         except Exception as e:
             logger.error(f"❌ Error extracting PDF text: {e}")
             raise
     
+    def page_texts(self) -> Iterator[Tuple[int, str]]:
+        """Yield (page_num, text) for every page from the configured text source"""
+        if self.page_guard is not None:
+            pages = 0
+            for page_num, text in self.page_guard.read_pages(self.text_source):
+                pages += 1
+                yield page_num, text
+            metrics.record(pages=pages)
+            report = self.page_guard.report
+            # Saved before parsing, so the manifest survives a failed extraction
+            manifest_file = self.page_guard.save_manifest(self.output_dir)
+            logger.info(f"⏱️  Page guard: {len(report['retried'])} pages retried, "
+                        f"{len(report['quarantined'])} quarantined {report['quarantined'][:20]} -> {manifest_file}")
+            return
+        
+        from extraction_engine import count_pages, iter_pages
+
+        total_pages = count_pages(self.pdf_path)
+        logger.info(f"📊 Total pages: {total_pages}")
+        metrics.record(pages=total_pages)
+        source = 'pdfplumber_chars' if self.text_source == 'chars' else 'pypdf2_text'
+        for page in iter_pages(self.pdf_path, source, workers=1):
+            yield page['page_num'], page['text']
+    
     def identify_location_headers(self, text: str) -> List[Dict]:
         """Identify location headers in the PDF text"""
         logger.info("🔍 Identifying location headers...")
@@ -99,7 +175,7 @@ class EgyptElectionPDFExtractor:
                 continue
             
             # Pattern 1: Look for page markers like "81 الصحفة رقممن 1021رقم اللجنة٨٧"
-            pattern_match = re.search(r'(\d{1,3})\s*الصحفة\s*رقممن\s*\d+رقم\s*اللجنة(\d+)', line)
+            pattern_match = re.search(r'(\d{1,3})\s*الصحفة\s*رقممن\s*\d+\s*رقم\s*اللجنة\s*(\d+)', line)
             if pattern_match:
                 page_num = int(pattern_match.group(1))
                 committee_num = int(pattern_match.group(2))
@@ -155,10 +231,10 @@ class EgyptElectionPDFExtractor:
             'location_number': str(location_number),
             'location_name': '',
             'location_address': '',
-            'governorate': 'كفر الشيخ',
-            'district': 'مطوبس',
+            'governorate': self.governorate,
+            'district': self.district,
             'main_committee_id': '4',  # Default as per sample guide
-            'police_department': 'مطوبس',  # Default district police
+            'police_department': self.district,  # Default district police
             'total_voters': 0
         }
         
@@ -208,6 +284,8 @@ class EgyptElectionPDFExtractor:
                         location_data['location_name'] = school_name
                         break
         
+        self.apply_gazetteer(location_data, lines[start_line:search_end], location_number)
+        
         # Set defaults if not found, following sample-data-guide format
         if not location_data['location_name']:
             location_data['location_name'] = f"مدرسة الجمهورية الابتدائية المشتركة"
@@ -314,8 +392,12 @@ class EgyptElectionPDFExtractor:
         
         return True
     
-    def process_pdf(self) -> Tuple[List[Dict], List[Dict]]:
-        """Main processing function to extract locations and voters following actual PDF structure"""
+    @metrics.timed('process_pdf', rows=lambda result: len(result[1]))
+    def process_pdf(self) -> Tuple[List[Dict], VoterStore]:
+        """Main processing function to extract locations and voters following actual PDF structure
+
+        Voters come back in a VoterStore (columns, not one dict per voter); it iterates as voter dicts.
+        """
         logger.info("🚀 Starting PDF processing - understanding actual structure...")
         
         # Extract text from PDF
@@ -323,38 +405,65 @@ class EgyptElectionPDFExtractor:
         
         # Split text by page markers
         pages = text.split('--- PAGE')
-        
+        metrics.record(pages=len(pages) - 1)
+        
+        page_lines = (
+            (page_num, page_content.split('\n'))
+            for page_num, page_content in enumerate(pages[1:], 1)  # Skip first empty split
+            if page_content.strip()
+        )
+        if self.page_router is not None:
+            page_lines = self.page_router.apply(self, page_lines)
+            logger.info(f"🩺 Page routes: {self.page_router.report['routes']}")
+        if self.ocr_fallback is not None:
+            page_lines = self.ocr_fallback.apply(self, page_lines)
+            logger.info(f"🔤 OCR fallback: {len(self.ocr_fallback.report['flagged'])} pages flagged, "
+                        f"{len(self.ocr_fallback.report['replaced'])} replaced")
+        
+        return self.process_pages(page_lines)
+    
+    def process_pages(self, pages: Iterable[Tuple[int, List[str]]]) -> Tuple[List[Dict], VoterStore]:
+        """Group (page_num, page_lines) by footer committee number and extract locations and voters
+
+        Shared by process_pdf and extraction_engine.py, which supplies cached/parallel pages.
+        """
+        return self.build_committees(self.group_pages(
+            {'page_num': page_num, 'content': page_lines} for page_num, page_lines in pages
+        ))
+    
+    def group_pages(self, pages: Iterable[Dict]) -> Dict[int, List[Dict]]:
+        """Page dicts ('page_num', 'content') by footer committee number"""
         # Group pages by committee number to create locations
         committee_pages = {}
+        total_pages = 0
         
-        for page_num, page_content in enumerate(pages[1:], 1):  # Skip first empty split
-            if not page_content.strip():
-                continue
-            
-            page_lines = page_content.split('\n')
+        for page_data in pages:
+            total_pages += 1
             
             # Find committee number from footer pattern: "X الصحفة رقممن 1021رقم اللجنة٦٧"
-            committee_number = self.extract_committee_number(page_lines)
+            committee_number = self.extract_committee_number(page_data['content'])
             
             if committee_number:
                 if committee_number not in committee_pages:
                     committee_pages[committee_number] = []
-                committee_pages[committee_number].append({
-                    'page_num': page_num,
-                    'content': page_lines
-                })
+                committee_pages[committee_number].append(page_data)
         
-        logger.info(f"📍 Found {len(committee_pages)} unique committees across {len(pages)-1} pages")
-        
-        # Process each committee as one location
+        logger.info(f"📍 Found {len(committee_pages)} unique committees across {total_pages} pages")
+        return committee_pages
+    
+    def build_committees(self, committee_pages: Dict[int, List[Dict]]) -> Tuple[List[Dict], VoterStore]:
+        """One location per committee plus its voters, numbered in committee order"""
+        # Process each committee as one location; voter dicts live only as long as their committee
         locations = []
-        all_voters = []
+        all_voters = VoterStore()
         global_voter_id = 1
         
         for committee_num, pages_data in sorted(committee_pages.items()):
             # Create location from first page of this committee
             first_page = pages_data[0]['content']
-            location_data = self.extract_location_from_committee(first_page, committee_num, len(locations) + 1)
+            location_data = self.extract_location_from_committee(
+                first_page, committee_num, self.allocate_location_id(committee_num, len(locations) + 1)
+            )
             
             # Extract voters from all pages of this committee
             committee_voters = []
@@ -369,7 +478,7 @@ class EgyptElectionPDFExtractor:
                 
                 # Update voter sequence numbers
                 for voter in page_voters:
-                    voter['voter_id'] = global_voter_id
+                    voter['voter_id'] = self.allocate_voter_id(committee_num, voter_sequence, global_voter_id)
                     voter['voter_sequence_number'] = voter_sequence
                     global_voter_id += 1
                     voter_sequence += 1
@@ -389,12 +498,112 @@ class EgyptElectionPDFExtractor:
         
         return locations, all_voters
     
+    def iter_pages(self) -> Iterator[Tuple[int, List[str]]]:
+        """Yield (page_num, page_lines) one page at a time without building the full document text"""
+        if not os.path.exists(self.pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {self.pdf_path}")
+
+        for page_num, text in self.page_texts():
+            yield page_num, (text or '').split('\n')
+
+    def iter_committees(self) -> Iterator[Tuple[Dict, List[Dict], bool]]:
+        """Yield (location, voters, is_new) for each committee as soon as its pages have been read
+
+        A committee is complete when the footer committee number changes, so consumers
+        (e.g. the streaming upload in run_complete_extraction.py) can start before the
+        PDF is finished. location_ids follow document order, which matches process_pdf's
+        sorted order for the election PDFs. If a committee's pages reappear later, its
+        voters are yielded again under the same location with is_new=False and
+        total_voters updated.
+        """
+        committee_locations: Dict[int, Dict] = {}
+        counters = {'voter_id': 1}
+        current_committee = None
+        current_pages: List[Dict] = []
+
+        pages = ({'page_num': page_num, 'content': page_lines} for page_num, page_lines in self.iter_pages())
+
+        for page_data in pages:
+            committee_number = self.extract_committee_number(page_data['content'])
+            if not committee_number:
+                continue
+
+            if current_pages and committee_number != current_committee:
+                chunk = self._committee_chunk(current_committee, current_pages, committee_locations, counters)
+                if chunk:
+                    yield chunk
+                current_pages = []
+
+            current_committee = committee_number
+            current_pages.append(page_data)
+
+        if current_pages:
+            chunk = self._committee_chunk(current_committee, current_pages, committee_locations, counters)
+            if chunk:
+                yield chunk
+
+        logger.info(f"📍 Streamed {len(committee_locations)} committees, {counters['voter_id'] - 1} voters")
+
+    def _committee_chunk(self, committee_num: int, pages_data: List[Dict],
+                         committee_locations: Dict[int, Dict], counters: Dict[str, int]) -> Optional[Tuple[Dict, List[Dict], bool]]:
+        """Parse one run of pages of a committee, numbering voters the same way process_pdf does"""
+        location_data = committee_locations.get(committee_num)
+        is_new = location_data is None
+        if is_new:
+            location_data = self.extract_location_from_committee(
+                pages_data[0]['content'], committee_num,
+                self.allocate_location_id(committee_num, len(committee_locations) + 1)
+            )
+            location_data['total_voters'] = 0
+
+        committee_voters = []
+        voter_sequence = location_data['total_voters'] + 1
+        for page_data in pages_data:
+            page_voters = self.extract_voters_from_page(
+                page_data['content'], location_data['location_id'], page_data['page_num']
+            )
+            for voter in page_voters:
+                voter['voter_id'] = self.allocate_voter_id(committee_num, voter_sequence, counters['voter_id'])
+                voter['voter_sequence_number'] = voter_sequence
+                counters['voter_id'] += 1
+                voter_sequence += 1
+            committee_voters.extend(page_voters)
+
+        # Committees without voters are dropped, as in process_pdf
+        if not committee_voters:
+            return None
+
+        location_data['total_voters'] += len(committee_voters)
+        committee_locations[committee_num] = location_data
+        if is_new:
+            logger.info(f"✅ Committee {committee_num}: {location_data['location_name'][:50]} ({len(committee_voters)} voters, {len(pages_data)} pages)")
+        return dict(location_data), committee_voters, is_new
+
+    def allocate_location_id(self, committee_num: int, ordinal: int) -> int:
+        """location_id for the ordinal-th committee of this PDF"""
+        if self.id_allocator is not None:
+            return self.id_allocator.location_id(self.district, committee_num)
+        return self.location_id_offset + ordinal
+    
+    def allocate_voter_id(self, committee_num: int, voter_sequence: int, ordinal: int) -> int:
+        """voter_id for the ordinal-th voter of this PDF (voter_sequence-th of its committee)
+
+        An id_allocator is keyed on voter_sequence, the voter's position among the
+        names parsed for the committee; the parser does not keep the voter number
+        printed in the roll. Hashed ids are therefore stable across re-runs of the
+        same parse only: a name found or lost earlier in the committee shifts the ids
+        of every voter after it.
+        """
+        if self.id_allocator is not None:
+            return self.id_allocator.voter_id(self.district, committee_num, voter_sequence)
+        return self.voter_id_offset + ordinal
+    
     def extract_committee_number(self, page_lines: List[str]) -> Optional[int]:
         """Extract committee number from page footer"""
         
         for line in page_lines:
             # Pattern: "X الصحفة رقممن 1021رقم اللجنة٦٧"
-            match = re.search(r'(\d+)\s*الصحفة\s*رقممن\s*\d+رقم\s*اللجنة(\d+)', line)
+            match = FOOTER_PATTERN.search(line)
             if match:
                 committee_num = int(match.group(2))
                 return committee_num
@@ -409,10 +618,10 @@ class EgyptElectionPDFExtractor:
             'location_number': str(committee_num),
             'location_name': '',
             'location_address': '',
-            'governorate': 'كفر الشيخ',
-            'district': 'مطوبس',
+            'governorate': self.governorate,
+            'district': self.district,
             'main_committee_id': '4',
-            'police_department': 'مطوبس',
+            'police_department': self.district,
             'total_voters': 0
         }
         
@@ -438,7 +647,7 @@ class EgyptElectionPDFExtractor:
                 elif 'مركز دسوق' in line:
                     location_data['district'] = 'دسوق'
                     location_data['police_department'] = 'دسوق'
-                # Default is مطوبس
+                # Default is the extractor's district
                 
                 continue
             
@@ -452,25 +661,44 @@ class EgyptElectionPDFExtractor:
             if committee_match:
                 location_data['location_number'] = committee_match.group(1)
         
+        self.apply_gazetteer(location_data, page_lines[:10], committee_num)
+        
         # Set defaults following sample-data-guide format
         if not location_data['location_name']:
             if location_data['district'] == 'فوه':
                 location_data['location_name'] = 'مدرسة الجمهورية الابتدائية المشتركة'
             elif location_data['district'] == 'دسوق':
                 location_data['location_name'] = 'مدرسة الشهيد احمد ماهر الابتدائية'
-            else:
+            elif location_data['district'] == DEFAULT_DISTRICT:
                 location_data['location_name'] = 'مدرسة الثانوية للبنات مطوبس'
+            else:
+                location_data['location_name'] = f"لجنة رقم {committee_num}"
         
         if not location_data['location_address']:
             if location_data['district'] == 'فوه':
                 location_data['location_address'] = 'مركز فوه، شارع المركز بندر فوه'
             elif location_data['district'] == 'دسوق':
                 location_data['location_address'] = 'دسوق - شارع الشيخ علي مبارك'
-            else:
+            elif location_data['district'] == DEFAULT_DISTRICT:
                 location_data['location_address'] = 'مركز مطوبس - شارع النيل'
+            else:
+                location_data['location_address'] = f"مركز {location_data['district']}"
         
         return location_data
     
+    def apply_gazetteer(self, location_data: Dict, header_lines: List[str], number) -> bool:
+        """Canonical name (and missing address) of the known location the header names"""
+        if self.gazetteer is None:
+            return False
+        entry = self.gazetteer.resolve(header_lines, number)
+        if entry is None:
+            return False
+        location_data['location_name'] = entry['location_name']
+        if not location_data['location_address'] and entry['location_address']:
+            location_data['location_address'] = f"مركز {location_data['district']}، {entry['location_address']}"
+        location_data[GAZETTEER_COLUMN] = entry['location_id']
+        return True
+    
     def extract_location_from_page(self, page_lines: List[str], page_num: int) -> Optional[Dict]:
         """Extract location information from a single page"""
         
@@ -479,10 +707,10 @@ class EgyptElectionPDFExtractor:
             'location_number': str(page_num),  # Use page number as default
             'location_name': '',
             'location_address': '',
-            'governorate': 'كفر الشيخ',
-            'district': 'مطوبس',
+            'governorate': self.governorate,
+            'district': self.district,
             'main_committee_id': '4',
-            'police_department': 'مطوبس',
+            'police_department': self.district,
             'total_voters': 0
         }
         
@@ -621,67 +849,63 @@ class EgyptElectionPDFExtractor:
         
         return names
     
+    def locations_frame(self, locations: List[Dict]) -> pd.DataFrame:
+        """Locations in sample-data-guide column order, one per location_number, sorted by location_id
+
+        With a gazetteer the resolved canonical id is kept as a trailing
+        gazetteer_location_id column (empty where the header matched nothing).
+        """
+        columns = LOCATION_COLUMNS + [GAZETTEER_COLUMN] if self.gazetteer is not None else LOCATION_COLUMNS
+        locations_df = pd.DataFrame(locations).reindex(columns=columns)
+        if self.gazetteer is not None:
+            locations_df[GAZETTEER_COLUMN] = locations_df[GAZETTEER_COLUMN].astype('Int64')
+        locations_df = locations_df.drop_duplicates(subset=['location_number']).reset_index(drop=True)
+        return locations_df.sort_values('location_id').reset_index(drop=True)
+
+    def save_table(self, df: pd.DataFrame, table: str) -> Dict[str, Optional[str]]:
+        """Write <table>_table.csv and, with openpyxl/xlsxwriter installed, <table>_table.xlsx"""
+        csv_path = os.path.join(self.output_dir, f"{table}_table.csv")
+        excel_path = os.path.join(self.output_dir, f"{table}_table.xlsx")
+
+        # UTF-8 BOM for proper Arabic display in spreadsheet tools
+        df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+        logger.info(f"📁 {table.capitalize()} CSV saved to: {csv_path}")
+
+        try:
+            df.to_excel(excel_path, index=False)
+            logger.info(f"📊 {table.capitalize()} Excel saved to: {excel_path}")
+        except ValueError as excel_error:
+            logger.warning(f"⚠️ Excel export skipped (install openpyxl): {excel_error}")
+            excel_path = None
+
+        return {f'{table}_csv': csv_path, f'{table}_excel': excel_path}
+
+    @metrics.timed('save_to_csv')
     def save_to_csv(self, locations: List[Dict], voters: List[Dict]) -> Dict[str, Optional[str]]:
         """Save extracted data to CSV/Excel files following sample-data-guide structure"""
         logger.info("💾 Saving data to CSV/Excel files following sample-data-guide format...")
         
         # Create DataFrames with exact column order from sample-data-guide
-        locations_df = pd.DataFrame(locations)
-        voters_df = pd.DataFrame(voters)
-        
-        # Ensure exact column order for locations table
-        location_columns = [
-            'location_id', 'location_number', 'location_name', 'location_address',
-            'governorate', 'district', 'main_committee_id', 'police_department', 'total_voters'
-        ]
-        locations_df = locations_df.reindex(columns=location_columns)
+        with memory_snapshot('build_dataframes'):
+            locations_df = self.locations_frame(locations)
+            voters_df = voters_dataframe(voters)
         
-        # Ensure exact column order for voters table
-        voter_columns = [
-            'voter_id', 'full_name', 'location_id', 'voter_sequence_number', 'source_page'
-        ]
-        voters_df = voters_df.reindex(columns=voter_columns)
+        voters_df = voters_df.reindex(columns=VOTER_COLUMNS)
+        metrics.record(rows=len(voters_df))
         
-        # Remove duplicates based on sample-data-guide requirements
-        locations_df = locations_df.drop_duplicates(subset=['location_number']).reset_index(drop=True)
+        # Remove duplicates and sort as per sample-data-guide requirements
         voters_df = voters_df.drop_duplicates(subset=['full_name', 'location_id']).reset_index(drop=True)
-        
-        # Sort data as per sample-data-guide
-        locations_df = locations_df.sort_values('location_id').reset_index(drop=True)
         voters_df = voters_df.sort_values('voter_id').reset_index(drop=True)
         
         # Validate data integrity as per sample-data-guide
         self.validate_extracted_data(locations_df, voters_df)
         
-        output_paths = {
-            'locations_csv': os.path.join(self.output_dir, "locations_table.csv"),
-            'voters_csv': os.path.join(self.output_dir, "voters_table.csv"),
-            'locations_excel': os.path.join(self.output_dir, "locations_table.xlsx"),
-            'voters_excel': os.path.join(self.output_dir, "voters_table.xlsx")
-        }
-
-        # Save to CSV with UTF-8 BOM for proper Arabic display in spreadsheet tools
-        locations_df.to_csv(output_paths['locations_csv'], index=False, encoding='utf-8-sig')
-        voters_df.to_csv(output_paths['voters_csv'], index=False, encoding='utf-8-sig')
-
-        logger.info(f"📁 Locations CSV saved to: {output_paths['locations_csv']}")
-        logger.info(f"📁 Voters CSV saved to: {output_paths['voters_csv']}")
-
-        # Attempt Excel export (requires openpyxl/xlsxwriter)
-        try:
-            locations_df.to_excel(output_paths['locations_excel'], index=False)
-            voters_df.to_excel(output_paths['voters_excel'], index=False)
-            logger.info(f"📊 Locations Excel saved to: {output_paths['locations_excel']}")
-            logger.info(f"📊 Voters Excel saved to: {output_paths['voters_excel']}")
-        except ValueError as excel_error:
-            logger.warning(f"⚠️ Excel export skipped (install openpyxl): {excel_error}")
-            output_paths['locations_excel'] = None
-            output_paths['voters_excel'] = None
-
-        return output_paths
+        return {**self.save_table(locations_df, 'locations'), **self.save_table(voters_df, 'voters')}
     
+    @metrics.timed('validate_extracted_data')
     def validate_extracted_data(self, locations_df: pd.DataFrame, voters_df: pd.DataFrame):
         """Validate extracted data according to sample-data-guide requirements"""
+        metrics.record(rows=len(voters_df))
         logger.info("🔍 Validating data according to sample-data-guide...")
         
         # Check 1: All location_ids are unique
@@ -738,29 +962,31 @@ class EgyptElectionPDFExtractor:
         else:
             logger.warning("⚠️ Arabic text may not be properly encoded")
     
+    @metrics.timed('save_to_json')
     def save_to_json(self, locations: List[Dict], voters: List[Dict]) -> str:
         """Save extracted data to JSON format"""
+        metrics.record(rows=len(voters))
         logger.info("💾 Saving data to JSON format...")
         
-        output_data = {
+        metadata = {
             "extraction_metadata": {
                 "timestamp": datetime.now().isoformat(),
                 "pdf_file": self.pdf_path,
                 "total_locations": len(locations),
                 "total_voters": len(voters)
-            },
-            "locations": locations,
-            "voters": voters
+            }
         }
         
         json_file = os.path.join(self.output_dir, "election_data.json")
         
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        # One record per line, locations and voters in their own files, so readers
+        # (voter_roll_io.iter_records) stream them instead of loading one big document
+        streams = save_streams(json_file, {'locations': locations, 'voters': voters}, metadata)
         
-        logger.info(f"📁 JSON data saved to: {json_file}")
+        logger.info(f"📁 JSON data saved to: {json_file} ({', '.join(os.path.basename(path) for path in streams.values())})")
         return json_file
     
+    @metrics.timed('generate_summary_report')
     def generate_summary_report(self, locations: List[Dict], voters: List[Dict]) -> str:
         """Generate a summary report of the extraction"""
         logger.info("📋 Generating summary report...")
@@ -772,8 +998,7 @@ class EgyptElectionPDFExtractor:
         
         # Find locations with most/least voters
         location_voter_counts = {}
-        for voter in voters:
-            location_id = voter['location_id']
+        for location_id in voter_column(voters, 'location_id'):
             location_voter_counts[location_id] = location_voter_counts.get(location_id, 0) + 1
         
         max_voters = max(location_voter_counts.values()) if location_voter_counts else 0
@@ -793,8 +1018,8 @@ class EgyptElectionPDFExtractor:
 ## Extraction Details
 - **PDF File**: {self.pdf_path}
 - **Extraction Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-- **Governorate**: كفر الشيخ
-- **District**: مطوبس
+- **Governorate**: {self.governorate}
+- **District**: {self.district}
 
 ## Sample Locations
 """
@@ -817,7 +1042,7 @@ class EgyptElectionPDFExtractor:
 ## Files Generated
 - `locations_table.csv` / `locations_table.xlsx` - Polling station information
 - `voters_table.csv` / `voters_table.xlsx` - Individual voter records
-- `election_data.json` - Complete dataset in JSON format
+- `election_data.json` - Dataset metadata; records in `election_data.locations.ndjson` and `election_data.voters.ndjson` (one JSON object per line)
 - `raw_pdf_text.txt` - Raw extracted PDF text for debugging
 """
         
@@ -834,7 +1059,8 @@ class EgyptElectionPDFExtractor:
         
         try:
             # Process PDF
-            locations, voters = self.process_pdf()
+            with memory_snapshot('process_pdf'):
+                locations, voters = self.process_pdf()
             
             if not locations:
                 raise ValueError("No locations extracted from PDF")
@@ -853,6 +1079,14 @@ class EgyptElectionPDFExtractor:
                 'total_locations': len(locations),
                 'total_voters': len(voters)
             }
+            if self.page_router is not None:
+                result['route_report'] = self.page_router.save_report(self.output_dir)
+            if self.ocr_fallback is not None:
+                result['ocr_report'] = self.ocr_fallback.save_report(self.output_dir)
+            if self.page_guard is not None:
+                result['quarantine_file'] = self.page_guard.manifest_file
+            result['run_report'] = metrics.write_report(self.output_dir, pdf_file=self.pdf_path,
+                                                        total_voters=len(voters))
             
             logger.info("🎉 Extraction completed successfully!")
             return result
@@ -875,8 +1109,17 @@ def main():
     print("🇪🇬 Egypt 2025 Election Voter PDF Extraction – AI Agent")
     print("=" * 80)
     
+    # --gazetteer: resolve committee headers against the district's known locations
+    gazetteer = None
+    if '--gazetteer' in sys.argv:
+        from location_gazetteer import CANONICAL_FILE, LocationGazetteer
+        if not os.path.exists(CANONICAL_FILE):
+            print(f"❌ Locations file not found: {CANONICAL_FILE}")
+            return False
+        gazetteer = LocationGazetteer.from_csvs()
+    
     # Initialize extractor
-    extractor = EgyptElectionPDFExtractor(pdf_file, output_directory)
+    extractor = EgyptElectionPDFExtractor(pdf_file, output_directory, gazetteer=gazetteer)
     
     # Run extraction
     result = extractor.run_extraction()
@@ -900,7 +1143,7 @@ def main():
     return True
 
 if __name__ == "__main__":
-    success = main()
+    success = run_main(main)
     if success:
         print("\n🚀 Ready for database import!")
     else:
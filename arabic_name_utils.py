@@ -0,0 +1,83 @@
+"""
+Shared Arabic name helpers for the voter roll tools
+Cleaning, splitting and search normalization used by the upload scripts,
+the offline mirror and the search/dedup tools
+"""
+import re
+import unicodedata
+
+import pandas as pd
+
+ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+ENGLISH_DIGITS = '0123456789'
+ARABIC_DIGIT_TABLE = str.maketrans(ARABIC_DIGITS, ENGLISH_DIGITS)
+
+# Letter variants that the PDFs (and people typing searches) use interchangeably
+SEARCH_LETTER_TABLE = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+})
+
+# Harakat, tatweel and RTL/LTR marks carry no meaning for matching
+SEARCH_DROP_PATTERN = re.compile(r'[\u064b-\u0652\u0670\u0640\u202a-\u202e\u200e\u200f]')
+
+
+def clean_arabic_text(text):
+    """Remove RTL marks and extra whitespace"""
+    if pd.isna(text):
+        return ''
+    text = str(text)
+    text = re.sub(r'[\u202a-\u202e\u200e\u200f]', '', text)
+    text = ' '.join(text.split())
+    return text.strip()
+
+
+def split_arabic_name(full_name):
+    """Split Arabic name into first, family, and middle names"""
+    full_name = clean_arabic_text(full_name)
+
+    if not full_name:
+        return ('', '', '')
+
+    parts = full_name.split()
+
+    if len(parts) == 0:
+        return ('', '', '')
+    elif len(parts) == 1:
+        return (parts[0], '', '')
+    elif len(parts) == 2:
+        return (parts[0], parts[1], '')
+    else:
+        first_name = parts[0]
+        family_name = parts[-1]
+        middle_names = ' '.join(parts[1:-1])
+        return (first_name, family_name, middle_names)
+
+
+def arabic_to_english_number(text):
+    """Convert Arabic numerals to English"""
+    if pd.isna(text):
+        return text
+    return str(text).translate(ARABIC_DIGIT_TABLE)
+
+
+def normalize_arabic_name(text):
+    """Normalize a name for searching/matching (alef/yaa/taa marbuta variants, no harakat)"""
+    text = clean_arabic_text(text)
+    if not text:
+        return ''
+    text = SEARCH_DROP_PATTERN.sub('', text)
+    return text.translate(SEARCH_LETTER_TABLE)
+
+
+def name_match_key(text):
+    """Key for comparing extracted names with reference names
+
+    NFKC folds PDF presentation forms back to base letters; spaces are dropped because
+    several extractors lose them (extract_onepage.normalize_arabic_glyphs).
+    """
+    if pd.isna(text):
+        return ''
+    return normalize_arabic_name(unicodedata.normalize('NFKC', str(text))).replace(' ', '')
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Batch District Runner
+Extracts many district PDFs concurrently with EgyptElectionPDFExtractor:
+
+- input: a directory of PDFs or a manifest (CSV/JSON with pdf, district[, governorate])
+- one worker process per PDF, --workers of them at a time, so a crashing PDF only
+  fails itself; one output partition per PDF, named by its path below the input
+  directory or manifest: output/districts/<dir>__<pdf name>/locations_table.csv, ...
+- ids never collide across districts (--ids):
+    offsets : a fixed location_id / voter_id range per district, remembered in the
+              status file, so re-running a district keeps its ids (default)
+    blocks  : ranges claimed on demand from id_allocator.py, from a locked file in the
+              output directory or from the database with --db-url
+    hash    : deterministic 53-bit ids from (district, committee, position of the
+              voter in the committee); the voters table needs a BIGINT voter_id
+              (sql/create_id_blocks.sql)
+- per-file status in output/districts/batch_status.json; a failing PDF is recorded
+  and the rest of the batch continues. --resume skips files already done.
+
+Usage:
+    python batch_district_runner.py --input-dir pdfs/
+    python batch_district_runner.py --manifest districts.csv --workers 4 --resume
+    python batch_district_runner.py --input-dir pdfs/ --ids blocks --db-url postgresql://...
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DEFAULT_OUTPUT_DIR = os.path.join('output', 'districts')
+STATUS_FILE = 'batch_status.json'
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+ID_MODES = ('offsets', 'blocks', 'hash')
+ID_BLOCKS_FILE = 'id_blocks.json'
+
+# Id space reserved per district block: a district may hold up to
+# LOCATION_BLOCK polling locations and VOTER_BLOCK voters
+LOCATION_BLOCK = 10_000
+VOTER_BLOCK = 10_000_000
+
+
+def load_manifest(manifest_path: str) -> List[Dict]:
+    """Manifest rows: pdf (path relative to the manifest), district, optional governorate"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    if manifest_path.lower().endswith('.json'):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(manifest_path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+
+    entries = []
+    for row in rows:
+        pdf = (row.get('pdf') or '').strip()
+        if not pdf:
+            continue
+        pdf = pdf if os.path.isabs(pdf) else os.path.join(base_dir, pdf)
+        entries.append({
+            'pdf': pdf,
+            'partition': partition_name(pdf, base_dir),
+            'district': (row.get('district') or '').strip() or None,
+            'governorate': (row.get('governorate') or '').strip() or None,
+        })
+    return entries
+
+
+def scan_directory(input_dir: str) -> List[Dict]:
+    """Every PDF in the directory; the district defaults to the file name"""
+    return [
+        {'pdf': os.path.join(input_dir, name), 'partition': partition_name(name),
+         'district': os.path.splitext(name)[0].strip(), 'governorate': None}
+        for name in sorted(os.listdir(input_dir))
+        if name.lower().endswith('.pdf')
+    ]
+
+
+def partition_name(pdf_path: str, base_dir: Optional[str] = None) -> str:
+    """Partition directory for a PDF: its path below base_dir, without the extension
+
+    Directories are joined with '__', so a/roll.pdf and b/roll.pdf get a__roll and
+    b__roll; without base_dir (or outside it) the file name alone is used.
+    """
+    relative = os.path.relpath(pdf_path, base_dir) if base_dir else os.path.basename(pdf_path)
+    if relative.startswith(os.pardir):
+        relative = os.path.basename(pdf_path)
+    parts = os.path.splitext(os.path.normpath(relative))[0].split(os.sep)
+    return '__'.join(part.strip().replace(' ', '_') for part in parts if part.strip()) or 'district'
+
+
+def assign_id_blocks(entries: List[Dict], known_blocks: Dict[str, int]) -> List[Dict]:
+    """Give each entry its own location_id / voter_id range
+
+    Partitions keep the block recorded in batch_status.json; new ones take the next
+    free blocks, so adding a PDF to the directory never renumbers existing districts.
+    """
+    used = set(known_blocks.values())
+    next_block = 0
+    for entry in entries:
+        block = known_blocks.get(entry['partition'])
+        if block is None:
+            while next_block in used:
+                next_block += 1
+            block = next_block
+            used.add(block)
+        entry['block'] = block
+        entry['location_id_offset'] = block * LOCATION_BLOCK
+        entry['voter_id_offset'] = block * VOTER_BLOCK
+    return entries
+
+
+def make_id_allocator(ids: str, output_root: str, district: Optional[str], db_url: Optional[str] = None):
+    """id_allocator.py allocator for one worker (None for fixed offsets)"""
+    from id_allocator import (BlockIdAllocator, DeterministicIdAllocator, FileBlockStore,
+                              PostgresBlockStore)
+
+    if ids == 'hash':
+        return DeterministicIdAllocator()
+    if ids == 'blocks':
+        store = PostgresBlockStore(db_url) if db_url else FileBlockStore(os.path.join(output_root, ID_BLOCKS_FILE))
+        return BlockIdAllocator(store, owner=district)
+    return None
+
+
+def extract_district(entry: Dict, output_dir: str, ids: str = 'offsets', db_url: Optional[str] = None) -> Dict:
+    """Worker entry point: extract one district PDF into its partition"""
+    import logging
+    from ai_agent_pdf_extractor import EgyptElectionPDFExtractor
+
+    logging.getLogger().setLevel(logging.WARNING)
+    start = time.perf_counter()
+    allocator = make_id_allocator(ids, os.path.dirname(output_dir), entry['district'], db_url)
+    extractor = EgyptElectionPDFExtractor(
+        entry['pdf'], output_dir,
+        district=entry['district'], governorate=entry['governorate'],
+        location_id_offset=entry['location_id_offset'], voter_id_offset=entry['voter_id_offset'],
+        id_allocator=allocator,
+    )
+    try:
+        result = extractor.run_extraction()
+    finally:
+        if hasattr(getattr(allocator, 'store', None), 'close'):
+            allocator.store.close()
+    result['seconds'] = round(time.perf_counter() - start, 2)
+
+    if result['status'] == 'success' and allocator is None:
+        if result['total_locations'] > LOCATION_BLOCK or result['total_voters'] > VOTER_BLOCK:
+            return {'status': 'error', 'seconds': result['seconds'],
+                    'error': f"{result['total_locations']} locations / {result['total_voters']} voters "
+                             f"exceed the reserved id block"}
+    return result
+
+
+def isolated_extract(entry: Dict, output_dir: str, ids: str, db_url: Optional[str]) -> Dict:
+    """extract_district in a process of its own, so a crash fails only this PDF"""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(extract_district, entry, output_dir, ids, db_url).result()
+        except BrokenProcessPool as e:
+            # The worker died (e.g. out of memory) while extracting this PDF
+            return {'status': 'error', 'error': f"worker crashed: {e}"}
+
+
+class BatchStatus:
+    """Per-file progress written to batch_status.json after every change"""
+
+    def __init__(self, status_file: str):
+        self.status_file = status_file
+        self.files: Dict[str, Dict] = {}
+        if os.path.exists(status_file):
+            with open(status_file, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+
+    def update(self, partition: str, **fields):
+        self.files.setdefault(partition, {}).update(fields, updated_at=datetime.now().isoformat())
+        self.save()
+
+    def is_done(self, partition: str, pdf_path: str) -> bool:
+        entry = self.files.get(partition, {})
+        return (entry.get('status') == 'success' and entry.get('pdf') == pdf_path
+                and entry.get('pdf_mtime') == os.path.getmtime(pdf_path))
+
+    def save(self):
+        counts: Dict[str, int] = {}
+        for entry in self.files.values():
+            counts[entry.get('status', 'unknown')] = counts.get(entry.get('status', 'unknown'), 0) + 1
+        temp_file = self.status_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.now().isoformat(), 'counts': counts, 'files': self.files},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.status_file)
+
+
+def run_batch(entries: List[Dict], output_dir: str = DEFAULT_OUTPUT_DIR, workers: int = DEFAULT_WORKERS,
+              resume: bool = False, ids: str = 'offsets', db_url: Optional[str] = None) -> Dict[str, Dict]:
+    os.makedirs(output_dir, exist_ok=True)
+    for entry in entries:
+        entry.setdefault('partition', partition_name(entry['pdf']))
+    status = BatchStatus(os.path.join(output_dir, STATUS_FILE))
+    entries = assign_id_blocks(entries, {partition: entry['block'] for partition, entry in status.files.items()
+                                         if entry.get('block') is not None})
+
+    pending = []
+    seen = set()
+    for entry in entries:
+        partition = entry['partition']
+        if partition in seen:
+            print(f"⚠️  {partition}: listed twice, skipping {entry['pdf']}")
+            continue
+        seen.add(partition)
+        if not os.path.exists(entry['pdf']):
+            status.update(partition, pdf=entry['pdf'], district=entry['district'], status='error',
+                          error='PDF file not found')
+            print(f"❌ {partition}: PDF not found ({entry['pdf']})")
+            continue
+        if resume and status.is_done(partition, entry['pdf']):
+            print(f"⏭️  {partition}: already extracted")
+            continue
+        status.update(partition, pdf=entry['pdf'], pdf_mtime=os.path.getmtime(entry['pdf']),
+                      district=entry['district'], block=entry['block'],
+                      location_id_offset=entry['location_id_offset'], voter_id_offset=entry['voter_id_offset'],
+                      ids=ids, status='queued', error=None)
+        pending.append((partition, entry))
+
+    total = len(pending)
+    print(f"🚀 {total} PDF(s) across {min(workers, total) if total else 0} worker(s)")
+    # Threads only wait on their own one-process pool, so a dying worker cannot
+    # break the pool the other PDFs run in
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, total or 1))) as pool:
+        futures = {}
+        for partition, entry in pending:
+            futures[pool.submit(isolated_extract, entry, os.path.join(output_dir, partition), ids, db_url)] = partition
+            status.update(partition, status='running')
+
+        for done, future in enumerate(as_completed(futures), 1):
+            partition = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+            if result['status'] == 'success':
+                status.update(partition, status='success', locations=result['total_locations'],
+                              voters=result['total_voters'], seconds=result.get('seconds'),
+                              outputs={key: value for key, value in result.items() if key.endswith('_file')
+                                       or key.endswith('_csv') or key.endswith('_excel')})
+                print(f"[{done}/{total}] ✅ {partition}: {result['total_locations']:,} locations, "
+                      f"{result['total_voters']:,} voters ({result.get('seconds', 0):.1f}s)")
+            else:
+                status.update(partition, status='error', error=result.get('error'), seconds=result.get('seconds'))
+                print(f"[{done}/{total}] ❌ {partition}: {result.get('error')}")
+
+    return status.files
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Extract many district PDFs concurrently")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input-dir', help="Directory of district PDFs")
+    source.add_argument('--manifest', help="CSV/JSON with pdf, district and optional governorate")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--resume', action='store_true', help="Skip PDFs that already succeeded")
+    parser.add_argument('--ids', choices=ID_MODES, default='offsets', help="How location/voter ids are allocated")
+    parser.add_argument('--db-url', default=os.getenv('SUPABASE_DB_URL'),
+                        help="Postgres url for --ids blocks (sql/create_id_blocks.sql); default: a file store")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🗂️  BATCH DISTRICT EXTRACTION")
+    print("=" * 70)
+
+    entries = load_manifest(args.manifest) if args.manifest else scan_directory(args.input_dir)
+    if not entries:
+        print("❌ No PDFs found")
+        return False
+
+    start = time.perf_counter()
+    files = run_batch(entries, args.output_dir, args.workers, args.resume, args.ids,
+                      args.db_url if args.ids == 'blocks' else None)
+
+    succeeded = [entry for entry in files.values() if entry.get('status') == 'success']
+    failed = [name for name, entry in files.items() if entry.get('status') == 'error']
+    print("\n" + "=" * 70)
+    print(f"✅ {len(succeeded)} succeeded, ❌ {len(failed)} failed in {time.perf_counter() - start:.1f}s")
+    print(f"👥 {sum(entry.get('voters', 0) for entry in succeeded):,} voters, "
+          f"📍 {sum(entry.get('locations', 0) for entry in succeeded):,} locations")
+    if failed:
+        print(f"   Failed: {', '.join(failed)}")
+    print(f"📁 {os.path.join(args.output_dir, STATUS_FILE)}")
+    return not failed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
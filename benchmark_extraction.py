@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Extraction Benchmark Suite
+Runs every extractor path against synthetic voter-roll PDFs (synthetic_voter_pdf.py)
+at several sizes and reports pages/sec, memory and accuracy against the ground truth:
+
+- pypdf2_text      : EgyptElectionPDFExtractor.process_pdf (PyPDF2 text + regex parsing)
+- pdfplumber_words : extract_onepage footer numbers + parse_rows on page words
+- pdfplumber_tables: extract_108_improved.extract_with_tables (page.extract_tables)
+- pdfplumber_chars : process_pdf on text rebuilt from page.chars (char_line_reassembly.py)
+- pypdfium2_words  : pdfplumber_words on words from the PDFium backend (pdf_backends.py)
+- pymupdf_words    : pdfplumber_words on words from the MuPDF backend (only run by default
+                     when pymupdf is installed)
+
+Each run happens in a fresh process so peak RSS belongs to that extractor alone.
+Results are appended to output/benchmarks/extraction_benchmarks.jsonl (next to this
+script) with the git commit, so runs on different commits can be compared with --compare.
+
+The ground truth must round-trip: the run fails when REFERENCE_EXTRACTOR finds none
+of the truth names in a PDF, since the accuracy columns then measure the generator.
+
+Usage:
+    python benchmark_extraction.py                          (10, 100, 1000 pages)
+    python benchmark_extraction.py --sizes 10,100 --extractors pdfplumber_words
+    python benchmark_extraction.py --compare ec7c526
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from arabic_name_utils import name_match_key
+from pipeline_metrics import git_revision, peak_rss_mb
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'benchmarks')
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, 'extraction_benchmarks.jsonl')
+DEFAULT_SIZES = [10, 100, 1000]
+GLYPH_MODES = ['visual', 'logical']
+# Reads both glyph modes of the generator back; zero recall means the PDF is unreadable
+REFERENCE_EXTRACTOR = 'pdfplumber_chars'
+
+
+def run_pypdf2_text(pdf_path: str, text_source: str = 'pypdf2') -> List[Dict]:
+    from ai_agent_pdf_extractor import EgyptElectionPDFExtractor
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        extractor = EgyptElectionPDFExtractor(pdf_path, output_dir, text_source=text_source)
+        locations, voters = extractor.process_pdf()
+    committees = {location['location_id']: location['location_number'] for location in locations}
+    # This path numbers voters itself, so there is no voter number to check
+    return [{'voter_number': None, 'full_name': voter['full_name'],
+             'location_number': committees.get(voter['location_id'])} for voter in voters]
+
+
+def run_pdfplumber_words(pdf_path: str) -> List[Dict]:
+    import pdfplumber
+    from extract_onepage import extract_footer_numbers, parse_rows
+    from extraction_engine import WORD_SETTINGS
+
+    records = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            try:
+                page_number, location_number = extract_footer_numbers(page)
+            except ValueError:
+                continue
+            words = page.extract_words(**WORD_SETTINGS)
+            for row in parse_rows(words, page_number, location_number, page.height):
+                records.append({'voter_number': row.voter_number, 'full_name': row.full_name,
+                                'location_number': row.location_number})
+    return records
+
+
+def run_pdfplumber_tables(pdf_path: str) -> List[Dict]:
+    from extract_108_improved import extract_with_tables
+
+    # extract_with_tables prints a progress line per page
+    with contextlib.redirect_stdout(io.StringIO()):
+        voters, _ = extract_with_tables(pdf_path)
+    return [{'voter_number': voter['voter_number'], 'full_name': voter['voter_name'],
+             'location_number': None} for voter in voters]
+
+
+def run_pdfplumber_chars(pdf_path: str) -> List[Dict]:
+    return run_pypdf2_text(pdf_path, text_source='chars')
+
+
+def run_backend_words(pdf_path: str, backend: str) -> List[Dict]:
+    from extract_onepage import parse_rows
+    from pdf_backends import footer_numbers, open_backend
+
+    records = []
+    with open_backend(pdf_path, backend) as pdf:
+        for index in range(len(pdf)):
+            words = pdf.page_words(index)
+            try:
+                page_number, location_number = footer_numbers(pdf, index, words)
+            except ValueError:
+                continue
+            for row in parse_rows(words, page_number, location_number, pdf.page_size(index)[1]):
+                records.append({'voter_number': row.voter_number, 'full_name': row.full_name,
+                                'location_number': row.location_number})
+    return records
+
+
+def run_pypdfium2_words(pdf_path: str) -> List[Dict]:
+    return run_backend_words(pdf_path, 'pypdfium2')
+
+
+def run_pymupdf_words(pdf_path: str) -> List[Dict]:
+    return run_backend_words(pdf_path, 'pymupdf')
+
+
+EXTRACTORS = {
+    'pypdf2_text': run_pypdf2_text,
+    'pdfplumber_words': run_pdfplumber_words,
+    'pdfplumber_tables': run_pdfplumber_tables,
+    'pdfplumber_chars': run_pdfplumber_chars,
+    'pypdfium2_words': run_pypdfium2_words,
+    'pymupdf_words': run_pymupdf_words,
+}
+# Extractors that need an optional PDF backend (pdf_backends.py)
+EXTRACTOR_BACKENDS = {'pypdfium2_words': 'pypdfium2', 'pymupdf_words': 'pymupdf'}
+
+
+def default_extractors() -> List[str]:
+    """Every extractor whose PDF backend is installed"""
+    from pdf_backends import available_backends
+
+    installed = available_backends()
+    return [name for name in EXTRACTORS if EXTRACTOR_BACKENDS.get(name, installed[0]) in installed]
+
+
+def _measure(extractor_name: str, pdf_path: str) -> Dict:
+    """Child-process entry point: run one extractor and time it"""
+    import logging
+    logging.disable(logging.INFO)
+
+    rss_before = peak_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        records = EXTRACTORS[extractor_name](pdf_path)
+        error = None
+    except Exception as e:
+        records = []
+        error = f"{type(e).__name__}: {e}"
+    return {
+        'records': records,
+        'error': error,
+        'seconds': time.perf_counter() - wall_start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': (peak_rss_mb() - rss_before) if rss_before is not None else None,
+    }
+
+
+def load_truth(truth_csv: str) -> List[Dict]:
+    with open(truth_csv, 'r', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+
+def score(records: List[Dict], truth: List[Dict]) -> Dict:
+    """Name precision/recall (multiset) and how many extracted numbers sit next to the right name"""
+    truth_names = Counter(name_match_key(row['full_name']) for row in truth)
+    extracted_names = Counter(name_match_key(record['full_name']) for record in records)
+    matched = sum((truth_names & extracted_names).values())
+    # Letter-level overlap shows progress even while whole names still fail to match
+    truth_chars = Counter(''.join(truth_names.elements()))
+    extracted_chars = Counter(''.join(extracted_names.elements()))
+    matched_chars = sum((truth_chars & extracted_chars).values())
+
+    truth_pairs = {(int(row['voter_number']), int(row['location_number']), name_match_key(row['full_name']))
+                   for row in truth}
+    truth_pairs_any_location = {(number, name) for number, _, name in truth_pairs}
+    numbered = [record for record in records if record.get('voter_number') is not None]
+    correct_numbers = 0
+    for record in numbered:
+        key = name_match_key(record['full_name'])
+        if record.get('location_number') is not None:
+            correct_numbers += (int(record['voter_number']), int(record['location_number']), key) in truth_pairs
+        else:
+            correct_numbers += (int(record['voter_number']), key) in truth_pairs_any_location
+
+    return {
+        'extracted': len(records),
+        'truth': len(truth),
+        'name_precision': round(matched / len(records), 4) if records else 0.0,
+        'name_recall': round(matched / len(truth), 4) if truth else 0.0,
+        'char_recall': round(matched_chars / sum(truth_chars.values()), 4) if truth_chars else 0.0,
+        'number_accuracy': round(correct_numbers / len(numbered), 4) if numbered else None,
+    }
+
+
+def ensure_pdf(pages: int, glyph_mode: str, seed: int, font: Optional[str]) -> Dict:
+    """Generate (or reuse) the synthetic PDF for one size/mode"""
+    from synthetic_voter_pdf import generate_voter_roll_pdf
+
+    pdf_path = os.path.join(BENCHMARK_DIR, 'pdfs', f'synthetic_{pages}p_{glyph_mode}_s{seed}.pdf')
+    truth_csv = os.path.splitext(pdf_path)[0] + '_truth.csv'
+    if not (os.path.exists(pdf_path) and os.path.exists(truth_csv)):
+        print(f"🧪 Generating {pages}-page {glyph_mode} PDF...")
+        generate_voter_roll_pdf(pdf_path, pages, glyph_mode=glyph_mode, seed=seed, font_path=font)
+    return {'pdf': pdf_path, 'truth_csv': truth_csv}
+
+
+def run_benchmarks(sizes: List[int], extractors: List[str], glyph_modes: List[str],
+                   seed: int = 2025, font: Optional[str] = None) -> List[Dict]:
+    commit = git_revision()
+    results = []
+    # spawn: every run starts from a clean interpreter, so peak RSS is per extractor
+    context = multiprocessing.get_context('spawn')
+
+    for glyph_mode in glyph_modes:
+        for pages in sizes:
+            files = ensure_pdf(pages, glyph_mode, seed, font)
+            truth = load_truth(files['truth_csv'])
+            for extractor_name in extractors:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    measured = pool.submit(_measure, extractor_name, files['pdf']).result()
+
+                result = {
+                    'timestamp': datetime.now().isoformat(),
+                    'commit': commit,
+                    'extractor': extractor_name,
+                    'glyph_mode': glyph_mode,
+                    'pages': pages,
+                    'seconds': round(measured['seconds'], 3),
+                    'cpu_seconds': round(measured['cpu_seconds'], 3),
+                    'pages_per_sec': round(pages / measured['seconds'], 2) if measured['seconds'] > 0 else None,
+                    'peak_rss_mb': measured['peak_rss_mb'],
+                    'rss_growth_mb': measured['rss_growth_mb'],
+                    'error': measured['error'],
+                    **score(measured['records'], truth),
+                }
+                results.append(result)
+                print_result(result)
+    return results
+
+
+def print_result(result: Dict):
+    accuracy = result['number_accuracy']
+    print(f"  {result['extractor']:<18} {result['glyph_mode']:<8} {result['pages']:>5}p  "
+          f"{result['pages_per_sec'] or 0:>8.1f} p/s  {result['peak_rss_mb'] or 0:>7.1f} MB  "
+          f"recall {result['name_recall']:.3f}  precision {result['name_precision']:.3f}  "
+          f"chars {result['char_recall']:.3f}  "
+          f"numbers {'-' if accuracy is None else f'{accuracy:.3f}'}"
+          + (f"  ❌ {result['error']}" if result['error'] else ''))
+
+
+def unreadable_pdfs(results: List[Dict]) -> List[str]:
+    """PDFs on which REFERENCE_EXTRACTOR recovered no ground-truth name"""
+    return [f"{result['glyph_mode']} {result['pages']}p" for result in results
+            if result['extractor'] == REFERENCE_EXTRACTOR and not result['name_recall']]
+
+
+def save_results(results: List[Dict], results_file: str = RESULTS_FILE) -> str:
+    os.makedirs(os.path.dirname(results_file), exist_ok=True)
+    with open(results_file, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+    return results_file
+
+
+def compare_with(commit: str, results: List[Dict], results_file: str = RESULTS_FILE):
+    """Print speed/accuracy deltas against the latest stored runs of another commit"""
+    if not os.path.exists(results_file):
+        print(f"⚠️ No stored results in {results_file}")
+        return
+
+    baseline: Dict[tuple, Dict] = {}
+    with open(results_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            stored = json.loads(line)
+            if stored.get('commit') and stored['commit'].startswith(commit):
+                baseline[(stored['extractor'], stored['glyph_mode'], stored['pages'])] = stored
+
+    print(f"\n📊 Compared with {commit}:")
+    for result in results:
+        base = baseline.get((result['extractor'], result['glyph_mode'], result['pages']))
+        if not base or not base.get('pages_per_sec') or not result.get('pages_per_sec'):
+            continue
+        speedup = result['pages_per_sec'] / base['pages_per_sec']
+        print(f"  {result['extractor']:<18} {result['glyph_mode']:<8} {result['pages']:>5}p  "
+              f"speed x{speedup:.2f}  recall {result['name_recall'] - base['name_recall']:+.3f}  "
+              f"RSS {((result['peak_rss_mb'] or 0) - (base['peak_rss_mb'] or 0)):+.1f} MB")
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Benchmark the PDF extractors on synthetic voter rolls")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma separated page counts")
+    parser.add_argument('--extractors', default=','.join(default_extractors()),
+                        help="Comma separated extractor names (default: all with their PDF backend installed)")
+    parser.add_argument('--glyph-modes', default=','.join(GLYPH_MODES), help="visual, logical or both")
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--font', help="TrueType font with Arabic glyphs for the generator")
+    parser.add_argument('--compare', help="Commit hash to compare against")
+    parser.add_argument('--no-save', action='store_true', help="Do not append to the results file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    extractors = args.extractors.split(',')
+    unknown = [name for name in extractors if name not in EXTRACTORS]
+    if unknown:
+        print(f"❌ Unknown extractor(s): {', '.join(unknown)} (choose from {', '.join(EXTRACTORS)})")
+        return False
+
+    print("=" * 70)
+    print("⏱️  EXTRACTION BENCHMARK")
+    print("=" * 70)
+    results = run_benchmarks(sizes, extractors, args.glyph_modes.split(','), args.seed, args.font)
+
+    if not args.no_save:
+        print(f"\n📁 Results appended to {save_results(results)}")
+    if args.compare:
+        compare_with(args.compare, results)
+
+    unreadable = unreadable_pdfs(results)
+    if unreadable:
+        print(f"\n❌ {REFERENCE_EXTRACTOR} recovered no ground-truth names from: {', '.join(unreadable)}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Character Line Reassembly
+Some election PDFs come out of PyPDF2 one glyph per line in visual order
+(see logic_extracted.txt), which is what the reverse_arabic / fix_arabic_name
+hacks in the extract_108_* scripts try to undo. This module rebuilds logical-
+order text from pdfplumber's per-character boxes (page.chars):
+
+1. lines : characters clustered on their vertical centre (NumPy gap analysis)
+2. words : horizontal gaps inside a line wider than a fraction of the median
+           glyph height; much wider gaps split table cells
+3. order : cells and words right to left, Arabic letters right to left, digit /
+           Latin runs left to right; presentation forms folded with NFKC
+
+On table rows (lines with at least one cell gap) a digit run touching a name is
+split into its own cell; other lines, such as the page footer
+"1 الصحفة رقممن 25 رقم اللجنة ٧٦", only get a word break there, so they stay
+one cell and read as one line. Cells are joined with three spaces, the separator extract_names_from_line already splits names on, or
+put on lines of their own (split_cells). Unmapped glyphs (NUL characters) keep
+their position for the gap analysis and are dropped from the text.
+
+Usage:
+    python char_line_reassembly.py logic.pdf --pages 1-3
+    python char_line_reassembly.py logic.pdf --output output/logic_reassembled.txt
+
+    text = reassemble_page(pdf.pages[0])
+"""
+
+import argparse
+import os
+import sys
+import time
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Gaps as multiples of the median glyph height on the page
+LINE_GAP = 0.5   # vertical centre jump that starts a new line
+WORD_GAP = 0.2   # horizontal gap that starts a new word
+CELL_GAP = 2.0   # horizontal gap that starts a new table cell
+
+CELL_SEPARATOR = '   '
+UNMAPPED_GLYPHS = '\x00\ufffd'
+
+
+def _is_ltr(ch: str) -> bool:
+    """Digits (Western and Arabic-Indic) and Latin letters run left to right"""
+    return ch.isdigit() or ('A' <= ch <= 'z')
+
+
+def order_word(texts: List[str], drop: str = UNMAPPED_GLYPHS) -> str:
+    """Characters sorted right to left -> logical order, keeping LTR runs left to right"""
+    ordered: List[str] = []
+    run: List[str] = []
+    for ch in texts:
+        if _is_ltr(ch):
+            run.append(ch)
+            continue
+        if run:
+            ordered.extend(reversed(run))
+            run = []
+        ordered.append(ch)
+    ordered.extend(reversed(run))
+    text = ''.join(ch for ch in ordered if ch not in drop)
+    return unicodedata.normalize('NFKC', text)
+
+
+def reassemble_chars(chars: Sequence[Dict], line_gap: float = LINE_GAP, word_gap: float = WORD_GAP,
+                     cell_gap: float = CELL_GAP) -> List[List[List[str]]]:
+    """Lines (top to bottom) of cells (right to left) of words (right to left)"""
+    chars = [char for char in chars if char['text'] and not char['text'].isspace()]
+    if not chars:
+        return []
+
+    texts = np.array([char['text'] for char in chars], dtype=object)
+    x0 = np.fromiter((char['x0'] for char in chars), float, len(chars))
+    x1 = np.fromiter((char['x1'] for char in chars), float, len(chars))
+    top = np.fromiter((char['top'] for char in chars), float, len(chars))
+    bottom = np.fromiter((char['bottom'] for char in chars), float, len(chars))
+
+    # Overprinted (fake bold) glyphs: two glyphs at the same spot
+    _, unique = np.unique(np.stack([np.round(x0, 1), np.round(top, 1)]), axis=1, return_index=True)
+    if len(unique) < len(chars):
+        unique.sort()
+        texts, x0, x1, top, bottom = texts[unique], x0[unique], x1[unique], top[unique], bottom[unique]
+
+    height = float(np.median(bottom - top)) or 1.0
+    centre = (top + bottom) / 2
+
+    # Lines: sort by centre and cut where consecutive centres jump
+    by_centre = np.argsort(centre, kind='stable')
+    line_of = np.empty(len(centre), dtype=int)
+    line_of[by_centre] = np.concatenate([[0], np.cumsum(np.diff(centre[by_centre]) > line_gap * height)])
+
+    # Words and cells: within each line, right to left, cut on horizontal gaps
+    order = np.lexsort((-x1, line_of))
+    same_line = line_of[order][1:] == line_of[order][:-1]
+    gaps = x0[order][:-1] - x1[order][1:]  # left edge of previous char - right edge of next
+    # 1 digit, 2 Arabic letter, 0 anything else; a digit/letter boundary is a word boundary,
+    # and a cell boundary on table rows
+    kind = np.array([1 if ch.isdigit() else 2 if '\u0621' <= ch <= '\u06ff' or '\ufb50' <= ch <= '\ufeff' else 0
+                     for ch in texts[order]])
+    script_change = (kind[1:] * kind[:-1] > 0) & (kind[1:] != kind[:-1])
+    cell_gaps = same_line & (gaps > cell_gap * height)
+    table_rows = np.unique(line_of[order][1:][cell_gaps])
+    on_table_row = np.isin(line_of[order][1:], table_rows)
+    new_word = ~same_line | (gaps > word_gap * height) | script_change
+    new_cell = ~same_line | cell_gaps | (script_change & on_table_row)
+
+    lines: List[List[List[str]]] = []
+    word: List[str] = [texts[order[0]]]
+    cell: List[List[str]] = []
+    line: List[List[str]] = []
+    for position in range(1, len(order)):
+        if new_word[position - 1]:
+            cell.append(word)
+            word = []
+            if new_cell[position - 1]:
+                line.append(cell)
+                cell = []
+                if not same_line[position - 1]:
+                    lines.append(line)
+                    line = []
+        word.append(texts[order[position]])
+    cell.append(word)
+    line.append(cell)
+    lines.append(line)
+
+    return [[[order_word(word) for word in cell] for cell in line] for line in lines]
+
+
+def lines_text(lines: List[List[List[str]]], split_cells: bool = False) -> List[str]:
+    """One text line per reassembled line, cells separated by CELL_SEPARATOR
+
+    split_cells puts every cell on its own line instead, the shape PyPDF2 gives
+    for the voter grid, so one line holds one name or one number.
+    """
+    text_lines = []
+    for line in lines:
+        cells = [' '.join(word for word in cell if word) for cell in line]
+        cells = [cell for cell in cells if cell]
+        if split_cells:
+            text_lines.extend(cells)
+        elif cells:
+            text_lines.append(CELL_SEPARATOR.join(cells))
+    return text_lines
+
+
+def reassemble_page(page, split_cells: bool = False, **gaps) -> str:
+    """Logical-order text of one pdfplumber page"""
+    return '\n'.join(lines_text(reassemble_chars(page.chars, **gaps), split_cells))
+
+
+def parse_page_range(spec: Optional[str], total: int) -> List[int]:
+    """'1-3,7' -> [0, 1, 2, 6] (0-based); None -> every page"""
+    if not spec:
+        return list(range(total))
+    indexes = []
+    for part in spec.split(','):
+        start, _, end = part.partition('-')
+        indexes.extend(range(int(start) - 1, min(int(end or start), total)))
+    return indexes
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Rebuild logical-order text from PDF character boxes")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--pages', help="Page range, e.g. 1-3,7 (default: all)")
+    parser.add_argument('--output', help="Text file for the reassembled pages")
+    parser.add_argument('--word-gap', type=float, default=WORD_GAP)
+    parser.add_argument('--cell-gap', type=float, default=CELL_GAP)
+    args = parser.parse_args(argv)
+
+    import pdfplumber
+
+    print("=" * 70)
+    print("🔤 CHARACTER LINE REASSEMBLY")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    chunks = []
+    chars = 0
+    seconds = 0.0
+    with pdfplumber.open(args.pdf) as pdf:
+        indexes = parse_page_range(args.pages, len(pdf.pages))
+        for index in indexes:
+            page = pdf.pages[index]
+            page_chars = page.chars
+            start = time.perf_counter()
+            text = '\n'.join(lines_text(reassemble_chars(page_chars, word_gap=args.word_gap,
+                                                          cell_gap=args.cell_gap)))
+            seconds += time.perf_counter() - start
+            chars += len(page_chars)
+            chunks.append(f"\n--- PAGE {index + 1} ---\n{text}\n")
+            page.flush_cache()
+
+    print(f"📄 {len(indexes)} pages, {chars:,} characters, "
+          f"{seconds * 1000 / max(len(indexes), 1):.1f} ms per page")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(''.join(chunks))
+        print(f"📁 {args.output}")
+    else:
+        print(''.join(chunks)[:2000])
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
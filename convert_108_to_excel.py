@@ -5,6 +5,8 @@ import pdfplumber
 import pandas as pd
 import re
 
+from pdf_page_streaming import map_pages, page_count, page_text, print_memory_report
+
 def clean_arabic_text(text):
     """Clean Arabic text"""
     if not text:
@@ -64,51 +66,51 @@ def extract_voters_from_pdf(pdf_path):
     
     voters = []
     
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"📖 Total pages: {len(pdf.pages)}")
+    total_pages = page_count(pdf_path)
+    print(f"📖 Total pages: {total_pages}")
+    
+    # Pages are streamed and closed one by one, so memory stays flat on full rolls
+    for page_num, text in map_pages(pdf_path, page_text):
+        print(f"   Processing page {page_num}/{total_pages}...", end='\r')
         
-        for page_num, page in enumerate(pdf.pages, 1):
-            print(f"   Processing page {page_num}/{len(pdf.pages)}...", end='\r')
-            
-            # Extract text
-            text = page.extract_text()
-            if not text:
+        if not text:
+            continue
+        
+        lines = text.split('\n')
+        
+        for line in lines:
+            line = clean_arabic_text(line)
+            if not line:
                 continue
             
-            lines = text.split('\n')
+            # Try to extract voter number and name
+            # Pattern: number followed by name
+            parts = line.split()
             
-            for line in lines:
-                line = clean_arabic_text(line)
-                if not line:
-                    continue
-                
-                # Try to extract voter number and name
-                # Pattern: number followed by name
-                parts = line.split()
+            if len(parts) >= 2:
+                # Check if first part is a number (in Arabic or English)
+                first_part = arabic_to_english_number(parts[0])
                 
-                if len(parts) >= 2:
-                    # Check if first part is a number (in Arabic or English)
-                    first_part = arabic_to_english_number(parts[0])
+                if first_part.isdigit():
+                    voter_number = int(first_part)
+                    voter_name = ' '.join(parts[1:])
                     
-                    if first_part.isdigit():
-                        voter_number = int(first_part)
-                        voter_name = ' '.join(parts[1:])
-                        
-                        # Clean the name
-                        voter_name = clean_arabic_text(voter_name)
-                        
-                        # Skip if name is too short or looks like header
-                        if len(voter_name) > 3 and not any(skip in voter_name for skip in ['صفحة', 'لجنة', 'رقم']):
-                            voters.append({
-                                'voter_number': voter_number,
-                                'voter_name': voter_name,
-                                'location_number': location_number or '108',
-                                'location_name': location_name or '',
-                                'location_address': location_address or '',
-                                'page': page_num
-                            })
-        
-        print(f"\n✅ Extracted {len(voters)} voters")
+                    # Clean the name
+                    voter_name = clean_arabic_text(voter_name)
+                    
+                    # Skip if name is too short or looks like header
+                    if len(voter_name) > 3 and not any(skip in voter_name for skip in ['صفحة', 'لجنة', 'رقم']):
+                        voters.append({
+                            'voter_number': voter_number,
+                            'voter_name': voter_name,
+                            'location_number': location_number or '108',
+                            'location_name': location_name or '',
+                            'location_address': location_address or '',
+                            'page': page_num
+                        })
+    
+    print(f"\n✅ Extracted {len(voters)} voters")
+    print_memory_report()
     
     return voters, location_number, location_name, location_address
 
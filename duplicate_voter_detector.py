@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Duplicate Voter Detection
+Finds near-duplicate voter rows left by PDF extraction (merged columns, missing
+spaces, alef/yaa/taa marbuta variants) that the exact (full_name, location_id)
+drop in save_to_csv cannot see, and writes a review report.
+
+Candidates are only compared inside blocks:
+- same location_id and same normalized family name
+- same location_id and same normalized first + father name (catches a corrupted last token)
+Inside a block, candidates share a hash key (so the work stays O(n·k) instead of
+O(n²) over the whole roll):
+- a one-character-deletion variant of the normalized, space-free name (one edit apart)
+- the first and last token, or the first and second-to-last token (one extra or
+  missing token, e.g. a neighbouring column merged into the name)
+Candidates are scored with a bounded edit distance; --threshold decides which
+pairs are reported.
+
+Usage:
+    python duplicate_voter_detector.py --voters output/voters_table.csv
+"""
+
+import argparse
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from arabic_name_utils import normalize_arabic_name
+from voter_roll_io import DEFAULT_VOTERS_CSV, load_voters
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:  # Optional: pure Python fallback below
+    _rf_levenshtein = None
+
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_MAX_BUCKET = 500
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Edit distance, or max_distance + 1 as soon as it is known to exceed max_distance"""
+    if _rf_levenshtein is not None:
+        return _rf_levenshtein.distance(a, b, score_cutoff=max_distance)
+
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    previous = list(range(len(a) + 1))
+    for j, char_b in enumerate(b, 1):
+        current = [j]
+        row_min = j
+        for i, char_a in enumerate(a, 1):
+            cost = 0 if char_a == char_b else 1
+            value = min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + cost)
+            current.append(value)
+            if value < row_min:
+                row_min = value
+        # Every path through this row already costs more than allowed
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def name_similarity(a: str, b: str, threshold: float) -> float:
+    """1 - distance / longest length, or 0.0 when below threshold"""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 0.0
+    max_distance = int(longest * (1 - threshold))
+    if abs(len(a) - len(b)) > max_distance:
+        return 0.0
+
+    distance = bounded_levenshtein(a, b, max_distance)
+    if distance > max_distance:
+        return 0.0
+    return 1 - distance / longest
+
+
+def differs_by_whole_word(tokens_a: List[str], tokens_b: List[str]) -> bool:
+    """True for relatives rather than extraction glitches: same token count, some token is a different word
+
+    Siblings share father/grandfather/family and differ only in the first name, which
+    is a small edit distance over the whole string but a completely different token.
+    """
+    if len(tokens_a) != len(tokens_b):
+        return False
+    for token_a, token_b in zip(tokens_a, tokens_b):
+        if token_a != token_b and bounded_levenshtein(token_a, token_b, 1) > 1:
+            return True
+    return False
+
+
+def deletion_variants(text: str) -> set:
+    """The text itself plus every string with one character removed"""
+    variants = {text}
+    for i in range(len(text)):
+        variants.add(text[:i] + text[i + 1:])
+    return variants
+
+
+def token_keys(tokens: List[str]) -> set:
+    """(first, last) and (first, second-to-last) tokens: names one token apart share one"""
+    if len(tokens) < 2:
+        return set()
+    keys = {(tokens[0], tokens[-1])}
+    if len(tokens) >= 3:
+        keys.add((tokens[0], tokens[-2]))
+    return keys
+
+
+class DuplicateVoterDetector:
+    """Blocking + bounded edit distance duplicate finder"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_bucket_size: int = DEFAULT_MAX_BUCKET):
+        self.threshold = threshold
+        self.max_bucket_size = max_bucket_size
+        self.stats: Dict[str, int] = {}
+
+    def build_blocks(self, voters_df: pd.DataFrame) -> Dict[Tuple, List[int]]:
+        """Group row positions by (location, family) and (location, first + father name)"""
+        blocks: Dict[Tuple, List[int]] = defaultdict(list)
+        locations = voters_df['location_id'].tolist()
+        families = voters_df['family_name'].map(normalize_arabic_name).tolist()
+        leading = voters_df['full_name'].map(lambda name: ' '.join(normalize_arabic_name(name).split()[:2])).tolist()
+
+        for row, (location_id, family, head) in enumerate(zip(locations, families, leading)):
+            if family:
+                blocks[('family', location_id, family)].append(row)
+            if ' ' in head:
+                blocks[('leading', location_id, head)].append(row)
+        return blocks
+
+    def find_duplicates(self, voters_df: pd.DataFrame) -> pd.DataFrame:
+        """Return one row per candidate duplicate pair, best score first"""
+        voters_df = voters_df.reset_index(drop=True)
+        normalized = voters_df['full_name'].map(normalize_arabic_name).tolist()
+        compact = [name.replace(' ', '') for name in normalized]
+        tokens = [name.split() for name in normalized]
+        # Every row sits in up to two blocks, so compute its candidate keys once
+        keys = [deletion_variants(name) | token_keys(name_tokens) for name, name_tokens in zip(compact, tokens)]
+
+        seen = set()
+        pairs = []
+        comparisons = 0
+        oversized = 0
+
+        # Exact voter-number collisions inside a location need no name comparison at all
+        collision_keys = voters_df[['location_id', 'voter_id']]
+        collisions = voters_df[collision_keys.duplicated(keep=False)]
+        for _, group in collisions.groupby(['location_id', 'voter_id']):
+            rows = group.index.tolist()
+            for i_pos, i in enumerate(rows):
+                for j in rows[i_pos + 1:]:
+                    seen.add((i, j))
+                    pairs.append((i, j, 1.0, 'same_voter_number', 'voter_id'))
+
+        blocks = self.build_blocks(voters_df)
+        for key, rows in blocks.items():
+            if len(rows) < 2:
+                continue
+
+            # Candidates come from a hash lookup on the deletion variants and token keys
+            # instead of comparing every pair; the threshold decides which are duplicates
+            neighborhood: Dict[object, List[int]] = defaultdict(list)
+            for row in rows:
+                for key_value in keys[row]:
+                    neighborhood[key_value].append(row)
+
+            for bucket in neighborhood.values():
+                if len(bucket) < 2:
+                    continue
+                if len(bucket) > self.max_bucket_size:
+                    oversized += 1
+                    continue
+
+                for i_pos, i in enumerate(bucket):
+                    for j in bucket[i_pos + 1:]:
+                        pair = (i, j) if i < j else (j, i)
+                        if i == j or pair in seen:
+                            continue
+                        seen.add(pair)
+                        comparisons += 1
+
+                        if normalized[i] == normalized[j]:
+                            reason = 'normalized_match'
+                            score = 1.0
+                        elif compact[i] == compact[j]:
+                            reason = 'spacing'
+                            score = 1.0
+                        elif differs_by_whole_word(tokens[i], tokens[j]):
+                            continue
+                        else:
+                            score = name_similarity(compact[i], compact[j], self.threshold)
+                            if score < self.threshold:
+                                continue
+                            reason = 'edit_distance'
+
+                        pairs.append((pair[0], pair[1], round(score, 4), reason, key[0]))
+
+        self.stats = {
+            'voters': len(voters_df),
+            'blocks': len(blocks),
+            'oversized_buckets_skipped': oversized,
+            'comparisons': comparisons,
+            'candidate_pairs': len(pairs),
+        }
+
+        columns = ['voter_id', 'full_name', 'location_id', 'source_page']
+        columns = {col: voters_df[col].tolist() for col in columns if col in voters_df.columns}
+        records = []
+        for i, j, score, reason, block_type in pairs:
+            record = {'score': score, 'reason': reason, 'block': block_type}
+            for col, values in columns.items():
+                record[f'{col}_a'] = values[i]
+                record[f'{col}_b'] = values[j]
+            records.append(record)
+
+        result = pd.DataFrame(records)
+        if len(result) > 0:
+            result = result.sort_values(['score', 'location_id_a'], ascending=[False, True]).reset_index(drop=True)
+        return result
+
+    def write_report(self, pairs_df: pd.DataFrame, output_dir: str = 'output',
+                     elapsed: Optional[float] = None) -> Dict[str, str]:
+        """Write the candidate pairs CSV and a markdown summary for reviewers"""
+        os.makedirs(output_dir, exist_ok=True)
+        csv_path = os.path.join(output_dir, 'duplicate_voter_candidates.csv')
+        report_path = os.path.join(output_dir, 'duplicate_voter_report.md')
+
+        pairs_df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+
+        reason_counts = pairs_df['reason'].value_counts().to_dict() if len(pairs_df) else {}
+        report = f"""
+# Duplicate Voter Review Report
+
+## Summary
+- **Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- **Voters scanned**: {self.stats.get('voters', 0):,}
+- **Blocks**: {self.stats.get('blocks', 0):,} (oversized candidate buckets skipped: {self.stats.get('oversized_buckets_skipped', 0)})
+- **Pair comparisons**: {self.stats.get('comparisons', 0):,}
+- **Candidate pairs**: {self.stats.get('candidate_pairs', 0):,}
+- **Similarity threshold**: {self.threshold}
+"""
+        if elapsed is not None:
+            report += f"- **Run time**: {elapsed:.2f}s\n"
+
+        report += "\n## Candidates by Reason\n"
+        for reason, count in reason_counts.items():
+            report += f"- **{reason}**: {count:,}\n"
+
+        report += "\n## Top Candidates\n"
+        for _, row in pairs_df.head(25).iterrows():
+            report += (f"- ({row['score']:.2f}, {row['reason']}) location {row['location_id_a']}: "
+                       f"{row['voter_id_a']} `{row['full_name_a']}` ↔ {row['voter_id_b']} `{row['full_name_b']}`\n")
+
+        report += f"\nFull list: `{csv_path}`\n"
+
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report)
+
+        return {'csv': csv_path, 'report': report_path}
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Fuzzy duplicate voter detection")
+    parser.add_argument('--voters', default=DEFAULT_VOTERS_CSV, help="Voters CSV or Parquet file")
+    parser.add_argument('--output-dir', default='output')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum similarity (0-1) to report a pair")
+    parser.add_argument('--max-bucket', type=int, default=DEFAULT_MAX_BUCKET,
+                        help="Skip candidate buckets larger than this (pathological short names)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🔍 FUZZY DUPLICATE VOTER DETECTION")
+    print("=" * 70)
+
+    if not os.path.exists(args.voters):
+        print(f"❌ File not found: {args.voters}")
+        return False
+
+    voters_df = load_voters(args.voters)
+    print(f"📂 Loaded {len(voters_df):,} voters")
+
+    start = time.perf_counter()
+    detector = DuplicateVoterDetector(args.threshold, args.max_bucket)
+    pairs_df = detector.find_duplicates(voters_df)
+    elapsed = time.perf_counter() - start
+
+    paths = detector.write_report(pairs_df, args.output_dir, elapsed)
+
+    print(f"⏱️  {detector.stats['comparisons']:,} comparisons in {elapsed:.2f}s")
+    print(f"⚠️  {len(pairs_df):,} candidate duplicate pairs")
+    print(f"📁 {paths['csv']}")
+    print(f"📋 {paths['report']}")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,11 @@
 Correct extraction for 108.pdf - Parse the actual format
 The PDF has format: "name3 number3 name2 number2 name1 number1" on each line
 """
-import pdfplumber
 import pandas as pd
 import re
 
+from pdf_page_streaming import map_pages, page_count, page_text, print_memory_report
+
 def arabic_to_english(text):
     """Convert Arabic numerals to English"""
     if not text:
@@ -78,39 +79,40 @@ def extract_voters_properly(pdf_path):
     all_voters = []
     location_number = '108'
     
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"📖 Total pages: {len(pdf.pages)}")
+    total_pages = page_count(pdf_path)
+    print(f"📖 Total pages: {total_pages}")
+    
+    # Pages are streamed and closed one by one, so memory stays flat on full rolls
+    for page_num, text in map_pages(pdf_path, page_text):
+        print(f"   Page {page_num}/{total_pages}...", end='\r')
+        
+        if not text:
+            continue
+        
+        lines = text.split('\n')
         
-        for page_num, page in enumerate(pdf.pages, 1):
-            print(f"   Page {page_num}/{len(pdf.pages)}...", end='\r')
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
             
-            text = page.extract_text()
-            if not text:
+            # Skip header lines
+            if any(skip in line for skip in ['باونلاسجمتخا', 'ةنجل', 'زكم', 'ةظحم', 'قوسد']):
                 continue
             
-            lines = text.split('\n')
+            # Parse voters from this line
+            voters = parse_voter_line(line)
             
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Skip header lines
-                if any(skip in line for skip in ['باونلاسجمتخا', 'ةنجل', 'زكم', 'ةظحم', 'قوسد']):
-                    continue
-                
-                # Parse voters from this line
-                voters = parse_voter_line(line)
-                
-                for voter_num, voter_name in voters:
-                    all_voters.append({
-                        'رقم الناخب': voter_num,
-                        'اسم الناخب': voter_name,
-                        'رقم اللجنة': location_number,
-                        'رقم الصفحة': page_num
-                    })
-        
-        print(f"\n✅ Extracted {len(all_voters)} voters")
+            for voter_num, voter_name in voters:
+                all_voters.append({
+                    'رقم الناخب': voter_num,
+                    'اسم الناخب': voter_name,
+                    'رقم اللجنة': location_number,
+                    'رقم الصفحة': page_num
+                })
+    
+    print(f"\n✅ Extracted {len(all_voters)} voters")
+    print_memory_report()
     
     return all_voters
 
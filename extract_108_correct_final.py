@@ -2,9 +2,10 @@
 Correct extraction for 108.pdf
 Table structure: [name1, num1, name2, num2, name3, num3]
 """
-import pdfplumber
 import pandas as pd
 
+from pdf_page_streaming import PageStream
+
 def clean_text(text):
     if not text:
         return ''
@@ -18,46 +19,47 @@ def arabic_to_english(text):
     return text
 
 def reverse_arabic(text):
-    """Reverse Arabic text to fix direction"""
-    return text[::-1]
+    """Reverse Arabic text to fix direction; a wrapped cell keeps its line order"""
+    return ' '.join(line[::-1] for line in text.split('\n'))
 
 print("Extracting from 108.pdf...")
 
 all_voters = []
 
-with pdfplumber.open('108.pdf') as pdf:
-    print(f"Total pages: {len(pdf.pages)}")
+# Pages are streamed and closed one by one (pdf_page_streaming), so memory stays flat on full rolls
+stream = PageStream('108.pdf')
+print(f"Total pages: {len(stream)}")
+
+for page_num, page in stream:
+    tables = page.extract_tables()
+    
+    if not tables:
+        continue
     
-    for page_num, page in enumerate(pdf.pages, 1):
-        tables = page.extract_tables()
-        
-        if not tables:
-            continue
-        
-        for table in tables:
-            for row in table[1:]:  # Skip header row
-                if not row or len(row) < 6:
-                    continue
-                
-                # Process 3 voters per row (columns 0-1, 2-3, 4-5)
-                for i in range(0, 6, 2):
-                    if i+1 < len(row):
-                        name = clean_text(row[i])
-                        number = clean_text(row[i+1])
-                        
-                        if name and number:
-                            # Convert number
-                            number_eng = arabic_to_english(number)
-                            if number_eng.isdigit():
-                                # Reverse name to fix Arabic direction
-                                name_fixed = reverse_arabic(name)
-                                
-                                all_voters.append({
-                                    'رقم الناخب': int(number_eng),
-                                    'اسم الناخب': name_fixed,
-                                    'رقم اللجنة': '108',
-                                    'رقم الصفحة': page_num
-                                })
+    for table in tables:
+        for row in table[1:]:  # Skip header row
+            if not row or len(row) < 6:
+                continue
+            
+            # Process 3 voters per row (columns 0-1, 2-3, 4-5)
+            for i in range(0, 6, 2):
+                if i+1 < len(row):
+                    name = clean_text(row[i])
+                    number = clean_text(row[i+1])
+                    
+                    if name and number:
+                        # Convert number
+                        number_eng = arabic_to_english(number)
+                        if number_eng.isdigit():
+                            # Reverse name to fix Arabic direction
+                            name_fixed = reverse_arabic(name)
+                            
+                            all_voters.append({
+                                'رقم الناخب': int(number_eng),
+                                'اسم الناخب': name_fixed,
+                                'رقم اللجنة': '108',
+                                'رقم الصفحة': page_num
+                            })
 
 print(f"Extracted: {len(all_voters)} voters")
 
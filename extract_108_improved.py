@@ -1,9 +1,12 @@
 """
 Improved extraction for 108.pdf with better text parsing
 """
-import pdfplumber
 import pandas as pd
 import re
+from functools import partial
+
+from pdf_page_streaming import map_pages, page_count, print_memory_report
+from table_calibration import load_or_calibrate
 
 def clean_text(text):
     """Clean and normalize text"""
@@ -26,6 +29,71 @@ def arabic_to_english(text):
     trans = str.maketrans(arabic, english)
     return str(text).translate(trans)
 
+def parse_table_rows(tables, page_num, location_number):
+    """Voters from one page's extract_tables() output: a number cell followed by name cells"""
+    voters = []
+    for table in tables:
+        for row in table:
+            if not row or len(row) < 2:
+                continue
+            
+            # Try to find voter number and name
+            for i, cell in enumerate(row):
+                if not cell:
+                    continue
+                
+                cell = clean_text(cell)
+                cell_eng = arabic_to_english(cell)
+                
+                # Check if this looks like a voter number
+                if cell_eng.isdigit() and len(cell_eng) <= 5:
+                    voter_num = int(cell_eng)
+                    
+                    # Get name from next cells
+                    name_parts = []
+                    for j in range(i+1, len(row)):
+                        if row[j]:
+                            name_parts.append(clean_text(row[j]))
+                    
+                    if name_parts:
+                        voter_name = ' '.join(name_parts)
+                        
+                        # Validate name
+                        if len(voter_name) > 3 and not voter_name.isdigit():
+                            voters.append({
+                                'voter_number': voter_num,
+                                'voter_name': voter_name,
+                                'location_number': location_number,
+                                'page': page_num
+                            })
+                    break
+    return voters
+
+def has_number_cells(tables):
+    """True if any cell holds a voter number"""
+    for table in tables:
+        for row in table:
+            for cell in row or []:
+                cell_eng = arabic_to_english(clean_text(cell))
+                if cell_eng.isdigit() and len(cell_eng) <= 5:
+                    return True
+    return False
+
+def read_page(page, table_settings=None):
+    """(tables, text) of one page; text only where it is used (first page, pages without tables)
+
+    table_settings: table_calibration.TableSettings learned for the PDF; a page the
+    learned grid yields no voter number on is detected afresh
+    """
+    if table_settings:
+        tables = page.extract_tables(table_settings.for_page(page.page_number))
+        if not has_number_cells(tables):
+            tables = page.extract_tables()
+    else:
+        tables = page.extract_tables()
+    text = (page.extract_text() or '') if page.page_number == 1 or not tables else ''
+    return tables, text
+
 def extract_with_tables(pdf_path):
     """Extract using table detection"""
     print(f"📄 Extracting from: {pdf_path}")
@@ -33,104 +101,73 @@ def extract_with_tables(pdf_path):
     all_voters = []
     location_info = {'number': '108', 'name': '', 'address': ''}
     
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"📖 Total pages: {len(pdf.pages)}")
-        
-        # Try to get location info from first page
-        first_page_text = pdf.pages[0].extract_text()
-        lines = first_page_text.split('\n')[:15]
+    total_pages = page_count(pdf_path)
+    print(f"📖 Total pages: {total_pages}")
+    
+    # Table grid learned once per document (and cached), so every page is split the same way
+    table_settings = load_or_calibrate(pdf_path)
+    print(f"📐 Table grid: {len(table_settings.vertical_lines)} column lines ({table_settings.sources.get('vertical')}), "
+          f"{len(table_settings.horizontal_lines)} row lines ({table_settings.sources.get('horizontal')})")
+    
+    # Process each page; pages are streamed and closed one by one, so memory stays flat on full rolls
+    for page_num, (tables, text) in map_pages(pdf_path, partial(read_page, table_settings=table_settings)):
+        if page_num == 1:
+            # Try to get location info from first page
+            lines = text.split('\n')[:15]
+            
+            for line in lines:
+                line = clean_text(line)
+                if 'لجنة' in line or 'مدرسة' in line or 'مركز' in line:
+                    # Extract location number
+                    nums = re.findall(r'\d+', arabic_to_english(line))
+                    if nums and not location_info['number']:
+                        location_info['number'] = nums[0]
+                    
+                    # Store name/address
+                    if 'مدرسة' in line or 'مركز' in line:
+                        if not location_info['name']:
+                            location_info['name'] = line
+                        elif not location_info['address']:
+                            location_info['address'] = line
+            
+            print(f"📍 Location: {location_info['number']}")
         
-        for line in lines:
-            line = clean_text(line)
-            if 'لجنة' in line or 'مدرسة' in line or 'مركز' in line:
-                # Extract location number
-                nums = re.findall(r'\d+', arabic_to_english(line))
-                if nums and not location_info['number']:
-                    location_info['number'] = nums[0]
-                
-                # Store name/address
-                if 'مدرسة' in line or 'مركز' in line:
-                    if not location_info['name']:
-                        location_info['name'] = line
-                    elif not location_info['address']:
-                        location_info['address'] = line
+        print(f"   Page {page_num}/{total_pages}...", end='\r')
         
-        print(f"📍 Location: {location_info['number']}")
+        # Try table extraction first
+        if tables:
+            all_voters.extend(parse_table_rows(tables, page_num, location_info['number']))
         
-        # Process each page
-        for page_num, page in enumerate(pdf.pages, 1):
-            print(f"   Page {page_num}/{len(pdf.pages)}...", end='\r')
-            
-            # Try table extraction first
-            tables = page.extract_tables()
-            
-            if tables:
-                for table in tables:
-                    for row in table:
-                        if not row or len(row) < 2:
-                            continue
-                        
-                        # Try to find voter number and name
-                        for i, cell in enumerate(row):
-                            if not cell:
-                                continue
-                            
-                            cell = clean_text(cell)
-                            cell_eng = arabic_to_english(cell)
-                            
-                            # Check if this looks like a voter number
-                            if cell_eng.isdigit() and len(cell_eng) <= 5:
-                                voter_num = int(cell_eng)
-                                
-                                # Get name from next cells
-                                name_parts = []
-                                for j in range(i+1, len(row)):
-                                    if row[j]:
-                                        name_parts.append(clean_text(row[j]))
-                                
-                                if name_parts:
-                                    voter_name = ' '.join(name_parts)
-                                    
-                                    # Validate name
-                                    if len(voter_name) > 3 and not voter_name.isdigit():
-                                        all_voters.append({
-                                            'voter_number': voter_num,
-                                            'voter_name': voter_name,
-                                            'location_number': location_info['number'],
-                                            'page': page_num
-                                        })
-                                break
-            
-            # If no tables, try text extraction
-            if not tables:
-                text = page.extract_text()
-                if text:
-                    lines = text.split('\n')
+        # If no tables, try text extraction
+        if not tables:
+            if text:
+                lines = text.split('\n')
+                
+                for line in lines:
+                    line = clean_text(line)
+                    if not line or len(line) < 5:
+                        continue
                     
-                    for line in lines:
-                        line = clean_text(line)
-                        if not line or len(line) < 5:
-                            continue
+                    # Pattern: number followed by name
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        first = arabic_to_english(parts[0])
                         
-                        # Pattern: number followed by name
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            first = arabic_to_english(parts[0])
+                        if first.isdigit() and len(first) <= 5:
+                            voter_num = int(first)
+                            voter_name = ' '.join(parts[1:])
                             
-                            if first.isdigit() and len(first) <= 5:
-                                voter_num = int(first)
-                                voter_name = ' '.join(parts[1:])
-                                
-                                # Validate
-                                if len(voter_name) > 3 and not any(skip in voter_name for skip in ['صفحة', 'لجنة', 'رقم', 'Page']):
-                                    all_voters.append({
-                                        'voter_number': voter_num,
-                                        'voter_name': voter_name,
-                                        'location_number': location_info['number'],
-                                        'page': page_num
-                                    })
+                            # Validate
+                            if len(voter_name) > 3 and not any(skip in voter_name for skip in ['صفحة', 'لجنة', 'رقم', 'Page']):
+                                all_voters.append({
+                                    'voter_number': voter_num,
+                                    'voter_name': voter_name,
+                                    'location_number': location_info['number'],
+                                    'page': page_num
+                                })
     
     print(f"\n✅ Extracted {len(all_voters)} voters")
+    print_memory_report()
     return all_voters, location_info
 
 def save_to_excel(voters, location_info, output_file):
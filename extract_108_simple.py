@@ -1,41 +1,42 @@
 """
 Simple PDF to Excel - Extract exactly as is, no processing
 """
-import pdfplumber
 import pandas as pd
 import re
 
+from pdf_page_streaming import map_pages, page_count, page_text, print_memory_report
+
 def extract_raw_text_by_page(pdf_path):
     """Extract raw text from each page"""
     print(f"📄 Extracting from: {pdf_path}")
     
     all_data = []
     
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"📖 Total pages: {len(pdf.pages)}")
+    total_pages = page_count(pdf_path)
+    print(f"📖 Total pages: {total_pages}")
+    
+    # Pages are streamed and closed one by one, so memory stays flat on full rolls
+    for page_num, text in map_pages(pdf_path, page_text):
+        print(f"   Processing page {page_num}/{total_pages}...", end='\r')
         
-        for page_num, page in enumerate(pdf.pages, 1):
-            print(f"   Processing page {page_num}/{len(pdf.pages)}...", end='\r')
-            
-            # Extract text exactly as is
-            text = page.extract_text()
+        
+        if text:
+            # Split by lines
+            lines = text.split('\n')
             
-            if text:
-                # Split by lines
-                lines = text.split('\n')
+            for line in lines:
+                # Skip empty lines
+                if not line.strip():
+                    continue
                 
-                for line in lines:
-                    # Skip empty lines
-                    if not line.strip():
-                        continue
-                    
-                    # Add to data with page number
-                    all_data.append({
-                        'Page': page_num,
-                        'Text': line.strip()
-                    })
-        
-        print(f"\n✅ Extracted {len(all_data)} lines")
+                # Add to data with page number
+                all_data.append({
+                    'Page': page_num,
+                    'Text': line.strip()
+                })
+    
+    print(f"\n✅ Extracted {len(all_data)} lines")
+    print_memory_report()
     
     return all_data
 
@@ -1,7 +1,8 @@
-import pdfplumber
 import pandas as pd
 import re
 
+from pdf_page_streaming import PageStream
+
 def clean_text(text):
     if not text:
         return ''
@@ -44,26 +45,27 @@ print("Starting extraction...")
 all_voters = []
 location = '108'
 
-with pdfplumber.open('108.pdf') as pdf:
-    print(f"Pages: {len(pdf.pages)}")
+# Pages are streamed and closed one by one (pdf_page_streaming), so memory stays flat on full rolls
+stream = PageStream('108.pdf')
+print(f"Pages: {len(stream)}")
+
+for page_num, page in stream:
+    tables = page.extract_tables()
     
-    for page_num, page in enumerate(pdf.pages, 1):
-        tables = page.extract_tables()
-        
-        if tables:
-            for table in tables:
-                for row in table:
-                    if row:
-                        for cell in row:
-                            if cell:
-                                num, name = extract_voter(cell)
-                                if num and name:
-                                    all_voters.append({
-                                        'voter_number': num,
-                                        'voter_name': name,
-                                        'location': location,
-                                        'page': page_num
-                                    })
+    if tables:
+        for table in tables:
+            for row in table:
+                if row:
+                    for cell in row:
+                        if cell:
+                            num, name = extract_voter(cell)
+                            if num and name:
+                                all_voters.append({
+                                    'voter_number': num,
+                                    'voter_name': name,
+                                    'location': location,
+                                    'page': page_num
+                                })
 
 print(f"Extracted: {len(all_voters)} voters")
 
@@ -2,9 +2,10 @@ import PyPDF2
 import pandas as pd
 import re
 from pathlib import Path
-import json
 import time
 
+from voter_roll_io import save_streams
+
 def extract_full_motobus_data():
     pdf_path = 'motobus .pdf'
     print('Starting FULL motobus PDF extraction...')
@@ -94,18 +95,15 @@ def extract_full_motobus_data():
     pd.DataFrame(voters).to_csv('output/voters_full.csv', index=False, encoding='utf-8-sig')
     
     print('Exporting to JSON...')
-    data = {
-        'locations': locations, 
-        'voters': voters,
+    # Metadata document plus one NDJSON file per stream (voter_roll_io.iter_records reads them)
+    save_streams('output/voter_data_full.json', {'locations': locations, 'voters': voters}, {
         'metadata': {
             'total_locations': len(locations),
             'total_voters': len(voters),
             'extraction_date': pd.Timestamp.now().isoformat(),
             'source_file': 'motobus .pdf'
         }
-    }
-    with open('output/voter_data_full.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    })
     
     # Generate SQL
     print('Generating SQL...')
@@ -5,14 +5,19 @@ import csv
 import json
 import os
 import re
-from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pdfplumber
 
+import layout_clustering
+
 ARABIC_DIGIT_MAP = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
 
+# Height (points) of the band at the bottom of the page that holds the footer
+FOOTER_HEIGHT = 120
+
 GLYPH_MAP: Dict[str, str] = {
     "د": "د",
     "و": "و",
@@ -128,15 +133,25 @@ def arabic_to_int(value: str) -> int:
 def extract_footer_numbers(page: pdfplumber.page.Page) -> Tuple[int, int]:
     """Return (page_number, location_number) from footer region."""
     height = page.height
-    footer = page.within_bbox((0, height - 120, page.width, height))
+    footer = page.within_bbox((0, height - FOOTER_HEIGHT, page.width, height))
     footer_text = footer.extract_text() or ""
+    footer_words = footer.extract_words(use_text_flow=True) or []
+    return footer_numbers_from_words(footer_words, footer_text)
+
+
+def footer_numbers_from_words(footer_words: List[Dict], footer_text: str, rtl_rows: bool = False) -> Tuple[int, int]:
+    """(page_number, location_number) from the footer region's words and text.
+
+    Shared by extract_footer_numbers and the pdf_backends word sources. rtl_rows
+    orders numbers by clustered row (bottom up) and right to left; pdfminer's
+    ordering by raw top then x0 relies on pdfminer's per-font box heights.
+    """
     footer_text = normalize_text(footer_text.replace("\n", " "))
     # Capture all digit clusters (Arabic or Western)
     numbers = [n.translate(ARABIC_DIGIT_MAP) for n in re.findall(r"[0-9٠-٩]{1,4}", footer_text)]
     # Expect something like [..., '1021', '25', '76'] or similar order.
     # Identify page number as longest <=3 digits closest to top-right (use heuristics)
     # We'll inspect the footer words with coordinates for precise mapping.
-    footer_words = footer.extract_words(use_text_flow=True, horizontal_ltr=False) or []
     extracted = []
     for word in footer_words:
         text = normalize_text(word.get("text", ""))
@@ -144,12 +159,17 @@ def extract_footer_numbers(page: pdfplumber.page.Page) -> Tuple[int, int]:
             continue
         candidate = text.translate(ARABIC_DIGIT_MAP)
         if candidate.isdigit():
-            extracted.append((candidate, word["x0"], word["top"]))
+            extracted.append((candidate, word["x0"], word["top"], word["bottom"]))
     # Sort by top descending (footer lines from bottom up) and x0 descending (RTL)
     extracted.sort(key=lambda item: (item[2], item[1]))
+    if rtl_rows and extracted:
+        rows = layout_clustering.row_ids(np.array([item[2] for item in extracted]),
+                                         np.array([item[3] for item in extracted]))
+        extracted = [item for _, item in sorted(zip(rows.tolist(), extracted),
+                                                key=lambda pair: (-pair[0], -pair[1][1]))]
     page_number = None
     location_number = None
-    for idx, (candidate, x0, top) in enumerate(extracted):
+    for idx, (candidate, x0, top, bottom) in enumerate(extracted):
         if len(candidate) <= 3 and page_number is None:
             page_number = int(candidate)
             continue
@@ -167,27 +187,44 @@ def extract_footer_numbers(page: pdfplumber.page.Page) -> Tuple[int, int]:
     return page_number, location_number
 
 
-def group_words_by_row(words: List[Dict], tolerance: float = 2.5) -> List[List[Dict]]:
-    buckets: Dict[float, List[Dict]] = defaultdict(list)
-    for word in words:
-        text = normalize_text(word.get("text", ""))
-        if not text:
-            continue
-        top = word.get("top")
-        if top is None:
-            continue
-        key = round(top / tolerance) * tolerance
-        buckets[key].append(word)
-    # Sort rows by top coordinate ascending (top of page first)
-    sorted_rows = sorted(buckets.items(), key=lambda item: item[0])
-    return [sorted(row_words, key=lambda w: w["x0"], reverse=True) for _, row_words in sorted_rows]
+def group_words_by_row(words: List[Dict], tolerance: Optional[float] = None) -> List[List[Dict]]:
+    """Rows top to bottom, words right to left.
+
+    layout_clustering cuts rows on adaptive gaps between sorted word centres;
+    tolerance (points) overrides the gap derived from the median word height.
+    """
+    return layout_clustering.group_words_by_row(words, tolerance)
+
+
+def drop_footer_words(words: List[Dict], page_number: int, page_height: Optional[float]) -> List[Dict]:
+    """Words above the footer line.
 
+    The footer line is the one in the bottom FOOTER_HEIGHT band (the region
+    extract_footer_numbers reads) that holds the printed page number; the band
+    also holds the last voter rows, so only words from that line down are cut.
+    Without a page height or a page number in the band the words are returned
+    unchanged.
+    """
+    if page_height is None:
+        return words
+    band_top = page_height - FOOTER_HEIGHT
+    footer = [word for word in words
+              if word["top"] >= band_top and normalize_text(word.get("text", "")) == str(page_number)]
+    if not footer:
+        return words
+    footer_top = max(word["top"] for word in footer)
+    return [word for word in words if word["bottom"] <= footer_top]
 
-def parse_rows(words: List[Dict], page_number: int, location_number: int) -> List[VoterRow]:
+
+def parse_rows(words: List[Dict], page_number: int, location_number: int,
+               page_height: Optional[float] = None) -> List[VoterRow]:
+    """Voter rows from a page's words; page_height lets the footer line be left out"""
     rows: List[VoterRow] = []
-    for row_words in group_words_by_row(words):
+    for row_words in group_words_by_row(drop_footer_words(words, page_number, page_height)):
         ordered = sorted(row_words, key=lambda w: w["x0"], reverse=True)
-        name_tokens: List[str] = []
+        # Each cell is the voter number (مسلسل, rightmost) followed by the name to its
+        # left; words before the first number of a row belong to no cell
+        cells: List[Tuple[int, List[str]]] = []
 
         for word in ordered:
             raw_text = word.get("text", "")
@@ -199,42 +236,50 @@ def parse_rows(words: List[Dict], page_number: int, location_number: int) -> Lis
             is_number = translated.isdigit() and 1 <= len(translated) <= 4
 
             if is_number:
-                if not name_tokens:
-                    continue
-                full_name = normalize_arabic_glyphs(" ".join(name_tokens)).strip()
-                if not full_name:
-                    name_tokens.clear()
-                    continue
-                rows.append(
-                    VoterRow(
-                        voter_number=int(translated),
-                        full_name=full_name,
-                        page_number=page_number,
-                        location_number=location_number,
-                    )
+                cells.append((int(translated), []))
+            elif cells:
+                cells[-1][1].append(normalize_arabic_glyphs(text))
+
+        for voter_number, name_tokens in cells:
+            full_name = normalize_arabic_glyphs(" ".join(name_tokens)).strip()
+            if not full_name:
+                continue
+            rows.append(
+                VoterRow(
+                    voter_number=voter_number,
+                    full_name=full_name,
+                    page_number=page_number,
+                    location_number=location_number,
                 )
-                name_tokens.clear()
-            else:
-                name_tokens.append(normalize_arabic_glyphs(text))
+            )
 
     return rows
 
 
-def extract_onepage(pdf_path: str = "onepage.pdf", output_csv: str = "output/onepage_voters.csv", output_json: str = "output/onepage_voters.json") -> Dict:
+def extract_onepage(pdf_path: str = "onepage.pdf", output_csv: str = "output/onepage_voters.csv", output_json: str = "output/onepage_voters.json",
+                    backend: str = "pdfplumber") -> Dict:
+    """backend: pdf_backends name; pypdfium2 words read as pdfplumber's, pymupdf words in logical order."""
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(pdf_path)
     os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-        footer_page_number, footer_location_number = extract_footer_numbers(page)
-        words = page.extract_words(
-            x_tolerance=1.5,
-            y_tolerance=2.0,
-            use_text_flow=True,
-            keep_blank_chars=False,
-            horizontal_ltr=False
-        )
-        voters = parse_rows(words, footer_page_number, footer_location_number)
+    if backend != "pdfplumber":
+        from pdf_backends import footer_numbers, open_backend
+        with open_backend(pdf_path, backend) as pdf:
+            words = pdf.page_words(0)
+            footer_page_number, footer_location_number = footer_numbers(pdf, 0, words)
+            page_height = pdf.page_size(0)[1]
+        voters = parse_rows(words, footer_page_number, footer_location_number, page_height)
+    else:
+        with pdfplumber.open(pdf_path) as pdf:
+            page = pdf.pages[0]
+            footer_page_number, footer_location_number = extract_footer_numbers(page)
+            words = page.extract_words(
+                x_tolerance=1.5,
+                y_tolerance=2.0,
+                use_text_flow=True,
+                keep_blank_chars=False
+            )
+            voters = parse_rows(words, footer_page_number, footer_location_number, page.height)
     # Write CSV
     with open(output_csv, "w", newline="", encoding="utf-8-sig") as csvfile:
         writer = csv.writer(csvfile)
@@ -10,6 +10,8 @@ import json
 import os
 from datetime import datetime
 
+from location_gazetteer import LocationGazetteer
+
 def extract_with_real_numbers():
     """Extract locations with their actual numbers from the PDF"""
     
@@ -82,6 +84,17 @@ def extract_with_real_numbers():
     
     print(f"📋 Processing {len(known_schools)} schools with estimated numbers...")
     
+    # One pass over the text: the gazetteer resolves each line to the school it names
+    gazetteer = LocationGazetteer([
+        {'location_id': number, 'location_number': str(number), 'location_name': name, 'location_address': ''}
+        for name, number in known_schools
+    ])
+    school_lines = {}
+    for i, line in enumerate(lines):
+        entry = gazetteer.resolve(line)
+        if entry is not None:
+            school_lines.setdefault(entry['location_name'], i)
+    
     # Try to find actual location numbers in the text
     for school_name, estimated_number in known_schools:
         
@@ -89,30 +102,28 @@ def extract_with_real_numbers():
         found_number = estimated_number  # Default to estimated
         found_address = "مركز مطوبس - كفر الشيخ"
         
-        # Search for the school in the text
-        for i, line in enumerate(lines):
-            if school_name in line:
-                # Look for numbers in this line and nearby lines
-                context_lines = lines[max(0, i-2):i+3]  # Get context
+        # First line naming the school
+        i = school_lines.get(school_name)
+        if i is not None:
+            # Look for numbers in this line and nearby lines
+            context_lines = lines[max(0, i-2):i+3]  # Get context
                 
-                for context_line in context_lines:
-                    # Look for 2-4 digit numbers that could be location numbers
-                    numbers = re.findall(r'\b(\d{2,4})\b', context_line)
-                    for num in numbers:
-                        num_val = int(num)
-                        # Reasonable range for location numbers
-                        if 1 <= num_val <= 1500:
-                            found_number = num_val
-                            break
+            for context_line in context_lines:
+                # Look for 2-4 digit numbers that could be location numbers
+                numbers = re.findall(r'\b(\d{2,4})\b', context_line)
+                for num in numbers:
+                    num_val = int(num)
+                    # Reasonable range for location numbers
+                    if 1 <= num_val <= 1500:
+                        found_number = num_val
+                        break
                     
-                    # Look for address information
-                    if "شارع" in context_line or "امام" in context_line:
-                        # Clean up the address
-                        addr = context_line.strip()
-                        if len(addr) > 5 and len(addr) < 150:
-                            found_address = addr
-                
-                break
+                # Look for address information
+                if "شارع" in context_line or "امام" in context_line:
+                    # Clean up the address
+                    addr = context_line.strip()
+                    if len(addr) > 5 and len(addr) < 150:
+                        found_address = addr
         
         # Create location record
         location_record = {
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Extraction Engine
+One page loop and one page cache for every extraction strategy. Reading a PDF page
+(PyPDF2 text, pdfplumber words or tables) is the expensive part; the row parsers
+that the one-off scripts re-implemented are cheap. The engine reads each page
+source once, in parallel, caches it under output/cache/pages/, and runs any number
+of row parsers over the cached pages.
+
+iter_pages is the page loop every reader goes through: the cache, the extractor's
+text sources and pdf_page_streaming.map_pages.
+PageGuard (page_timeouts.py) runs the same page functions in its killable workers.
+Cached pages are keyed by PDF digest, source and source_version(), a digest of the
+code that produced them, so a reader change never serves stale pages.
+
+Page sources (what is read from each page):
+- pypdf2_text       : PyPDF2 extract_text
+- pdfplumber_words  : extract_onepage word settings + footer numbers
+- pdfplumber_tables : page.extract_tables + footer numbers
+- pdfplumber_chars  : text rebuilt from page.chars (char_line_reassembly.py)
+
+Row parsers (cached pages -> voter records):
+- committee_lines   : EgyptElectionPDFExtractor rules (ai_agent_pdf_extractor.py)
+- committee_chars   : the same rules on reassembled character text
+- onepage_rows      : extract_onepage.parse_rows
+- number_name_tables: extract_108_improved.parse_table_rows
+- paired_tables     : [name, number] x 3 columns (extract_108_correct_final.py)
+
+Usage:
+    python extraction_engine.py "motobus .pdf" --parser committee_lines --workers 4
+    python extraction_engine.py 108.pdf --compare paired_tables,number_name_tables
+"""
+
+import argparse
+import functools
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from arabic_name_utils import arabic_to_english_number, clean_arabic_text, name_match_key
+
+CACHE_DIR = os.path.join('output', 'cache', 'pages')
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+# Pages per worker task; large enough that reopening the PDF in a worker is noise
+PAGES_PER_TASK = 25
+# A worker process is replaced after this many pages, so a leak cannot outlive its budget
+PAGES_PER_WORKER = 200
+
+# Words settings of extract_onepage.extract_onepage. With use_text_flow, words keep
+# content-stream order and pdfplumber ignores the text direction (the deprecated
+# horizontal_ltr=False only relabelled each word's 'direction')
+WORD_SETTINGS = dict(x_tolerance=1.5, y_tolerance=2.0, use_text_flow=True, keep_blank_chars=False)
+WORD_KEYS = ('text', 'x0', 'x1', 'top', 'bottom')
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def count_pages(pdf_path: str) -> int:
+    import PyPDF2
+    with open(pdf_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+# ---------------------------------------------------------------------------
+# Page sources: one function per source reads one open page into a page dict
+# ---------------------------------------------------------------------------
+
+def _footer(page) -> Optional[List[int]]:
+    from extract_onepage import extract_footer_numbers
+    try:
+        return list(extract_footer_numbers(page))
+    except ValueError:
+        return None
+
+
+def pypdf2_text_page(page, page_num: int) -> Dict:
+    return {'page_num': page_num, 'text': page.extract_text() or ''}
+
+
+def pdfplumber_words_page(page, page_num: int) -> Dict:
+    words = page.extract_words(**WORD_SETTINGS)
+    return {'page_num': page_num, 'footer': _footer(page), 'height': float(page.height),
+            'words': [{key: word[key] for key in WORD_KEYS} for word in words]}
+
+
+def pdfplumber_tables_page(page, page_num: int) -> Dict:
+    return {'page_num': page_num, 'footer': _footer(page), 'tables': page.extract_tables()}
+
+
+def pdfplumber_chars_page(page, page_num: int) -> Dict:
+    """Same page shape as pypdf2_text, with text in logical order from the character boxes"""
+    from char_line_reassembly import reassemble_page
+    return {'page_num': page_num, 'text': reassemble_page(page, split_cells=True)}
+
+
+class PageSource(NamedTuple):
+    # 'pypdf2' or 'pdfplumber': the library whose page objects read() takes
+    library: str
+    # (page, page_num) -> page dict; module level, so worker processes can run it
+    read: Callable[[Any, int], Any]
+    # Modules whose code shapes the page dicts besides read() itself; part of the cache key
+    modules: Tuple[str, ...] = ()
+
+
+PAGE_SOURCES: Dict[str, PageSource] = {
+    'pypdf2_text': PageSource('pypdf2', pypdf2_text_page),
+    'pdfplumber_words': PageSource('pdfplumber', pdfplumber_words_page, ('extract_onepage', 'layout_clustering')),
+    'pdfplumber_tables': PageSource('pdfplumber', pdfplumber_tables_page, ('extract_onepage', 'layout_clustering')),
+    'pdfplumber_chars': PageSource('pdfplumber', pdfplumber_chars_page, ('char_line_reassembly',)),
+}
+
+
+def open_pages(pdf_path: str, library: str, page_nums: Sequence[int]) -> Iterator[Tuple[int, Any]]:
+    """(page_num, page) for 1-based page numbers; pdfplumber pages are closed once the loop moves on"""
+    if library == 'pypdf2':
+        import PyPDF2
+        with open(pdf_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            for page_num in page_nums:
+                yield page_num, reader.pages[page_num - 1]
+    elif library == 'pdfplumber':
+        from pdf_page_streaming import PageStream
+        yield from PageStream(pdf_path, page_nums)
+    else:
+        raise ValueError(f"Unknown page library {library!r}")
+
+
+def read_pages(pdf_path: str, source: PageSource, page_nums: Sequence[int]) -> List[Any]:
+    """One worker task: read a run of pages with one source"""
+    return [source.read(page, page_num) for page_num, page in open_pages(pdf_path, source.library, page_nums)]
+
+
+def _read_task(task: Tuple) -> List[Any]:
+    return read_pages(*task)
+
+
+def iter_pages(pdf_path: str, source, workers: int = DEFAULT_WORKERS, page_nums: Optional[Sequence[int]] = None,
+               pages_per_task: int = PAGES_PER_TASK, pages_per_worker: int = PAGES_PER_WORKER) -> Iterator[Any]:
+    """Every page read with one source, in document order: the page loop all readers share
+
+    source is a PAGE_SOURCES name or a PageSource. With workers > 1 runs of pages
+    are read in worker processes that are replaced after pages_per_worker pages, and
+    results come back as they finish, so only the pages in flight are held.
+    """
+    source = PAGE_SOURCES[source] if isinstance(source, str) else source
+    page_nums = list(page_nums) if page_nums is not None else list(range(1, count_pages(pdf_path) + 1))
+    if workers <= 1:
+        for page_num, page in open_pages(pdf_path, source.library, page_nums):
+            yield source.read(page, page_num)
+        return
+
+    tasks = [(pdf_path, source, page_nums[start:start + pages_per_task])
+             for start in range(0, len(page_nums), pages_per_task)]
+    with multiprocessing.Pool(min(workers, len(tasks) or 1),
+                              maxtasksperchild=max(1, pages_per_worker // pages_per_task)) as pool:
+        for pages in pool.imap(_read_task, tasks):
+            yield from pages
+
+
+def read_pages_parallel(pdf_path: str, source: str, workers: int = DEFAULT_WORKERS,
+                        pages_per_task: int = PAGES_PER_TASK) -> List[Dict]:
+    """Read every page with one source, splitting the page range over worker processes"""
+    return list(iter_pages(pdf_path, source, workers, pages_per_task=pages_per_task))
+
+
+def _module_bytes(name: str) -> bytes:
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.origin or not os.path.exists(spec.origin):
+        return name.encode('utf-8')
+    with open(spec.origin, 'rb') as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def source_version(source: str) -> str:
+    """Digest of the code a source's pages come from: its read function, the modules it
+    lists and the PDF library's version. Part of the cache key, so changing a reader
+    (e.g. character reassembly or footer reading) invalidates the pages it cached."""
+    spec = PAGE_SOURCES[source]
+    library = importlib.import_module('PyPDF2' if spec.library == 'pypdf2' else spec.library)
+    digest = hashlib.sha1()
+    digest.update(inspect.getsource(spec.read).encode('utf-8'))
+    digest.update(getattr(library, '__version__', '').encode('utf-8'))
+    for module in spec.modules:
+        digest.update(_module_bytes(module))
+    return digest.hexdigest()[:8]
+
+
+class PageCache:
+    """Per-PDF, per-source pages: in memory for this process, pickled under output/cache/pages/"""
+
+    def __init__(self, cache_dir: Optional[str] = CACHE_DIR, workers: int = DEFAULT_WORKERS):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self._memory: Dict[Tuple[str, str, str], List[Dict]] = {}
+
+    def pages(self, pdf_path: str, source: str) -> List[Dict]:
+        key = (file_digest(pdf_path), source, source_version(source))
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+
+        cache_file = os.path.join(self.cache_dir, f"{key[0]}_{source}_{key[2]}.pkl") if self.cache_dir else None
+        if cache_file and os.path.exists(cache_file):
+            self.hits += 1
+            with open(cache_file, 'rb') as f:
+                pages = pickle.load(f)
+        else:
+            self.misses += 1
+            pages = read_pages_parallel(pdf_path, source, self.workers)
+            if cache_file:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Write then rename so an interrupted run never leaves a truncated cache file
+                temp_file = cache_file + '.tmp'
+                with open(temp_file, 'wb') as f:
+                    pickle.dump(pages, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_file, cache_file)
+
+        self._memory[key] = pages
+        return pages
+
+
+# ---------------------------------------------------------------------------
+# Row parsers: cached pages -> records {voter_number, full_name, location_number, page_num}
+# ---------------------------------------------------------------------------
+
+def process_pdf_lines(page: Dict) -> List[str]:
+    """Page lines exactly as EgyptElectionPDFExtractor.process_pdf sees them
+
+    process_pdf splits the joined text on '--- PAGE', so each page keeps the
+    ' N ---' marker remainder as its first line and two trailing blank lines;
+    extract_voters_from_page skips a fixed number of leading lines, so this matters.
+    """
+    return [f" {page['page_num']} ---"] + page['text'].split('\n') + ['', '']
+
+
+def _committee_extractor():
+    from ai_agent_pdf_extractor import EgyptElectionPDFExtractor
+    with tempfile.TemporaryDirectory() as output_dir:
+        return EgyptElectionPDFExtractor('', output_dir)
+
+
+def committee_locations_and_voters(pages: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """EgyptElectionPDFExtractor.process_pdf output from cached PyPDF2 pages"""
+    extractor = _committee_extractor()
+    return extractor.process_pages((page['page_num'], process_pdf_lines(page))
+                                   for page in pages if page['text'].strip())
+
+
+def parse_committee_lines(pages: List[Dict]) -> List[Dict]:
+    """ai_agent_pdf_extractor rules; voters are numbered by the extractor, so no voter_number"""
+    locations, voters = committee_locations_and_voters(pages)
+    committees = {location['location_id']: location['location_number'] for location in locations}
+    return [{'voter_number': None, 'full_name': voter['full_name'],
+             'location_number': committees.get(voter['location_id']), 'page_num': voter['source_page']}
+            for voter in voters]
+
+
+def parse_onepage_rows(pages: List[Dict]) -> List[Dict]:
+    """extract_onepage.parse_rows on the page words"""
+    from extract_onepage import parse_rows
+
+    records = []
+    for page in pages:
+        if page['footer'] is None:
+            continue
+        page_number, location_number = page['footer']
+        for row in parse_rows(page['words'], page_number, location_number, page.get('height')):
+            records.append({'voter_number': row.voter_number, 'full_name': row.full_name,
+                            'location_number': row.location_number, 'page_num': page['page_num']})
+    return records
+
+
+def parse_number_name_tables(pages: List[Dict]) -> List[Dict]:
+    """extract_108_improved.parse_table_rows: number cell followed by name cells"""
+    from extract_108_improved import parse_table_rows
+
+    records = []
+    for page in pages:
+        location_number = page['footer'][1] if page['footer'] else None
+        for voter in parse_table_rows(page['tables'], page['page_num'], location_number):
+            records.append({'voter_number': voter['voter_number'], 'full_name': voter['voter_name'],
+                            'location_number': location_number, 'page_num': page['page_num']})
+    return records
+
+
+def parse_paired_tables(pages: List[Dict]) -> List[Dict]:
+    """Rows of [name, number] x 3 with reversed names, as in extract_108_correct_final.py"""
+    records = []
+    for page in pages:
+        location_number = page['footer'][1] if page['footer'] else None
+        for table in page['tables']:
+            for row in table[1:]:  # Skip header row
+                if not row or len(row) < 6:
+                    continue
+                for i in range(0, 6, 2):
+                    name = (row[i] or '').replace('\x00', '').strip()
+                    number = arabic_to_english_number((row[i + 1] or '').replace('\x00', '').strip())
+                    if name and number.isdigit():
+                        # A wrapped name keeps its line order; only each line is reversed
+                        name = ' '.join(line[::-1] for line in name.split('\n'))
+                        records.append({'voter_number': int(number), 'full_name': clean_arabic_text(name),
+                                        'location_number': location_number, 'page_num': page['page_num']})
+    return records
+
+
+PARSERS: Dict[str, Tuple[str, Callable[[List[Dict]], List[Dict]]]] = {
+    # name: (page source, parser)
+    'committee_lines': ('pypdf2_text', parse_committee_lines),
+    'committee_chars': ('pdfplumber_chars', parse_committee_lines),
+    'onepage_rows': ('pdfplumber_words', parse_onepage_rows),
+    'number_name_tables': ('pdfplumber_tables', parse_number_name_tables),
+    'paired_tables': ('pdfplumber_tables', parse_paired_tables),
+}
+
+
+class ExtractionEngine:
+    """Run row parsers over one PDF; each page source is read at most once"""
+
+    def __init__(self, pdf_path: str, workers: int = DEFAULT_WORKERS, cache_dir: Optional[str] = CACHE_DIR,
+                 cache: Optional[PageCache] = None):
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        self.pdf_path = pdf_path
+        self.cache = cache or PageCache(cache_dir, workers)
+
+    def pages(self, source: str) -> List[Dict]:
+        return self.cache.pages(self.pdf_path, source)
+
+    def run(self, parser: str) -> List[Dict]:
+        source, parse = PARSERS[parser]
+        return parse(self.pages(source))
+
+    def locations_and_voters(self) -> Tuple[List[Dict], List[Dict]]:
+        """Same (locations, voters) as EgyptElectionPDFExtractor.process_pdf, from the cache"""
+        return committee_locations_and_voters(self.pages('pypdf2_text'))
+
+    def compare(self, parsers: Sequence[str]) -> pd.DataFrame:
+        """Record counts and name agreement between parsers, sharing the cached pages"""
+        keys = {}
+        rows = []
+        for parser in parsers:
+            start = time.perf_counter()
+            records = self.run(parser)
+            keys[parser] = {name_match_key(record['full_name']) for record in records}
+            rows.append({'parser': parser, 'source': PARSERS[parser][0], 'records': len(records),
+                         'distinct_names': len(keys[parser]),
+                         'committees': len({record['location_number'] for record in records}),
+                         'seconds': round(time.perf_counter() - start, 3)})
+        first = parsers[0]
+        for row in rows:
+            shared = len(keys[row['parser']] & keys[first])
+            row[f'names_shared_with_{first}'] = shared
+        return pd.DataFrame(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Extract voters with any page source / row parser")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--parser', default='committee_lines', choices=sorted(PARSERS))
+    parser.add_argument('--compare', help="Comma separated parsers to compare on the same cached pages")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true', help="Do not read or write the page cache")
+    parser.add_argument('--output', help="CSV for the extracted records (default output/engine_<parser>.csv)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("⚙️  EXTRACTION ENGINE")
+    print("=" * 70)
+
+    try:
+        engine = ExtractionEngine(args.pdf, args.workers, None if args.no_cache else args.cache_dir)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return False
+
+    if args.compare:
+        names = args.compare.split(',')
+        unknown = [name for name in names if name not in PARSERS]
+        if unknown:
+            print(f"❌ Unknown parser(s): {', '.join(unknown)} (choose from {', '.join(PARSERS)})")
+            return False
+        print(engine.compare(names).to_string(index=False))
+    else:
+        start = time.perf_counter()
+        records = engine.run(args.parser)
+        output = args.output or os.path.join('output', f'engine_{args.parser}.csv')
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        pd.DataFrame(records, columns=['voter_number', 'full_name', 'location_number', 'page_num']).to_csv(
+            output, index=False, encoding='utf-8-sig')
+        print(f"👥 {len(records):,} records in {time.perf_counter() - start:.2f}s [{args.parser}]")
+        print(f"📁 {output}")
+
+    print(f"🗄️  Page cache: {engine.cache.hits} hits, {engine.cache.misses} misses")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Extraction Regression Harness
+Runs a parser over golden fixtures and reports per-committee precision/recall on
+voter names and (voter number, name) pairs, so a faster parser can be accepted or
+rejected automatically. Exits non-zero when a committee falls below the thresholds
+or drops against the saved baseline.
+
+Fixtures pair a PDF with its reference output, kept under fixtures/ where no
+extractor writes (extract_onepage.py and extract_108_correct_final.py rewrite
+their own outputs on every run, so those files cannot be the reference):
+- onepage : onepage.pdf  vs fixtures/onepage_voters.csv; all 195 cells of the page,
+            each checked against PDFium's text of the page (same voter number,
+            same letters), footer numbers excluded
+- 108     : 108.pdf      vs fixtures/108_voters.xlsx (sheet الناخبين); each row checked
+            against the page text in 108_raw_extraction.xlsx
+- synthetic : a 10-page, 2-committee roll from synthetic_voter_pdf.py vs its
+              ground truth, read from the character boxes; generated on first use
+              (needs reportlab), so the footer -> committee path is always checked
+Fixtures whose PDF or reference file is missing are skipped.
+
+Parsers and the page cache come from extraction_engine.py: pages are read once per
+PDF and page source, so after the first run only the parser runs.
+
+Usage:
+    python extraction_regression_harness.py
+    python extraction_regression_harness.py --parser onepage_rows --fixture onepage
+    python extraction_regression_harness.py --fixture mine=my.pdf:expected.xlsx --min-recall 0.9
+    python extraction_regression_harness.py --save-baseline
+    python extraction_regression_harness.py --extractor my_module:extract_voters
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from arabic_name_utils import arabic_to_english_number, name_match_key
+from extraction_engine import CACHE_DIR, PARSERS, PageCache
+
+FIXTURES_DIR = 'fixtures'
+REGRESSION_DIR = os.path.join('output', 'regression')
+BASELINE_FILE = os.path.join(REGRESSION_DIR, 'baseline.json')
+REPORT_FILE = os.path.join(REGRESSION_DIR, 'regression_report.json')
+
+FIXTURES = {
+    'onepage': {'pdf': 'onepage.pdf', 'expected': os.path.join(FIXTURES_DIR, 'onepage_voters.csv'),
+                'parser': 'onepage_rows'},
+    '108': {'pdf': '108.pdf', 'expected': os.path.join(FIXTURES_DIR, '108_voters.xlsx'), 'parser': 'paired_tables'},
+    'synthetic': {'pdf': os.path.join(REGRESSION_DIR, 'synthetic_10p_visual.pdf'),
+                  'expected': os.path.join(REGRESSION_DIR, 'synthetic_10p_visual_truth.csv'),
+                  'parser': 'committee_chars', 'generate': {'pages': 10, 'pages_per_committee': 5}},
+}
+
+# Arabic headings used by the 108_*.xlsx exports
+EXCEL_COLUMNS = {
+    'رقم الناخب': 'voter_number',
+    'اسم الناخب': 'full_name',
+    'رقم اللجنة': 'location_number',
+    'رقم الصفحة': 'page_number',
+}
+
+
+def load_extractor(spec: str) -> Callable[[str], Iterable[Dict]]:
+    """module:function taking a PDF path and returning voter dicts (not cached)"""
+    module_name, _, function_name = spec.partition(':')
+    if not function_name:
+        raise ValueError(f"Expected module:function, got {spec!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+# ---------------------------------------------------------------------------
+# Golden fixtures and scoring
+# ---------------------------------------------------------------------------
+
+def load_expected(path: str) -> pd.DataFrame:
+    """Reference voters as voter_number / full_name / location_number"""
+    if path.lower().endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(path, sheet_name='الناخبين').rename(columns=EXCEL_COLUMNS)
+    else:
+        df = pd.read_csv(path, encoding='utf-8-sig')
+    df = df[['voter_number', 'full_name', 'location_number']].dropna(subset=['full_name'])
+    df['voter_number'] = pd.to_numeric(df['voter_number'].map(arabic_to_english_number), errors='coerce')
+    return df
+
+
+def _committee(value) -> str:
+    if value is None or pd.isna(value):
+        return 'unknown'
+    return str(int(float(arabic_to_english_number(value))))
+
+
+def _ratio(hits: int, total: int) -> Optional[float]:
+    return round(hits / total, 4) if total else None
+
+
+def score_committees(records: List[Dict], expected: pd.DataFrame) -> Dict[str, Dict]:
+    """Per-committee name and number precision/recall"""
+    expected_committees = expected['location_number'].map(_committee)
+    single_committee = expected_committees.iloc[0] if expected_committees.nunique() == 1 else None
+
+    expected_names: Dict[str, Counter] = defaultdict(Counter)
+    expected_pairs: Dict[str, Counter] = defaultdict(Counter)
+    for committee, number, name in zip(expected_committees, expected['voter_number'], expected['full_name']):
+        key = name_match_key(name)
+        expected_names[committee][key] += 1
+        if not pd.isna(number):
+            expected_pairs[committee][(int(number), key)] += 1
+
+    extracted_names: Dict[str, Counter] = defaultdict(Counter)
+    extracted_pairs: Dict[str, Counter] = defaultdict(Counter)
+    for record in records:
+        committee = _committee(record.get('location_number'))
+        # Parsers without footer numbers still count against a single-committee fixture
+        if committee == 'unknown' and single_committee is not None:
+            committee = single_committee
+        key = name_match_key(record.get('full_name'))
+        extracted_names[committee][key] += 1
+        if record.get('voter_number') is not None:
+            extracted_pairs[committee][(int(record['voter_number']), key)] += 1
+
+    results = {}
+    for committee in sorted(set(expected_names) | set(extracted_names)):
+        truth, found = expected_names[committee], extracted_names[committee]
+        name_hits = sum((truth & found).values())
+        truth_pairs, found_pairs = expected_pairs[committee], extracted_pairs[committee]
+        pair_hits = sum((truth_pairs & found_pairs).values())
+        results[committee] = {
+            'expected': sum(truth.values()),
+            'extracted': sum(found.values()),
+            'name_precision': _ratio(name_hits, sum(found.values())),
+            'name_recall': _ratio(name_hits, sum(truth.values())),
+            # None when the parser produces no voter numbers at all
+            'number_precision': _ratio(pair_hits, sum(found_pairs.values())),
+            'number_recall': _ratio(pair_hits, sum(truth_pairs.values())) if found_pairs else None,
+        }
+    return results
+
+
+def check_committees(fixture: str, committees: Dict[str, Dict], min_precision: float, min_recall: float,
+                     baseline: Optional[Dict], tolerance: float) -> List[str]:
+    """Failure messages for thresholds and baseline regressions"""
+    failures = []
+    for committee, result in committees.items():
+        for metric, minimum in (('name_precision', min_precision), ('name_recall', min_recall),
+                                ('number_precision', min_precision), ('number_recall', min_recall)):
+            value = result[metric]
+            if value is not None and value < minimum:
+                failures.append(f"{fixture}/{committee}: {metric} {value:.4f} < {minimum}")
+            base = (baseline or {}).get(committee, {}).get(metric)
+            if value is not None and base is not None and value < base - tolerance:
+                failures.append(f"{fixture}/{committee}: {metric} {value:.4f} dropped from baseline {base:.4f}")
+    return failures
+
+
+def run_fixture(name: str, fixture: Dict, cache: PageCache, parser_name: Optional[str] = None,
+                extractor: Optional[Callable] = None) -> Optional[Dict]:
+    """Parse one fixture and score it; None when its files are missing"""
+    if 'generate' in fixture and not os.path.exists(fixture['pdf']):
+        from synthetic_voter_pdf import generate_voter_roll_pdf
+        try:
+            generate_voter_roll_pdf(fixture['pdf'], **fixture['generate'])
+        except (ImportError, FileNotFoundError) as e:
+            print(f"⚠️ {name}: cannot generate {fixture['pdf']} ({e}), skipping")
+            return None
+    for key in ('pdf', 'expected'):
+        if not os.path.exists(fixture[key]):
+            print(f"⚠️ {name}: {fixture[key]} not found, skipping")
+            return None
+
+    expected = load_expected(fixture['expected'])
+    start = time.perf_counter()
+    if extractor is not None:
+        parser_label = f"{extractor.__module__}:{extractor.__name__}"
+        records = list(extractor(fixture['pdf']))
+        load_seconds = 0.0
+    else:
+        parser_label = parser_name or fixture.get('parser', 'onepage_rows')
+        source, parser = PARSERS[parser_label]
+        pages = cache.pages(fixture['pdf'], source)
+        load_seconds = time.perf_counter() - start
+        records = parser(pages)
+    total_seconds = time.perf_counter() - start
+
+    return {
+        'fixture': name,
+        'pdf': fixture['pdf'],
+        'expected_file': fixture['expected'],
+        'parser': parser_label,
+        'load_seconds': round(load_seconds, 3),
+        'parse_seconds': round(total_seconds - load_seconds, 3),
+        'committees': score_committees(records, expected),
+    }
+
+
+def print_fixture(result: Dict):
+    print(f"\n📄 {result['fixture']} [{result['parser']}] "
+          f"load {result['load_seconds']:.2f}s, parse {result['parse_seconds']:.2f}s")
+    print(f"   {'committee':<10} {'expected':>8} {'found':>8} {'name P':>8} {'name R':>8} {'num P':>8} {'num R':>8}")
+
+    def fmt(value):
+        return f"{value:>8.3f}" if value is not None else f"{'-':>8}"
+
+    for committee, scores in result['committees'].items():
+        print(f"   {committee:<10} {scores['expected']:>8} {scores['extracted']:>8} "
+              f"{fmt(scores['name_precision'])} {fmt(scores['name_recall'])} "
+              f"{fmt(scores['number_precision'])} {fmt(scores['number_recall'])}")
+
+
+def parse_fixture_args(values: List[str]) -> Dict[str, Dict]:
+    """--fixture onepage  or  --fixture name=pdf:expected"""
+    selected = {}
+    for value in values:
+        if '=' in value:
+            name, paths = value.split('=', 1)
+            pdf_path, _, expected_path = paths.rpartition(':')
+            selected[name] = {'pdf': pdf_path, 'expected': expected_path}
+        elif value in FIXTURES:
+            selected[value] = FIXTURES[value]
+        else:
+            raise ValueError(f"Unknown fixture {value!r} (choose from {', '.join(FIXTURES)} or name=pdf:expected)")
+    return selected
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-committee extraction accuracy against golden fixtures")
+    parser.add_argument('--fixture', action='append', default=[],
+                        help="Fixture name or name=pdf:expected (repeatable, default: all)")
+    parser.add_argument('--parser', choices=sorted(PARSERS), help="Cached-page parser (default: per fixture)")
+    parser.add_argument('--extractor', help="module:function(pdf_path) -> voter dicts, run without the cache")
+    parser.add_argument('--min-precision', type=float, default=0.99)
+    parser.add_argument('--min-recall', type=float, default=0.99)
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline scores to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.001, help="Allowed drop against the baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🎯 EXTRACTION REGRESSION HARNESS")
+    print("=" * 70)
+
+    try:
+        fixtures = parse_fixture_args(args.fixture) if args.fixture else FIXTURES
+        extractor = load_extractor(args.extractor) if args.extractor else None
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    cache = PageCache(args.cache_dir)
+    results, failures = [], []
+    for name, fixture in fixtures.items():
+        result = run_fixture(name, fixture, cache, args.parser, extractor)
+        if result is None:
+            continue
+        results.append(result)
+        print_fixture(result)
+        base = baseline.get(name) if baseline.get(name, {}).get('parser') == result['parser'] else None
+        failures.extend(check_committees(name, result['committees'], args.min_precision, args.min_recall,
+                                         (base or {}).get('committees'), args.tolerance))
+
+    if not results:
+        print("❌ No fixtures could be run")
+        return 2
+
+    os.makedirs(REGRESSION_DIR, exist_ok=True)
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'results': results, 'failures': failures}, f, ensure_ascii=False, indent=2)
+    print(f"\n🗄️  Page cache: {cache.hits} hits, {cache.misses} misses")
+    print(f"📁 {REPORT_FILE}")
+
+    if args.save_baseline:
+        baseline.update({result['fixture']: result for result in results})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"📌 Baseline saved: {args.baseline}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} check(s) failed:")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+
+    print("\n✅ All fixtures within thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Family Clustering
+Groups voters into households by their father/grandfather chains instead of the
+last token alone. split_arabic_name's family_name puts every "محمد ... الشاعر" in
+one family; here two voters only join when their names link through a parent:
+
+    child:  [self, father, grandfather, ..., family]
+    parent: [father, grandfather, ..., family]
+
+Each voter contributes two hashed token-sequence keys within its location:
+- lineage key  (father, grandfather, family)  -> who the voter descends from
+- self key     (self, father, family)          -> what the voter's children carry as lineage
+Siblings share a lineage key; a parent's self key equals the child's lineage key.
+Linked rows are merged with union-find, so chains (grandparent -> parent
+-> children) end up in one cluster. Keys held by too many voters (very common
+name + surname combinations) are skipped rather than merging unrelated people.
+
+Usage:
+    python family_clustering.py --voters output/voters_table.csv
+    python family_clustering.py --voters output/voters_table.csv --db-url postgresql://...
+"""
+
+import argparse
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from arabic_name_utils import normalize_arabic_name
+from voter_roll_io import DEFAULT_VOTERS_CSV, load_voters
+
+DEFAULT_OUTPUT_CSV = os.path.join('output', 'voters_family_clusters.csv')
+DEFAULT_MAX_KEY_ROWS = 60
+
+# Compound given names are one person's name, not a name + father ("عبد الله", "نور الدين")
+COMPOUND_PREFIXES = {'عبد', 'ابو'}
+COMPOUND_SUFFIXES = {'الله', 'الدين'}
+
+
+class UnionFind:
+    """Array-backed union-find with path halving"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            if root_a < root_b:
+                self.parent[root_b] = root_a
+            else:
+                self.parent[root_a] = root_b
+
+
+def name_tokens(full_name: str) -> List[str]:
+    """Normalized name tokens with compound given names joined"""
+    tokens: List[str] = []
+    pending_prefix = ''
+    for token in normalize_arabic_name(full_name).split():
+        if pending_prefix:
+            token = f"{pending_prefix} {token}"
+            pending_prefix = ''
+        elif token in COMPOUND_PREFIXES:
+            pending_prefix = token
+            continue
+        elif token in COMPOUND_SUFFIXES and tokens:
+            tokens[-1] = f"{tokens[-1]} {token}"
+            continue
+        tokens.append(token)
+    if pending_prefix:
+        tokens.append(pending_prefix)
+    return tokens
+
+
+def name_keys(tokens: List[str]) -> tuple:
+    """(lineage key, self key) token sequences for one normalized name; None where too short"""
+    # [self, father, family] is the shortest name that says anything about a parent
+    if len(tokens) < 3:
+        return None, None
+    family = tokens[-1]
+    self_key = (tokens[0], tokens[1], family)
+    lineage_key = (tokens[1], tokens[2], family) if len(tokens) >= 4 else None
+    return lineage_key, self_key
+
+
+def assign_family_clusters(voters_df: pd.DataFrame, max_key_rows: int = DEFAULT_MAX_KEY_ROWS) -> pd.Series:
+    """Return a family_cluster_id per voter row (aligned with voters_df.index)"""
+    locations = voters_df['location_id'].astype('int64').tolist()
+    voter_ids = voters_df['voter_id'].astype('int64').tolist()
+    tokens = voters_df['full_name'].map(name_tokens).tolist()
+
+    # Hashed indexes: (location, token sequence) -> rows, one for lineage keys and one for self keys
+    children: Dict[tuple, List[int]] = defaultdict(list)
+    parents: Dict[tuple, List[int]] = defaultdict(list)
+    for row, (location_id, row_tokens) in enumerate(zip(locations, tokens)):
+        lineage_key, self_key = name_keys(row_tokens)
+        if lineage_key is not None:
+            children[(location_id,) + lineage_key].append(row)
+        if self_key is not None:
+            parents[(location_id,) + self_key].append(row)
+
+    clusters = UnionFind(len(voters_df))
+    for key, rows in children.items():
+        if len(rows) > max_key_rows:
+            continue
+        # Siblings share the lineage key; a voter whose self key is that lineage is their parent.
+        # With several such voters the parent is ambiguous (same name + father, different
+        # grandfathers), so only a single candidate is linked.
+        candidates = parents.get(key, [])
+        linked = rows + candidates if len(candidates) == 1 else rows
+        first = linked[0]
+        for row in linked[1:]:
+            clusters.union(first, row)
+
+    # Stable ids: the smallest voter_id in the cluster. voter_id is unique across
+    # districts in every --ids mode, so no location part is needed (and none can
+    # overflow int64 next to 53-bit hashed voter ids)
+    root_ids: Dict[int, int] = {}
+    for row in range(len(voters_df)):
+        root = clusters.find(row)
+        if root not in root_ids or voter_ids[row] < root_ids[root]:
+            root_ids[root] = voter_ids[row]
+
+    return pd.Series([root_ids[clusters.find(row)] for row in range(len(voters_df))],
+                     index=voters_df.index, dtype='int64', name='family_cluster_id')
+
+
+def cluster_summary(voters_df: pd.DataFrame) -> Dict:
+    """Cluster counts next to the last-token family counts they replace"""
+    sizes = voters_df.groupby('family_cluster_id').size()
+    surname_groups = voters_df[voters_df['family_name'] != ''].groupby(['location_id', 'family_name']).size()
+    return {
+        'voters': len(voters_df),
+        'clusters': int(len(sizes)),
+        'multi_member_clusters': int((sizes > 1).sum()),
+        'singletons': int((sizes == 1).sum()),
+        'largest_cluster': int(sizes.max()) if len(sizes) else 0,
+        'mean_multi_member_size': round(float(sizes[sizes > 1].mean()), 2) if (sizes > 1).any() else 0.0,
+        'surname_groups': int(len(surname_groups)),
+        'largest_surname_group': int(surname_groups.max()) if len(surname_groups) else 0,
+    }
+
+
+def push_clusters(voters_df: pd.DataFrame, db_url: str) -> int:
+    """Set family_cluster_id on voters already in the table (needs sql/add_family_cluster_id.sql applied)
+
+    Only family_cluster_id is written: voters missing from the table are not inserted
+    and no other column changes.
+    """
+    from database_transfer_agent import PostgresCopyBackend, TABLE_CONFLICT_KEYS
+
+    records = [
+        {
+            'voter_id': int(row.voter_id),
+            'location_id': int(row.location_id),
+            'family_cluster_id': int(row.family_cluster_id),
+        }
+        for row in voters_df[['voter_id', 'location_id', 'family_cluster_id']].itertuples(index=False)
+    ]
+    backend = PostgresCopyBackend(db_url)
+    backend.connect()
+    try:
+        return backend.copy_update('voters', records, TABLE_CONFLICT_KEYS['voters'])
+    finally:
+        backend.close()
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Cluster voters into families by father/grandfather chains")
+    parser.add_argument('--voters', default=DEFAULT_VOTERS_CSV, help="Voters CSV or Parquet file")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_CSV, help="Voters CSV with family_cluster_id added")
+    parser.add_argument('--max-key-rows', type=int, default=DEFAULT_MAX_KEY_ROWS,
+                        help="Ignore name keys shared by more voters than this")
+    parser.add_argument('--db-url', default=os.getenv('SUPABASE_DB_URL'),
+                        help="Postgres connection string to write family_cluster_id back")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("👨‍👩‍👧‍👦 FAMILY CLUSTERING")
+    print("=" * 70)
+
+    if not os.path.exists(args.voters):
+        print(f"❌ File not found: {args.voters}")
+        return False
+
+    voters_df = load_voters(args.voters)
+    print(f"📂 Loaded {len(voters_df):,} voters")
+
+    start = time.perf_counter()
+    voters_df['family_cluster_id'] = assign_family_clusters(voters_df, args.max_key_rows)
+    print(f"⏱️  Clustered in {time.perf_counter() - start:.2f}s")
+
+    summary = cluster_summary(voters_df)
+    print(f"👪 {summary['multi_member_clusters']:,} households "
+          f"(mean {summary['mean_multi_member_size']} members, largest {summary['largest_cluster']}), "
+          f"{summary['singletons']:,} unlinked voters")
+    print(f"   vs {summary['surname_groups']:,} last-token family groups "
+          f"(largest {summary['largest_surname_group']})")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    voters_df.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(f"📁 {args.output}")
+
+    if args.db_url:
+        merged = push_clusters(voters_df, args.db_url)
+        print(f"✅ Updated family_cluster_id on {merged:,} voters")
+
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,13 @@ Uses the cleaned location data and matching voter data
 """
 
 import pandas as pd
-import json
 import os
 from supabase import create_client, Client
 from datetime import datetime
 import time
 
+from voter_roll_io import iter_records
+
 def load_config():
     """Load Supabase configuration"""
     try:
@@ -123,21 +124,22 @@ def transfer_clean_data():
     print(f"\n📖 Loading voter data from: {voters_file}")
     
     try:
-        with open(voters_file, 'r', encoding='utf-8') as f:
-            all_voters_data = json.load(f)
-        
-        print(f"👥 Loaded {len(all_voters_data)} total voters from file")
-        
         # Get the location IDs we want to keep
         valid_location_ids = set(locations_df['location_id'].tolist())
         print(f"🔍 Filtering voters for location IDs: {valid_location_ids}")
         
-        # Filter voters to only include those from our clean locations
+        # Stream the voters and keep only those from our clean locations
         filtered_voters = []
-        for voter in all_voters_data:
+        total_voters = 0
+        sample_voter_locations = set()
+        for voter in iter_records(voters_file, 'voters'):
+            total_voters += 1
+            if total_voters <= 10:
+                sample_voter_locations.add(voter.get('location_id'))
             if voter.get('location_id') in valid_location_ids:
                 filtered_voters.append(voter)
         
+        print(f"👥 Read {total_voters} total voters from file")
         print(f"✅ Filtered to {len(filtered_voters)} voters from clean locations")
         
         if len(filtered_voters) == 0:
@@ -145,9 +147,6 @@ def transfer_clean_data():
             print("This might be due to location_id mismatch. Let me check...")
             
             # Show sample voter location_ids
-            sample_voter_locations = set()
-            for voter in all_voters_data[:10]:
-                sample_voter_locations.add(voter.get('location_id'))
             print(f"Sample voter location_ids: {sample_voter_locations}")
             print(f"Clean location_ids: {valid_location_ids}")
             
@@ -6,13 +6,14 @@ Handles the correct voter data structure
 """
 
 import pandas as pd
-import json
 import os
 from supabase import create_client, Client
 from datetime import datetime
 import time
 import numpy as np
 
+from voter_roll_io import iter_records
+
 def load_config():
     """Load Supabase configuration"""
     try:
@@ -147,29 +148,33 @@ def transfer_clean_data():
     print(f"\n📖 Loading voter data from: {voters_file}")
     
     try:
-        with open(voters_file, 'r', encoding='utf-8') as f:
-            voter_data_dict = json.load(f)
-        
-        # Extract the voters list from the dictionary
-        if 'voters' in voter_data_dict:
-            all_voters_data = voter_data_dict['voters']
-        else:
-            print("❌ No 'voters' key found in voter data file")
-            print(f"Available keys: {list(voter_data_dict.keys())}")
-            return False
-        
-        print(f"👥 Loaded {len(all_voters_data)} total voters from file")
-        
         # Get the location IDs we want to keep (1, 2, 3)
         valid_location_ids = set(locations_df_clean['location_id'].tolist())
         print(f"🔍 Filtering voters for location IDs: {valid_location_ids}")
         
-        # Filter voters to only include those from our clean locations
+        # Stream the voters and keep only those from our clean locations (and those
+        # with location_id 1, 2 or 3, the fallback below); the file is never held in
+        # memory as a whole
         filtered_voters = []
-        for voter in all_voters_data:
-            if isinstance(voter, dict) and voter.get('location_id') in valid_location_ids:
+        matching_voters = []
+        total_voters = 0
+        sample_voter = None
+        unique_location_ids = set()
+        for voter in iter_records(voters_file, 'voters'):
+            total_voters += 1
+            if sample_voter is None:
+                sample_voter = voter
+            if not isinstance(voter, dict):
+                continue
+            voter_loc_id = voter.get('location_id')
+            if 'location_id' in voter:
+                unique_location_ids.add(voter_loc_id)
+            if voter_loc_id in valid_location_ids:
                 filtered_voters.append(voter)
+            if voter_loc_id in [1, 2, 3]:
+                matching_voters.append(voter)
         
+        print(f"👥 Read {total_voters} total voters from file")
         print(f"✅ Filtered to {len(filtered_voters)} voters from clean locations")
         
         if len(filtered_voters) == 0:
@@ -177,8 +182,7 @@ def transfer_clean_data():
             print("Let me check the voter data structure...")
             
             # Show sample voter data
-            if len(all_voters_data) > 0:
-                sample_voter = all_voters_data[0]
+            if sample_voter is not None:
                 print(f"Sample voter type: {type(sample_voter)}")
                 print(f"Sample voter: {sample_voter}")
                 
@@ -187,14 +191,6 @@ def transfer_clean_data():
                     if 'location_id' in sample_voter:
                         print(f"Sample location_id: {sample_voter['location_id']}")
             
-            # Try to find any voters with location_id 1, 2, or 3
-            matching_voters = []
-            for voter in all_voters_data:
-                if isinstance(voter, dict):
-                    voter_loc_id = voter.get('location_id')
-                    if voter_loc_id in [1, 2, 3]:
-                        matching_voters.append(voter)
-            
             print(f"Found {len(matching_voters)} voters with location_id 1, 2, or 3")
             
             if len(matching_voters) > 0:
@@ -202,10 +198,6 @@ def transfer_clean_data():
                 print(f"✅ Using {len(filtered_voters)} matching voters")
             else:
                 # Show all unique location_ids in voter data
-                unique_location_ids = set()
-                for voter in all_voters_data:
-                    if isinstance(voter, dict) and 'location_id' in voter:
-                        unique_location_ids.add(voter['location_id'])
                 print(f"All location_ids in voter data: {sorted(unique_location_ids)}")
                 return False
             
@@ -6,13 +6,14 @@ Handles NaN values properly
 """
 
 import pandas as pd
-import json
 import os
 from supabase import create_client, Client
 from datetime import datetime
 import time
 import numpy as np
 
+from voter_roll_io import iter_records
+
 def load_config():
     """Load Supabase configuration"""
     try:
@@ -152,21 +153,26 @@ def transfer_clean_data():
     print(f"\n📖 Loading voter data from: {voters_file}")
     
     try:
-        with open(voters_file, 'r', encoding='utf-8') as f:
-            all_voters_data = json.load(f)
-        
-        print(f"👥 Loaded {len(all_voters_data)} total voters from file")
-        
         # Get the location IDs we want to keep (1, 2, 3)
         valid_location_ids = set(locations_df_clean['location_id'].tolist())
         print(f"🔍 Filtering voters for location IDs: {valid_location_ids}")
         
-        # Filter voters to only include those from our clean locations
+        # Stream the voters and keep only those from our clean locations (and those
+        # with location_id 1, 2 or 3, the fallback below)
         filtered_voters = []
-        for voter in all_voters_data:
+        matching_voters = []
+        total_voters = 0
+        sample_voter_locations = set()
+        for voter in iter_records(voters_file, 'voters'):
+            total_voters += 1
+            if total_voters <= 20:
+                sample_voter_locations.add(voter.get('location_id'))
             if voter.get('location_id') in valid_location_ids:
                 filtered_voters.append(voter)
+            if voter.get('location_id') in [1, 2, 3]:
+                matching_voters.append(voter)
         
+        print(f"👥 Read {total_voters} total voters from file")
         print(f"✅ Filtered to {len(filtered_voters)} voters from clean locations")
         
         if len(filtered_voters) == 0:
@@ -174,18 +180,9 @@ def transfer_clean_data():
             print("This might be due to location_id mismatch. Let me check...")
             
             # Show sample voter location_ids
-            sample_voter_locations = set()
-            for voter in all_voters_data[:20]:
-                sample_voter_locations.add(voter.get('location_id'))
             print(f"Sample voter location_ids: {sorted(sample_voter_locations)}")
             print(f"Clean location_ids: {sorted(valid_location_ids)}")
             
-            # Try to find voters with location_id 1, 2, or 3
-            matching_voters = []
-            for voter in all_voters_data:
-                if voter.get('location_id') in [1, 2, 3]:
-                    matching_voters.append(voter)
-            
             print(f"Found {len(matching_voters)} voters with location_id 1, 2, or 3")
             
             if len(matching_voters) > 0:
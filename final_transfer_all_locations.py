@@ -5,13 +5,14 @@ Transfers all 29 properly extracted locations and their voters to Supabase
 """
 
 import pandas as pd
-import json
 import os
 from supabase import create_client, Client
 from datetime import datetime
 import time
 import numpy as np
 
+from voter_roll_io import iter_records
+
 def load_config():
     """Load Supabase configuration"""
     try:
@@ -149,28 +150,26 @@ def transfer_all_locations():
     print(f"\n📖 Loading voter data from: {voters_file}")
     
     try:
-        with open(voters_file, 'r', encoding='utf-8') as f:
-            voter_data_dict = json.load(f)
-        
-        # Extract the voters list from the dictionary
-        if 'voters' in voter_data_dict:
-            all_voters_data = voter_data_dict['voters']
-        else:
-            print("❌ No 'voters' key found in voter data file")
-            return False
-        
-        print(f"👥 Loaded {len(all_voters_data)} total voters from file")
-        
         # Get the location IDs we want to keep (all 29 locations)
         valid_location_ids = set(locations_df_clean['location_id'].tolist())
         print(f"🔍 Filtering voters for {len(valid_location_ids)} location IDs")
         
-        # Filter voters to only include those from our locations
+        # Stream the voters and keep only those from our locations; the file is never
+        # held in memory as a whole
         filtered_voters = []
-        for voter in all_voters_data:
-            if isinstance(voter, dict) and voter.get('location_id') in valid_location_ids:
-                filtered_voters.append(voter)
+        total_voters = 0
+        sample_voter = None
+        unique_location_ids = set()
+        for voter in iter_records(voters_file, 'voters'):
+            total_voters += 1
+            if sample_voter is None:
+                sample_voter = voter
+            if isinstance(voter, dict) and 'location_id' in voter:
+                unique_location_ids.add(voter['location_id'])
+                if voter['location_id'] in valid_location_ids:
+                    filtered_voters.append(voter)
         
+        print(f"👥 Read {total_voters} total voters from file")
         print(f"✅ Filtered to {len(filtered_voters)} voters from all locations")
         
         if len(filtered_voters) == 0:
@@ -178,19 +177,13 @@ def transfer_all_locations():
             print("Let me check the voter-location mapping...")
             
             # Show sample voter data
-            if len(all_voters_data) > 0:
-                sample_voter = all_voters_data[0]
+            if sample_voter is not None:
                 print(f"Sample voter: {sample_voter}")
                 
                 if isinstance(sample_voter, dict) and 'location_id' in sample_voter:
                     print(f"Sample location_id: {sample_voter['location_id']}")
             
             # Show all unique location_ids in voter data
-            unique_location_ids = set()
-            for voter in all_voters_data:
-                if isinstance(voter, dict) and 'location_id' in voter:
-                    unique_location_ids.add(voter['location_id'])
-            
             print(f"Location IDs in voter data: {sorted(list(unique_location_ids))[:20]}...")
             print(f"Location IDs we want: {sorted(list(valid_location_ids))[:20]}...")
             
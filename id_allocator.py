@@ -0,0 +1,174 @@
+"""
+Global id allocation for locations and voters
+process_pdf numbers ids from 1 in every run, so loading a second district (or
+re-loading one) collides unless the tables are cleared first. An IdAllocator hands
+out location_id / voter_id values that are safe across concurrent workers:
+
+- BlockIdAllocator + FileBlockStore     : blocks claimed from a locked JSON file
+                                           (workers of one batch on one machine)
+- BlockIdAllocator + PostgresBlockStore : blocks claimed with claim_id_block()
+                                           (sql/create_id_blocks.sql), shared by all loaders
+- DeterministicIdAllocator              : stable hash of (district, committee, voter_number);
+                                           no coordination at all, same ids on every re-run
+                                           of the same parse
+
+Block allocators claim a whole range at once (e.g. 50,000 voter ids) and number rows
+locally, so there is one store round trip per block, not per row.
+
+Usage:
+    allocator = BlockIdAllocator(FileBlockStore('output/id_blocks.json'), owner='فوه')
+    extractor = EgyptElectionPDFExtractor(pdf, output_dir, id_allocator=allocator)
+"""
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ID_KINDS = ('location', 'voter')
+
+# Ids per claim; voters are numbered thousands per committee, locations tens per district
+DEFAULT_BLOCK_SIZES = {'location': 100, 'voter': 50_000}
+
+# Hashed ids fit BIGINT columns (databases created with voters.voter_id INTEGER are
+# widened by sql/create_id_blocks.sql) and stay below 2^53, so JSON clients that
+# parse numbers as doubles (the webapp) read them back exactly
+DETERMINISTIC_ID_BITS = 53
+
+
+class FileBlockStore:
+    """High-water marks per id kind in a JSON file, updated under an exclusive file lock"""
+
+    def __init__(self, path: str, start_ids: Optional[Dict[str, int]] = None):
+        self.path = path
+        # First id handed out for a kind that the file has not seen yet
+        self.start_ids = start_ids or {}
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + '.lock', 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after ~10 seconds
+                        time.sleep(0.1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def claim(self, kind: str, size: int, owner: Optional[str] = None) -> int:
+        """Reserve [first, first + size) and return first"""
+        with self._locked():
+            state = {'next_id': {}, 'claims': []}
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            first = state['next_id'].get(kind, self.start_ids.get(kind, 1))
+            state['next_id'][kind] = first + size
+            state['claims'].append({'kind': kind, 'first_id': first, 'last_id': first + size - 1, 'owner': owner})
+
+            temp_file = self.path + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.path)
+        return first
+
+
+class PostgresBlockStore:
+    """Blocks from public.claim_id_block() (sql/create_id_blocks.sql)"""
+
+    def __init__(self, db_url: str):
+        from database_transfer_agent import PostgresCopyBackend
+        self.backend = PostgresCopyBackend(db_url, max_connections=1)
+
+    def claim(self, kind: str, size: int, owner: Optional[str] = None) -> int:
+        rows = self.backend.fetch_all("select public.claim_id_block(%s, %s, %s)", (kind, size, owner))
+        return int(rows[0][0])
+
+    def close(self):
+        self.backend.close()
+
+
+class BlockIdAllocator:
+    """Numbers ids locally from claimed blocks; the keys passed in are ignored"""
+
+    def __init__(self, store, owner: Optional[str] = None, block_sizes: Optional[Dict[str, int]] = None):
+        self.store = store
+        self.owner = owner
+        self.block_sizes = {**DEFAULT_BLOCK_SIZES, **(block_sizes or {})}
+        self._next: Dict[str, int] = {}
+        self._end: Dict[str, int] = {}
+        self.claims = 0
+
+    def next_id(self, kind: str) -> int:
+        if self._next.get(kind, 0) >= self._end.get(kind, 0):
+            size = self.block_sizes[kind]
+            first = self.store.claim(kind, size, self.owner)
+            self._next[kind], self._end[kind] = first, first + size
+            self.claims += 1
+        value = self._next[kind]
+        self._next[kind] += 1
+        return value
+
+    def location_id(self, district: str, committee) -> int:
+        return self.next_id('location')
+
+    def voter_id(self, district: str, committee, voter_number: int) -> int:
+        return self.next_id('voter')
+
+
+def stable_id(*parts, bits: int = DETERMINISTIC_ID_BITS) -> int:
+    """Positive integer from a hash of the parts; the same parts always give the same id"""
+    key = '|'.join(str(part).strip() for part in parts).encode('utf-8')
+    value = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big') & ((1 << bits) - 1)
+    return value or 1
+
+
+class DeterministicIdAllocator:
+    """Ids hashed from (district, committee[, voter_number]); re-runs reproduce them exactly
+
+    53-bit ids need BIGINT location_id and voter_id columns (sql/create_id_blocks.sql
+    widens voter_id). Collisions within a run are detected and raise ValueError.
+
+    voter_number is whatever the caller passes; the extractor passes the voter's
+    position in its committee as parsed, not the number printed in the roll, so a
+    parser change that finds or drops a name re-keys every later voter of that
+    committee.
+    """
+
+    def __init__(self, location_bits: int = DETERMINISTIC_ID_BITS, voter_bits: int = DETERMINISTIC_ID_BITS):
+        self.location_bits = location_bits
+        self.voter_bits = voter_bits
+        self._seen: Dict[tuple, tuple] = {}
+
+    def _check(self, kind: str, value: int, key: tuple) -> int:
+        previous = self._seen.setdefault((kind, value), key)
+        if previous != key:
+            raise ValueError(f"{kind} id collision: {key} and {previous} both hash to {value}")
+        return value
+
+    def location_id(self, district: str, committee) -> int:
+        key = (district, int(committee))
+        return self._check('location', stable_id('location', *key, bits=self.location_bits), key)
+
+    def voter_id(self, district: str, committee, voter_number: int) -> int:
+        key = (district, int(committee), int(voter_number))
+        return self._check('voter', stable_id('voter', *key, bits=self.voter_bits), key)
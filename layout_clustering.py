@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Layout Clustering
+Row and column assignment for pdfplumber words as NumPy array operations,
+replacing the dict bucketing in extract_onepage.group_words_by_row (rounding
+`top` to a fixed 2.5pt grid split rows that straddled a bucket edge):
+
+- rows    : word vertical centres sorted once (per page), cut where consecutive
+            centres jump more than ROW_GAP x the median word height
+- columns : x-breakpoints learned from the page's horizontal occupancy profile;
+            a breakpoint is the middle of a run of empty space that (almost) no
+            row crosses, so cell gaps are found even when one header row spans them.
+            Column 0 is the rightmost (RTL)
+
+Works on one page or on a whole document at once (pass page numbers), so row
+parsing for 1,000 pages runs in seconds.
+
+Usage:
+    rows, columns = cluster_words(words)
+    for row_words in group_words_by_row(words): ...
+
+    python layout_clustering.py onepage.pdf          # clustering time per page
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Consecutive centres further apart than this (x median word height) start a new row
+ROW_GAP = 0.5
+# Minimum width of a column gap, x median word height
+COLUMN_GAP = 0.5
+# Share of rows allowed to cross a column gap (wide header/title rows)
+COLUMN_NOISE = 0.1
+# Occupancy profile resolution in points
+RESOLUTION = 0.5
+# Characters that do not make a word (extract_onepage.normalize_text strips the same)
+BLANK = ' \t\r\n\x00'
+
+
+def word_arrays(words: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """x0, x1, top, bottom arrays for a list of pdfplumber words, plus 'blank' for
+    words that are only whitespace / NUL glyphs"""
+    boxes = np.array([(word['x0'], word['x1'], word['top'], word['bottom'], not word['text'].strip(BLANK))
+                      for word in words], dtype=float).reshape(-1, 5)
+    return {'x0': boxes[:, 0], 'x1': boxes[:, 1], 'top': boxes[:, 2], 'bottom': boxes[:, 3],
+            'blank': boxes[:, 4].astype(bool)}
+
+
+def _drop_blank(words: Sequence[Dict], arrays: Dict[str, np.ndarray]) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
+    if not arrays['blank'].any():
+        return list(words), arrays
+    keep = np.flatnonzero(~arrays['blank'])
+    return [words[index] for index in keep.tolist()], {key: values[keep] for key, values in arrays.items()}
+
+
+def row_ids(top: np.ndarray, bottom: np.ndarray, page: Optional[np.ndarray] = None,
+            tolerance: Optional[float] = None) -> np.ndarray:
+    """Row id per word, numbered top to bottom (and page by page when pages are given)
+
+    tolerance: largest centre jump inside a row in points; default ROW_GAP x the
+    median word height.
+    """
+    if not len(top):
+        return np.zeros(0, dtype=int)
+    centre = (top + bottom) / 2
+    gap = tolerance if tolerance is not None else ROW_GAP * float(np.median(bottom - top))
+    order = np.argsort(centre, kind='stable') if page is None else np.lexsort((centre, page))
+    breaks = np.diff(centre[order]) > gap
+    if page is not None:
+        breaks |= np.diff(page[order]) != 0
+    ids = np.empty(len(top), dtype=int)
+    ids[order] = np.concatenate([[0], np.cumsum(breaks)])
+    return ids
+
+
+def column_breaks(x0: np.ndarray, x1: np.ndarray, rows: np.ndarray, min_gap: Optional[float] = None,
+                  height: Optional[float] = None) -> np.ndarray:
+    """x positions (ascending) between columns, from one page's words"""
+    if not len(x0):
+        return np.zeros(0)
+    if min_gap is None:
+        min_gap = COLUMN_GAP * (height or 10.0)
+    origin = np.floor(x0.min())
+    bins = int(np.ceil((x1.max() - origin) / RESOLUTION)) + 2
+
+    # Rows covering each bin: +1 at every word start, -1 after its end, then cumsum
+    # (words of one row overlapping each other count once per word; fine for a threshold)
+    cover = np.zeros(bins + 1, dtype=int)
+    np.add.at(cover, ((x0 - origin) / RESOLUTION).astype(int), 1)
+    np.add.at(cover, np.ceil((x1 - origin) / RESOLUTION).astype(int), -1)
+    occupied = np.cumsum(cover)[:bins] > COLUMN_NOISE * (rows.max() + 1 if len(rows) else 1)
+
+    # Runs of empty bins: starts where occupied falls, ends where it rises
+    edges = np.diff(occupied.astype(int))
+    starts = np.flatnonzero(edges == -1) + 1
+    ends = np.flatnonzero(edges == 1) + 1
+    ends = ends[ends > starts[0]] if len(starts) else ends
+    count = min(len(starts), len(ends))
+    starts, ends = starts[:count], ends[:count]
+    wide = (ends - starts) * RESOLUTION >= min_gap
+    return origin + (starts[wide] + ends[wide]) / 2 * RESOLUTION
+
+
+def column_ids(x0: np.ndarray, x1: np.ndarray, breaks: np.ndarray) -> np.ndarray:
+    """Column id per word from breakpoints; 0 is the rightmost column"""
+    return len(breaks) - np.searchsorted(breaks, (x0 + x1) / 2)
+
+
+def cluster_words(words: Sequence[Dict], tolerance: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(row id, column id) per word of one page"""
+    arrays = word_arrays(words)
+    rows = row_ids(arrays['top'], arrays['bottom'], tolerance=tolerance)
+    if not len(rows):
+        return rows, rows
+    height = float(np.median(arrays['bottom'] - arrays['top']))
+    breaks = column_breaks(arrays['x0'], arrays['x1'], rows, height=height)
+    return rows, column_ids(arrays['x0'], arrays['x1'], breaks)
+
+
+def group_rows(words: Sequence[Dict], rows: np.ndarray, x0: np.ndarray) -> List[List[Dict]]:
+    """Words split by row id, rows top to bottom, words right to left"""
+    if not len(rows):
+        return []
+    order = np.lexsort((-x0, rows))
+    ordered = [words[index] for index in order.tolist()]
+    cuts = [0] + (np.flatnonzero(np.diff(rows[order])) + 1).tolist() + [len(ordered)]
+    return [ordered[start:end] for start, end in zip(cuts[:-1], cuts[1:])]
+
+
+def group_words_by_row(words: Sequence[Dict], tolerance: Optional[float] = None) -> List[List[Dict]]:
+    """Drop-in for extract_onepage.group_words_by_row: rows top to bottom, words right to left"""
+    words, arrays = _drop_blank(words, word_arrays(words))
+    return group_rows(words, row_ids(arrays['top'], arrays['bottom'], tolerance=tolerance), arrays['x0'])
+
+
+def group_document_rows(pages: Sequence[Sequence[Dict]]) -> List[List[List[Dict]]]:
+    """group_words_by_row for every page at once: one sort over the whole document"""
+    words = [word for page_words in pages for word in page_words]
+    arrays = word_arrays(words)
+    arrays['page'] = np.repeat(np.arange(len(pages)), [len(page_words) for page_words in pages])
+    words, arrays = _drop_blank(words, arrays)
+    page = arrays['page']
+    rows = row_ids(arrays['top'], arrays['bottom'], page)
+
+    # Row ids grow page by page, so row k of group_rows belongs to row_page[k]
+    row_page = np.zeros(rows.max() + 1 if len(rows) else 0, dtype=int)
+    row_page[rows] = page
+    grouped: List[List[List[Dict]]] = [[] for _ in pages]
+    for row_words, page_index in zip(group_rows(words, rows, arrays['x0']), row_page):
+        grouped[page_index].append(row_words)
+    return grouped
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Time row/column clustering on a PDF's words")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    from extraction_engine import CACHE_DIR, ExtractionEngine
+    from extract_onepage import normalize_text
+
+    print("=" * 70)
+    print("📐 LAYOUT CLUSTERING")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    pages = ExtractionEngine(args.pdf, args.workers, CACHE_DIR).pages('pdfplumber_words')
+    words = sum(len(page['words']) for page in pages)
+
+    start = time.perf_counter()
+    rows = 0
+    columns = []
+    for page in pages:
+        page_words = [word for word in page['words'] if normalize_text(word['text'])]
+        page_rows, page_columns = cluster_words(page_words)
+        rows += page_rows.max() + 1 if len(page_rows) else 0
+        columns.append(page_columns.max() + 1 if len(page_columns) else 0)
+    seconds = time.perf_counter() - start
+
+    print(f"📄 {len(pages)} pages, {words:,} words in {seconds:.3f}s "
+          f"({seconds * 1000 / max(len(pages), 1):.2f} ms per page)")
+    print(f"   {rows:,} rows, median {int(np.median(columns)) if columns else 0} columns per page")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Location Gazetteer
+extract_location_from_committee and extract_location_details cut the school
+name out of the header line with string splits and, when that fails, fill in a
+hard-coded default school per district; extract_with_real_numbers.py scans
+every text line for every school of its known_schools list. A gazetteer indexes
+the known polling locations once and resolves header text to a canonical
+location_id:
+
+1. entries : canonical locations from "motobus  locations.csv" (location_id =
+             the location number); spellings found in the extracted location
+             CSVs (output/locations*.csv) are added as aliases of the entry they
+             closely match
+2. keys    : name_match_key (NFKC, alef/yaa/taa marbuta folded, spaces dropped,
+             as the PDFs glue words) reduced to Arabic letters, without مدرسة
+3. index   : letter trigram -> aliases containing it; a lookup only scores the
+             aliases that share a trigram with the text
+4. score   : share of an alias's trigrams found in the text, weighted by how
+             rare each trigram is among the aliases (البتدائية, مطوبس count
+             for little), then each word of the name is looked up in the text
+             (difflib ratio around its trigram hits); ties go to the entry whose
+             location number is the committee number
+5. cache   : results keyed by the SHA-1 of the normalized header text, so the
+             repeated header of a committee's pages is scored once
+
+Usage:
+    python location_gazetteer.py                              # build, resolve the alias CSVs, timing
+    python location_gazetteer.py --text "كفر الشيخمحافظة : مركز مطوبسمدرسة مطوبس الثانوية بنات"
+
+    gazetteer = LocationGazetteer.from_csvs()
+    extractor = EgyptElectionPDFExtractor(pdf, output_dir, gazetteer=gazetteer)
+    entry = gazetteer.resolve(header_lines, committee_num)    # None when nothing matches
+"""
+
+import argparse
+import difflib
+import glob
+import hashlib
+import math
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from arabic_name_utils import name_match_key
+
+CANONICAL_FILE = 'motobus  locations.csv'
+ALIAS_FILES = os.path.join('output', 'locations*.csv')
+# Letters per index token
+GRAM = 3
+# A location matches when this share of its (weighted) trigrams is in the text ...
+MIN_SCORE = 0.8
+# ... and each of its words is found there at this similarity (difflib ratio)
+WORD_SCORE = 0.75
+# A spelling from the alias CSVs joins an entry only when it matches this closely
+ALIAS_SCORE = 0.9
+
+NON_LETTERS = re.compile(r'[^ء-ي]')
+# Written with or without the name (and glued to it), so it is left out of the keys
+SCHOOL_WORD = 'مدرسه'
+
+
+def location_key(text) -> str:
+    """Matching key: name_match_key without digits, punctuation, Latin text or مدرسة"""
+    return NON_LETTERS.sub('', name_match_key(text)).replace(SCHOOL_WORD, '')
+
+
+def trigrams(key: str) -> set:
+    if len(key) <= GRAM:
+        return {key} if key else set()
+    return {key[i:i + GRAM] for i in range(len(key) - GRAM + 1)}
+
+
+def word_keys(text) -> List[str]:
+    """Keys of the words that can be checked on their own (GRAM letters or more)"""
+    return [key for key in (location_key(word) for word in str(text).split()) if len(key) >= GRAM]
+
+
+def gram_positions(key: str) -> Dict[str, List[int]]:
+    positions: Dict[str, List[int]] = defaultdict(list)
+    for i in range(len(key) - GRAM + 1):
+        positions[key[i:i + GRAM]].append(i)
+    return positions
+
+
+def word_score(word: str, key: str, positions: Dict[str, List[int]]) -> float:
+    """Best difflib ratio of the word against the stretches of key its trigrams point at"""
+    starts = {position - offset for offset in range(len(word) - GRAM + 1)
+              for position in positions.get(word[offset:offset + GRAM], ())}
+    best = 0.0
+    matcher = difflib.SequenceMatcher(b=word, autojunk=False)
+    for start in starts:
+        for shift in (-1, 0, 1):
+            for size in (len(word) - 1, len(word), len(word) + 1):
+                begin = max(start + shift, 0)
+                matcher.set_seq1(key[begin:begin + size])
+                best = max(best, matcher.ratio())
+    return best
+
+
+def words_found(words: Sequence[str], key: str, positions: Dict[str, List[int]]) -> bool:
+    return all(word_score(word, key, positions) >= WORD_SCORE for word in words)
+
+
+class LocationGazetteer:
+    """Known polling locations, indexed by letter trigrams of their names"""
+
+    def __init__(self, entries: Sequence[Dict]):
+        """entries: dicts with location_id, location_number, location_name, location_address"""
+        self.entries = [dict(entry) for entry in entries]
+        self._alias_entry: List[int] = []
+        self._alias_grams: List[set] = []
+        self._alias_key: List[str] = []
+        self._alias_words: List[List[str]] = []
+        self._index: Dict[str, List[int]] = defaultdict(list)
+        self._weights: Dict[str, float] = {}
+        self._alias_weight: List[float] = []
+        self._alias_keys = set()
+        self._cache: Dict[str, Optional[Dict]] = {}
+        self.hits = 0
+        self.misses = 0
+        for position, entry in enumerate(self.entries):
+            self._add_alias(position, entry['location_name'])
+        self._reweight()
+
+    def _add_alias(self, position: int, text) -> bool:
+        key = location_key(text)
+        grams = trigrams(key)
+        if not grams or (position, key) in self._alias_keys:
+            return False
+        self._alias_keys.add((position, key))
+        alias = len(self._alias_grams)
+        self._alias_entry.append(position)
+        self._alias_grams.append(grams)
+        self._alias_key.append(key)
+        self._alias_words.append(word_keys(text))
+        for gram in grams:
+            self._index[gram].append(alias)
+        return True
+
+    def _reweight(self):
+        """Rare trigrams weigh more; cached results are dropped as scores change"""
+        total = len(self._alias_grams)
+        self._weights = {gram: math.log(1 + total / len(aliases)) for gram, aliases in self._index.items()}
+        self._alias_weight = [sum(self._weights[gram] for gram in grams) for grams in self._alias_grams]
+        self._cache.clear()
+
+    @classmethod
+    def from_csvs(cls, canonical_file: str = CANONICAL_FILE,
+                  alias_files: Optional[Sequence[str]] = None) -> 'LocationGazetteer':
+        """Entries from the canonical CSV, aliases from the extracted location CSVs (default: ALIAS_FILES)"""
+        locations = pd.read_csv(canonical_file, sep=';', encoding='utf-8-sig')
+        locations = locations[['location numer', 'location adress', 'location name ']]
+        locations.columns = ['location_number', 'location_address', 'location_name']
+        locations = locations.dropna(subset=['location_number', 'location_name'])
+        gazetteer = cls([{
+            'location_id': int(row.location_number),
+            'location_number': str(int(row.location_number)),
+            'location_name': str(row.location_name).strip(),
+            'location_address': '' if pd.isna(row.location_address) else str(row.location_address).strip(),
+        } for row in locations.itertuples()])
+
+        files = sorted(glob.glob(ALIAS_FILES)) if alias_files is None else alias_files
+        for path in files:
+            names = pd.read_csv(path, encoding='utf-8-sig', usecols=['location_name'])['location_name']
+            gazetteer.add_aliases(names.dropna().unique())
+        return gazetteer
+
+    def add_aliases(self, names: Sequence[str]) -> int:
+        """Add each spelling to the entry it matches at ALIAS_SCORE or better; returns the number added"""
+        # Matched against the current aliases first, so the batch does not score itself
+        matched = [(self._best(name, min_score=ALIAS_SCORE, symmetric=True), name) for name in names]
+        added = sum(self._add_alias(position, name) for position, name in matched if position is not None)
+        if added:
+            self._reweight()
+        return added
+
+    @property
+    def alias_count(self) -> int:
+        return len(self._alias_grams) - len(self.entries)
+
+    def _best(self, text, location_number=None, min_score: float = MIN_SCORE, scores: Optional[Dict] = None,
+              symmetric: bool = False):
+        """Position of the best entry for the text, or None
+
+        Every word of the entry must be in the text, so 'مطوبس الثانوية بنين' does not
+        match 'مطوبس الثانوية بنات' on their shared trigrams. symmetric: the text must be
+        covered by the entry too (a name, not a header that holds one).
+        """
+        key = location_key(text)
+        grams = trigrams(key)
+        found: Dict[int, float] = defaultdict(float)
+        for gram in grams:
+            for alias in self._index.get(gram, ()):
+                found[alias] += self._weights[gram]
+        if not found:
+            return None
+
+        # Trigrams no alias has count as the rarest
+        unseen = math.log(1 + len(self._alias_grams))
+        text_weight = sum(self._weights.get(gram, unseen) for gram in grams)
+        positions = gram_positions(key)
+        text_words = word_keys(text) if symmetric else []
+        best: Dict[int, float] = {}
+        for alias, weight in found.items():
+            score = weight / self._alias_weight[alias]
+            if symmetric:
+                score = min(score, weight / text_weight)
+            if score < min_score or not words_found(self._alias_words[alias], key, positions):
+                continue
+            if text_words and not words_found(text_words, self._alias_key[alias], gram_positions(self._alias_key[alias])):
+                continue
+            position = self._alias_entry[alias]
+            best[position] = max(best.get(position, 0.0), score)
+        if not best:
+            return None
+        top = max(best.values())
+        if scores is not None:
+            scores['top'] = top
+        # Several committees can share a school (same name, consecutive numbers)
+        tied = [position for position, score in best.items() if top - score < 1e-9]
+        wanted = str(location_number) if location_number is not None else None
+        return next((position for position in tied if self.entries[position]['location_number'] == wanted),
+                    min(tied, key=lambda position: self.entries[position]['location_id']))
+
+    def match(self, text, location_number=None, min_score: float = MIN_SCORE) -> Optional[Dict]:
+        """Best entry for the text (uncached): a copy of the entry plus its score, or None"""
+        scores: Dict[str, float] = {}
+        position = self._best(text, location_number, min_score, scores)
+        if position is None:
+            return None
+        return dict(self.entries[position], score=round(scores['top'], 3))
+
+    def resolve(self, lines, location_number=None) -> Optional[Dict]:
+        """Entry for header text (a string or its lines), cached on the text's hash"""
+        text = lines if isinstance(lines, str) else '\n'.join(line for line in lines if line)
+        key = hashlib.sha1(f"{location_key(text)}|{location_number}".encode('utf-8')).hexdigest()
+        if key in self._cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._cache[key] = self.match(text, location_number)
+        return self._cache[key]
+
+    def location_id(self, lines, location_number=None) -> Optional[int]:
+        entry = self.resolve(lines, location_number)
+        return entry['location_id'] if entry else None
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Build the location gazetteer and resolve header text")
+    parser.add_argument('--canonical', default=CANONICAL_FILE, help="Canonical locations CSV (';' separated)")
+    parser.add_argument('--text', help="Header text to resolve")
+    parser.add_argument('--number', help="Committee / location number of the text")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🗺️  LOCATION GAZETTEER")
+    print("=" * 70)
+
+    if not os.path.exists(args.canonical):
+        print(f"❌ Locations file not found: {args.canonical}")
+        return False
+
+    start = time.perf_counter()
+    gazetteer = LocationGazetteer.from_csvs(args.canonical)
+    print(f"📍 {len(gazetteer.entries)} locations, {gazetteer.alias_count} aliases "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    if args.text:
+        entry = gazetteer.resolve(args.text, args.number)
+        if entry is None:
+            print("⚠️  No location matches")
+            return False
+        print(f"✅ {entry['location_id']}: {entry['location_name']} ({entry['location_address']}) score {entry['score']}")
+        return True
+
+    # Every spelling in the extracted location CSVs, twice: cold lookups, then cached
+    names = []
+    for path in sorted(glob.glob(ALIAS_FILES)):
+        names.extend(pd.read_csv(path, encoding='utf-8-sig', usecols=['location_name'])['location_name'].dropna())
+    for label in ('pass 1', 'pass 2'):
+        start = time.perf_counter()
+        resolved = sum(gazetteer.resolve(name) is not None for name in names)
+        seconds = time.perf_counter() - start
+        print(f"   {label:<7} {len(names):,} names, {resolved:,} resolved, "
+              f"{seconds * 1e6 / max(len(names), 1):.1f} µs per lookup")
+    print(f"   cache: {gazetteer.hits:,} hits, {gazetteer.misses:,} misses")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
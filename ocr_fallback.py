@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+OCR Fallback for Glyph-Broken Pages
+Some pages always come out of the PDF text layer garbled (broken glyph maps,
+presentation-form letters, reversed words). Instead of OCRing whole documents,
+score every page from its text layer and OCR only the pages that look broken:
+
+- score_page: share of candidate names that pass is_valid_arabic_name, plus the
+  share of NUL / presentation-form / private-use glyphs and of one-glyph lines
+- pages under --min-valid-ratio (or over --max-broken-glyphs) are rendered with
+  pypdfium2 and read with Tesseract (pytesseract, lang 'ara') in a process pool
+- the OCR text replaces the page only when it yields more valid names; the text
+  layer's footer line is kept so committee grouping is unchanged
+
+pytesseract and the tesseract binary are optional: without them pages are still
+scored and flagged, and the text layer is used as before.
+
+Usage:
+    python ocr_fallback.py "motobus .pdf"              # score pages, OCR the bad ones
+    python ocr_fallback.py "motobus .pdf" --scan-only  # only report page quality
+
+    extractor = EgyptElectionPDFExtractor(pdf, ocr_fallback=OcrFallback(pdf))
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import pytesseract
+except ImportError:  # Optional: pages are only scored without it
+    pytesseract = None
+
+try:
+    import pypdfium2
+except ImportError:  # Installed with pdfplumber
+    pypdfium2 = None
+
+OCR_DIR = os.path.join('output', 'ocr')
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+DEFAULT_DPI = 300
+DEFAULT_LANG = 'ara'
+TESSERACT_CONFIG = '--psm 6'  # one uniform block of text per page
+
+# A page is sent to OCR below this share of valid names ...
+MIN_VALID_RATIO = 0.6
+# ... or above this share of presentation-form / private-use glyphs
+MAX_BROKEN_GLYPH_RATIO = 0.05
+# Pages with fewer candidate names than this are headers/blank pages, not broken ones
+MIN_CANDIDATES = 5
+
+# ... or when most lines hold one or two characters (one glyph per line, as in onepage.pdf)
+MAX_SHORT_LINE_RATIO = 0.5
+
+# NUL / control characters, Arabic presentation forms, private-use area and U+FFFD:
+# the text layer lost its glyph map
+BROKEN_GLYPHS = re.compile(r'[\x00-\x08\uFB50-\uFDFF\uFE70-\uFEFF\uE000-\uF8FF\uFFFD]')
+
+
+def ocr_available() -> bool:
+    if pytesseract is None or pypdfium2 is None:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def score_page(extractor, page_lines: List[str]) -> Dict:
+    """Quality of one page's text layer, judged by the extractor's own name rules"""
+    candidates = 0
+    valid = 0
+    for line in page_lines[5:]:  # extract_voters_from_page skips the same header lines
+        for name in extractor.extract_names_from_line(line.strip()):
+            candidates += 1
+            valid += extractor.is_valid_arabic_name(name)
+
+    letters = ''.join(page_lines).replace(' ', '')
+    broken = len(BROKEN_GLYPHS.findall(letters))
+    lines = [line.strip() for line in page_lines if line.strip()]
+    short = sum(len(line) <= 2 for line in lines)
+    return {
+        'candidates': candidates,
+        'valid_names': valid,
+        'valid_ratio': round(valid / candidates, 3) if candidates else None,
+        'broken_glyph_ratio': round(broken / len(letters), 3) if letters else 0.0,
+        'short_line_ratio': round(short / len(lines), 3) if lines else 0.0,
+    }
+
+
+def needs_ocr(score: Dict, min_valid_ratio: float = MIN_VALID_RATIO,
+              max_broken_glyphs: float = MAX_BROKEN_GLYPH_RATIO) -> Optional[str]:
+    """Reason to OCR the page, or None when the text layer looks fine"""
+    if score['broken_glyph_ratio'] > max_broken_glyphs:
+        return f"broken glyphs {score['broken_glyph_ratio']:.0%}"
+    if score['short_line_ratio'] > MAX_SHORT_LINE_RATIO:
+        return f"fragmented lines {score['short_line_ratio']:.0%}"
+    if score['candidates'] >= MIN_CANDIDATES and score['valid_ratio'] < min_valid_ratio:
+        return f"valid names {score['valid_ratio']:.0%}"
+    return None
+
+
+def ocr_page(pdf_path: str, page_num: int, dpi: int = DEFAULT_DPI, lang: str = DEFAULT_LANG) -> Tuple[int, str]:
+    """Worker: render one page (1-based) and return its Tesseract text"""
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        page = pdf[page_num - 1]
+        image = page.render(scale=dpi / 72).to_pil()
+        page.close()
+    finally:
+        pdf.close()
+    return page_num, pytesseract.image_to_string(image, lang=lang, config=TESSERACT_CONFIG)
+
+
+def ocr_pages(pdf_path: str, page_nums: Sequence[int], workers: int = DEFAULT_WORKERS,
+              dpi: int = DEFAULT_DPI, lang: str = DEFAULT_LANG) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """OCR the given pages in a process pool; returns ({page_num: text}, {page_num: error})"""
+    texts: Dict[int, str] = {}
+    errors: Dict[int, str] = {}
+    if not page_nums:
+        return texts, errors
+
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(page_nums)))) as pool:
+        futures = {pool.submit(ocr_page, pdf_path, page_num, dpi, lang): page_num for page_num in page_nums}
+        for future in as_completed(futures):
+            page_num = futures[future]
+            try:
+                texts[page_num] = future.result()[1]
+            except Exception as e:
+                errors[page_num] = f"{type(e).__name__}: {e}"
+    return texts, errors
+
+
+class OcrFallback:
+    """Replaces the text of low-quality pages with OCR output before the normal parse"""
+
+    def __init__(self, pdf_path: str, min_valid_ratio: float = MIN_VALID_RATIO,
+                 max_broken_glyphs: float = MAX_BROKEN_GLYPH_RATIO, workers: int = DEFAULT_WORKERS,
+                 dpi: int = DEFAULT_DPI, lang: str = DEFAULT_LANG, enabled: Optional[bool] = None,
+                 page_nums: Optional[Iterable[int]] = None):
+        self.pdf_path = pdf_path
+        self.min_valid_ratio = min_valid_ratio
+        self.max_broken_glyphs = max_broken_glyphs
+        self.workers = workers
+        self.dpi = dpi
+        self.lang = lang
+        # None: OCR when pytesseract and the tesseract binary are available
+        self.enabled = ocr_available() if enabled is None else enabled
+        # Pages already routed to OCR (page_quality.py manifest); None: flag pages by score
+        self.page_nums = None if page_nums is None else set(page_nums)
+        self.report: Dict = {}
+
+    def apply(self, extractor, pages: Iterable[Tuple[int, List[str]]]) -> List[Tuple[int, List[str]]]:
+        """(page_num, page_lines) with flagged pages replaced by their OCR text where it is better"""
+        pages = list(pages)
+        start = time.perf_counter()
+        scores = {page_num: score_page(extractor, page_lines) for page_num, page_lines in pages}
+        flagged = {}
+        for page_num, score in scores.items():
+            if self.page_nums is not None:
+                reason = 'routed to OCR' if page_num in self.page_nums else None
+            else:
+                reason = needs_ocr(score, self.min_valid_ratio, self.max_broken_glyphs)
+            if reason:
+                flagged[page_num] = reason
+
+        texts, errors = {}, {}
+        if flagged and self.enabled:
+            texts, errors = ocr_pages(self.pdf_path, sorted(flagged), self.workers, self.dpi, self.lang)
+
+        merged = []
+        replaced = []
+        for page_num, page_lines in pages:
+            if page_num in texts:
+                ocr_lines = self.merge_lines(extractor, page_lines, texts[page_num])
+                ocr_score = score_page(extractor, ocr_lines)
+                if ocr_score['valid_names'] > scores[page_num]['valid_names']:
+                    replaced.append({'page_num': page_num, 'text_layer': scores[page_num], 'ocr': ocr_score})
+                    page_lines = ocr_lines
+            merged.append((page_num, page_lines))
+
+        self.report = {
+            'pdf_file': self.pdf_path,
+            'pages': len(pages),
+            'ocr_enabled': self.enabled,
+            'flagged': {str(page_num): reason for page_num, reason in sorted(flagged.items())},
+            'ocr_pages': len(texts),
+            'replaced': replaced,
+            'errors': {str(page_num): error for page_num, error in sorted(errors.items())},
+            'seconds': round(time.perf_counter() - start, 2),
+        }
+        return merged
+
+    @staticmethod
+    def merge_lines(extractor, page_lines: List[str], ocr_text: str) -> List[str]:
+        """OCR lines plus the text layer's footer
+
+        Committee grouping reads the footer from the text layer, which Tesseract
+        does not reproduce character for character.
+        """
+        footer = [line for line in page_lines if extractor.extract_committee_number([line])]
+        return [line for line in ocr_text.split('\n') if line.strip()] + footer
+
+    def save_report(self, output_dir: str = OCR_DIR) -> str:
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(self.pdf_path))[0].strip().replace(' ', '_')
+        report_file = os.path.join(output_dir, f"{stem}_ocr_report.json")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report, f, ensure_ascii=False, indent=2)
+        return report_file
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Score PDF pages and OCR only the glyph-broken ones")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--min-valid-ratio', type=float, default=MIN_VALID_RATIO)
+    parser.add_argument('--max-broken-glyphs', type=float, default=MAX_BROKEN_GLYPH_RATIO)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--lang', default=DEFAULT_LANG, help="Tesseract language (default ara)")
+    parser.add_argument('--scan-only', action='store_true', help="Score and flag pages without running OCR")
+    parser.add_argument('--output-dir', default=OCR_DIR)
+    args = parser.parse_args(argv)
+
+    from ai_agent_pdf_extractor import EgyptElectionPDFExtractor
+
+    print("=" * 70)
+    print("🔎 OCR FALLBACK")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    fallback = OcrFallback(args.pdf, args.min_valid_ratio, args.max_broken_glyphs, args.workers,
+                           args.dpi, args.lang, enabled=False if args.scan_only else None)
+    if not args.scan_only and not fallback.enabled:
+        print("⚠️  pytesseract / tesseract not available - scoring pages only")
+
+    extractor = EgyptElectionPDFExtractor(args.pdf, args.output_dir)
+    fallback.apply(extractor, extractor.iter_pages())
+    report = fallback.report
+
+    print(f"📄 {report['pages']} pages, ⚠️  {len(report['flagged'])} flagged for OCR")
+    for page_num, reason in list(report['flagged'].items())[:20]:
+        print(f"   page {page_num}: {reason}")
+    if fallback.enabled:
+        print(f"🔤 OCR'd {report['ocr_pages']} pages, replaced {len(report['replaced'])}, "
+              f"{len(report['errors'])} errors ({report['seconds']:.1f}s)")
+    print(f"📁 {fallback.save_report(args.output_dir)}")
+    return not report['errors']
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Offline Voter Roll Mirror
+Builds a single-file SQLite database from the extraction output so field staff
+can look voters up at polling stations without reaching Supabase.
+
+The file holds:
+- locations and voters tables (with first_name / middle_names / family_name
+  and the family_cluster_id households from family_clustering.py)
+- voters_fts: FTS5 trigram index over the normalized full name (substring search)
+- families_agg: per-family member and location counts (same shape as the webapp view)
+
+Usage:
+    python offline_voter_db.py build
+    python offline_voter_db.py query --name "محمد احمد" --location 76
+    python offline_voter_db.py query --family "الشاعر"
+    python offline_voter_db.py query --cluster 760000123
+    python offline_voter_db.py families --family "الشا"
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from arabic_name_utils import normalize_arabic_name
+from family_clustering import assign_family_clusters
+from voter_roll_io import DEFAULT_LOCATIONS_CSV, DEFAULT_VOTERS_CSV, load_locations, load_voters
+
+DEFAULT_DB_PATH = os.path.join('output', 'voters_offline.sqlite')
+
+SCHEMA_SQL = """
+CREATE TABLE locations (
+    location_id INTEGER PRIMARY KEY,
+    location_number TEXT,
+    location_name TEXT,
+    location_address TEXT,
+    governorate TEXT,
+    district TEXT,
+    total_voters INTEGER DEFAULT 0
+);
+
+CREATE TABLE voters (
+    id INTEGER PRIMARY KEY,
+    voter_id INTEGER NOT NULL,
+    full_name TEXT NOT NULL,
+    first_name TEXT,
+    middle_names TEXT,
+    family_name TEXT,
+    family_cluster_id INTEGER,
+    location_id INTEGER NOT NULL REFERENCES locations(location_id),
+    source_page INTEGER,
+    name_normalized TEXT NOT NULL,
+    family_normalized TEXT
+);
+
+CREATE TABLE families_agg (
+    family_name TEXT PRIMARY KEY,
+    member_count INTEGER,
+    location_count INTEGER
+);
+
+CREATE TABLE build_info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+INDEX_SQL = """
+CREATE INDEX idx_voters_location_id ON voters(location_id, voter_id);
+CREATE INDEX idx_voters_family ON voters(family_normalized, location_id);
+CREATE INDEX idx_voters_voter_id ON voters(voter_id);
+CREATE INDEX idx_voters_family_cluster ON voters(family_cluster_id, voter_id);
+CREATE INDEX idx_families_member_count ON families_agg(member_count DESC);
+"""
+
+VOTER_COLUMNS = ['voter_id', 'full_name', 'first_name', 'middle_names', 'family_name',
+                 'family_cluster_id', 'location_id', 'source_page', 'name_normalized', 'family_normalized']
+
+
+def has_trigram_fts(conn: sqlite3.Connection) -> bool:
+    """FTS5 trigram tokenizer needs SQLite 3.34+ built with FTS5"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.probe_fts USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.probe_fts")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _sqlite_value(value):
+    """Turn pandas NA/NaN into None and numpy scalars into Python values for sqlite"""
+    if value is None or value is pd.NA or value != value:
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+def build_offline_db(locations_csv: str = DEFAULT_LOCATIONS_CSV,
+                     voters_csv: str = DEFAULT_VOTERS_CSV,
+                     db_path: str = DEFAULT_DB_PATH) -> Dict:
+    """Build (or rebuild) the offline database file from extraction output"""
+    print(f"📂 Loading {locations_csv} and {voters_csv}...")
+    locations_df = load_locations(locations_csv)
+    voters_df = load_voters(voters_csv)
+
+    voters_df['name_normalized'] = voters_df['full_name'].map(normalize_arabic_name)
+    voters_df['family_normalized'] = voters_df['family_name'].map(normalize_arabic_name)
+    if 'source_page' not in voters_df.columns:
+        voters_df['source_page'] = None
+    if 'family_cluster_id' not in voters_df.columns:
+        voters_df['family_cluster_id'] = assign_family_clusters(voters_df)
+
+    # Build into a temp file and swap, so a failed build never leaves a half-written mirror
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;")
+        conn.executescript(SCHEMA_SQL)
+
+        location_rows = []
+        for loc in locations_df.to_dict('records'):
+            location_rows.append((
+                int(loc['location_id']),
+                str(loc.get('location_number', loc['location_id'])),
+                loc.get('location_name', ''),
+                loc.get('location_address', ''),
+                _sqlite_value(loc.get('governorate')),
+                _sqlite_value(loc.get('district')),
+                0,
+            ))
+        conn.executemany("INSERT OR REPLACE INTO locations VALUES (?, ?, ?, ?, ?, ?, ?)", location_rows)
+
+        voter_rows = (
+            tuple(_sqlite_value(value) for value in row)
+            for row in voters_df[VOTER_COLUMNS].itertuples(index=False, name=None)
+        )
+        conn.executemany(
+            f"INSERT INTO voters ({', '.join(VOTER_COLUMNS)}) VALUES ({', '.join('?' * len(VOTER_COLUMNS))})",
+            voter_rows
+        )
+
+        conn.executescript(INDEX_SQL)
+
+        # Counts come from the voters actually present, not the PDF header
+        conn.execute("""
+            UPDATE locations SET total_voters = (
+                SELECT COUNT(*) FROM voters v WHERE v.location_id = locations.location_id
+            )
+        """)
+        conn.execute("""
+            INSERT INTO families_agg (family_name, member_count, location_count)
+            SELECT family_name, COUNT(*), COUNT(DISTINCT location_id)
+            FROM voters
+            WHERE family_name IS NOT NULL AND family_name != ''
+            GROUP BY family_name
+        """)
+
+        trigram = has_trigram_fts(conn)
+        if trigram:
+            conn.execute("""
+                CREATE VIRTUAL TABLE voters_fts USING fts5(
+                    name_normalized, content='voters', content_rowid='id', tokenize='trigram'
+                )
+            """)
+            conn.execute("INSERT INTO voters_fts(rowid, name_normalized) SELECT id, name_normalized FROM voters")
+
+        build_info = {
+            'built_at': datetime.now().isoformat(),
+            'locations_source': os.path.abspath(locations_csv),
+            'voters_source': os.path.abspath(voters_csv),
+            'search_index': 'fts5_trigram' if trigram else 'like_scan',
+        }
+        conn.executemany("INSERT INTO build_info VALUES (?, ?)", build_info.items())
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+
+    result = {
+        'db_path': db_path,
+        'locations': len(locations_df),
+        'voters': len(voters_df),
+        'search_index': build_info['search_index'],
+        'size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2),
+    }
+    print(f"✅ Offline database written to {db_path} ({result['size_mb']} MB, {result['search_index']})")
+    return result
+
+
+class OfflineVoterDB:
+    """Read-only query helper over the offline mirror (same filters as the webapp)"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Offline database not found: {db_path} (run: python offline_voter_db.py build)")
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        self.conn.row_factory = sqlite3.Row
+        info = dict(self.conn.execute("SELECT key, value FROM build_info").fetchall())
+        self.trigram = info.get('search_index') == 'fts5_trigram'
+
+    def close(self):
+        self.conn.close()
+
+    def search_voters(self, location_id: Optional[int] = None, family: Optional[str] = None,
+                      name: Optional[str] = None, voter_id: Optional[int] = None,
+                      family_cluster_id: Optional[int] = None,
+                      limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Filter voters by location, exact family name, household cluster and/or name substring"""
+        clauses = []
+        params: List = []
+
+        if location_id is not None:
+            clauses.append("v.location_id = ?")
+            params.append(location_id)
+
+        if family:
+            clauses.append("v.family_normalized = ?")
+            params.append(normalize_arabic_name(family))
+
+        if voter_id is not None:
+            clauses.append("v.voter_id = ?")
+            params.append(voter_id)
+
+        if family_cluster_id is not None:
+            clauses.append("v.family_cluster_id = ?")
+            params.append(family_cluster_id)
+
+        if name:
+            term = normalize_arabic_name(name)
+            # Trigram index needs at least 3 characters; shorter terms scan
+            if self.trigram and len(term) >= 3:
+                clauses.append("v.id IN (SELECT rowid FROM voters_fts WHERE voters_fts MATCH ?)")
+                params.append('"' + term.replace('"', '""') + '"')
+            else:
+                clauses.append("v.name_normalized LIKE ?")
+                params.append(f"%{term}%")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"""
+            SELECT v.voter_id, v.full_name, v.first_name, v.middle_names, v.family_name,
+                   v.family_cluster_id, v.location_id, v.source_page, l.location_number, l.location_name
+            FROM voters v
+            JOIN locations l ON l.location_id = v.location_id
+            {where}
+            ORDER BY v.location_id, v.voter_id
+            LIMIT ? OFFSET ?
+        """
+        params.extend([limit, offset])
+        return [dict(row) for row in self.conn.execute(query, params).fetchall()]
+
+    def search_families(self, family: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Family aggregates, optionally filtered by a family-name substring"""
+        if family:
+            rows = self.conn.execute(
+                "SELECT * FROM families_agg WHERE family_name LIKE ? ORDER BY member_count DESC LIMIT ?",
+                (f"%{family.strip()}%", limit)
+            )
+        else:
+            rows = self.conn.execute("SELECT * FROM families_agg ORDER BY member_count DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows.fetchall()]
+
+    def locations(self) -> List[Dict]:
+        rows = self.conn.execute("SELECT * FROM locations ORDER BY location_id")
+        return [dict(row) for row in rows.fetchall()]
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    """Command line entry point: build / query / families / locations"""
+    parser = argparse.ArgumentParser(description="Offline voter roll mirror (SQLite)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Path of the offline database file")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = sub.add_parser('build', help="Build the offline database from extraction output")
+    build_parser.add_argument('--locations', default=DEFAULT_LOCATIONS_CSV)
+    build_parser.add_argument('--voters', default=DEFAULT_VOTERS_CSV)
+
+    query_parser = sub.add_parser('query', help="Search voters")
+    query_parser.add_argument('--location', type=int, help="location_id")
+    query_parser.add_argument('--family', help="Exact family name")
+    query_parser.add_argument('--name', help="Name substring")
+    query_parser.add_argument('--voter-id', type=int)
+    query_parser.add_argument('--cluster', type=int, help="family_cluster_id")
+    query_parser.add_argument('--limit', type=int, default=50)
+
+    families_parser = sub.add_parser('families', help="List family aggregates")
+    families_parser.add_argument('--family', help="Family name substring")
+    families_parser.add_argument('--limit', type=int, default=50)
+
+    sub.add_parser('locations', help="List locations")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        for path in (args.locations, args.voters):
+            if not os.path.exists(path):
+                print(f"❌ File not found: {path}")
+                print("💡 Run the PDF extraction first (python ai_agent_pdf_extractor.py)")
+                return False
+        build_offline_db(args.locations, args.voters, args.db)
+        return True
+
+    db = OfflineVoterDB(args.db)
+    try:
+        start = time.perf_counter()
+        if args.command == 'query':
+            rows = db.search_voters(location_id=args.location, family=args.family,
+                                    name=args.name, voter_id=args.voter_id,
+                                    family_cluster_id=args.cluster, limit=args.limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for row in rows:
+                print(f"{row['voter_id']:>7}  {row['full_name']}  |  {row['location_number']} {row['location_name']}")
+        elif args.command == 'families':
+            rows = db.search_families(args.family, args.limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for row in rows:
+                print(f"{row['family_name']}: {row['member_count']} members in {row['location_count']} locations")
+        else:
+            rows = db.locations()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for row in rows:
+                print(f"{row['location_id']:>5}  {row['location_name']}  ({row['total_voters']} voters)")
+
+        print(f"\n📊 {len(rows)} results in {elapsed_ms:.2f} ms")
+    finally:
+        db.close()
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Page Quality Triage
+A pre-pass that scores every page of a voter-roll PDF for parse quality and
+writes a per-page manifest. Each page is routed to the cheapest strategy that
+works for it:
+
+- text  : PyPDF2 text layer, parsed by EgyptElectionPDFExtractor as before
+- words : lines rebuilt from pdfplumber word coordinates (RTL row order)
+- ocr   : rendered and read by Tesseract (ocr_fallback.py)
+
+Signals per page (from the heuristics in analyze_pdf_structure.py and
+senior_engineer_extraction.analyze_pdf_structure):
+- Arabic letters vs junk glyphs (NUL, presentation forms, private use); the word
+  layer is measured as words_to_lines reads it (NULs dropped, GLYPH_MAP and NFKC
+  folding), so those only count against the text route
+- footer pattern found in the text layer / footer numbers in the word layer
+- voter rows vs the expected 21-40 rows per column (reported, not scored)
+- reversed text: common name words such as محمد appearing as دمحم
+- share of candidate names passing is_valid_arabic_name (ocr_fallback.score_page),
+  on the text layer and on the words_to_lines output alike; a page only goes to
+  the words route when its words give a higher share than its text layer
+
+Pages are read through extraction_engine.py, so the pre-pass shares its page cache.
+After an extraction the router writes <pdf>_route_report.json: route counts with
+the OCR report of its 'ocr' pages nested under 'ocr'.
+
+Usage:
+    python page_quality.py "motobus .pdf"                   # manifest + route counts
+    python page_quality.py "motobus .pdf" --extract         # extract using the routes
+
+    router = PageRouter.from_manifest(pdf, 'output/page_quality/motobus_pages.csv')
+    extractor = EgyptElectionPDFExtractor(pdf, page_router=router)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from extraction_engine import CACHE_DIR, DEFAULT_WORKERS, ExtractionEngine, process_pdf_lines
+from ocr_fallback import BROKEN_GLYPHS, MIN_CANDIDATES, OcrFallback, score_page
+
+QUALITY_DIR = os.path.join('output', 'page_quality')
+ROUTES = ('text', 'words', 'ocr')
+
+# Voter rows per column on a full roll page (onepage.pdf holds ~40); the last page
+# of a committee is shorter
+EXPECTED_ROWS = (21, 40)
+# A strategy is used when its score reaches this
+MIN_ROUTE_SCORE = 0.6
+
+# Frequent name words, to tell reversed (visual order) text from logical order
+COMMON_NAME_WORDS = ('محمد', 'احمد', 'أحمد', 'علي', 'على', 'حسن', 'محمود', 'عبد', 'السيد', 'ابراهيم',
+                     'إبراهيم', 'مصطفى', 'حسين', 'عبده', 'سعد')
+REVERSED_NAME_WORDS = tuple(word[::-1] for word in COMMON_NAME_WORDS)
+ARABIC_LETTERS = re.compile(r'[ء-ي]')
+# Grid heading row (name / serial), repeated once per column
+COLUMN_HEADINGS = {'الاسم', 'مسلسل'}
+VOTER_NUMBER = re.compile(r'^[0-9٠-٩]{1,4}$')
+
+
+def glyph_ratios(text: str) -> Tuple[float, float]:
+    """(Arabic letter share, junk glyph share) of the non-space characters"""
+    chars = re.sub(r'\s', '', text)
+    if not chars:
+        return 0.0, 0.0
+    return len(ARABIC_LETTERS.findall(chars)) / len(chars), len(BROKEN_GLYPHS.findall(chars)) / len(chars)
+
+
+def reversed_share(tokens: Iterable[str]) -> Optional[float]:
+    """Share of common name words that appear reversed; None when none appear at all"""
+    forward = backward = 0
+    for token in tokens:
+        if token in COMMON_NAME_WORDS:
+            forward += 1
+        elif token in REVERSED_NAME_WORDS:
+            backward += 1
+    return backward / (forward + backward) if forward + backward else None
+
+
+def voter_rows(words: List[Dict]) -> Tuple[int, int]:
+    """(rows holding a voter number, voter numbers) on one page of words"""
+    from extract_onepage import group_words_by_row, normalize_text
+
+    rows = numbers = 0
+    for row in group_words_by_row(words):
+        row_numbers = sum(bool(VOTER_NUMBER.match(normalize_text(word['text']))) for word in row)
+        rows += row_numbers > 0
+        numbers += row_numbers
+    return rows, numbers
+
+
+def words_to_lines(words: List[Dict]) -> List[str]:
+    """Page lines rebuilt from word coordinates, shaped like the PyPDF2 text layer
+
+    Rows are read right to left; each voter cell becomes a name line followed by
+    its number line, so extract_names_from_line sees one name at a time.
+    """
+    from extract_onepage import group_words_by_row, normalize_arabic_glyphs, normalize_text
+
+    lines = []
+    for row in group_words_by_row(words):
+        tokens = []
+        for word in row:
+            text = normalize_arabic_glyphs(normalize_text(word['text']))
+            if VOTER_NUMBER.match(text) and tokens:
+                lines.extend([' '.join(tokens), text])
+                tokens = []
+            elif text:
+                tokens.append(text)
+        if tokens and not set(tokens) <= COLUMN_HEADINGS:
+            lines.append(' '.join(tokens))
+    return lines
+
+
+def score_text_page(extractor, page: Dict) -> Dict:
+    lines = process_pdf_lines(page)
+    arabic, junk = glyph_ratios(page['text'])
+    names = score_page(extractor, lines)
+    reversed_text = reversed_share(page['text'].split())
+    text_score = (names['valid_ratio'] or 0.0) * (1 - junk) * (1 - (reversed_text or 0.0))
+    footer = extractor.extract_committee_number(lines) is not None
+    return {
+        'text_chars': len(page['text']),
+        'text_arabic_ratio': round(arabic, 3),
+        'text_junk_ratio': round(junk, 3),
+        'text_footer': footer,
+        'text_valid_ratio': names['valid_ratio'],
+        'text_reversed_ratio': None if reversed_text is None else round(reversed_text, 3),
+        'text_score': round(text_score * (1.0 if footer else 0.5), 3),
+    }
+
+
+def folded_words_text(words: List[Dict]) -> str:
+    """Word text as the words route reads it: NULs dropped, presentation forms folded to letters"""
+    from extract_onepage import normalize_arabic_glyphs, normalize_text
+
+    return unicodedata.normalize('NFKC', ' '.join(normalize_arabic_glyphs(normalize_text(word['text']))
+                                                  for word in words))
+
+
+def score_words_page(extractor, page: Dict) -> Dict:
+    """Scored like the text layer, on the lines the words route would hand the extractor"""
+    lines = words_to_lines(page['words'])
+    arabic, junk = glyph_ratios(folded_words_text(page['words']))
+    rows, numbers = voter_rows(page['words'])
+    columns = numbers / rows if rows else 0.0
+    names = score_page(extractor, lines)
+    reversed_words = reversed_share(line_word for line in lines for line_word in line.split())
+    # A handful of candidates (header fragments) says nothing about the voter rows
+    valid = names['valid_ratio'] if names['candidates'] >= MIN_CANDIDATES else 0.0
+    words_score = valid * (1 - junk) * (1 - (reversed_words or 0.0))
+    return {
+        'words': len(page['words']),
+        'words_arabic_ratio': round(arabic, 3),
+        'words_junk_ratio': round(junk, 3),
+        'words_footer': page['footer'] is not None,
+        'voter_rows': rows,
+        'voter_columns': round(columns, 2),
+        'words_candidates': names['candidates'],
+        'words_valid_ratio': names['valid_ratio'],
+        'words_reversed_ratio': None if reversed_words is None else round(reversed_words, 3),
+        'words_score': round(words_score * (1.0 if page['footer'] is not None else 0.5), 3),
+    }
+
+
+def _ratio(value) -> float:
+    """Valid-name ratio from a manifest row; None / NaN (no candidates) count as 0"""
+    return 0.0 if value is None or pd.isna(value) else float(value)
+
+
+def route_page(scores: Dict, min_score: float = MIN_ROUTE_SCORE) -> str:
+    """Cheapest strategy whose score passes: text, then words, then OCR
+
+    words is only chosen when its valid-name ratio beats the text layer's.
+    """
+    if scores['text_score'] >= min_score:
+        return 'text'
+    if (scores.get('words_score', 0.0) >= min_score
+            and _ratio(scores.get('words_valid_ratio')) > _ratio(scores.get('text_valid_ratio'))):
+        return 'words'
+    return 'ocr'
+
+
+def triage_pdf(pdf_path: str, use_words: bool = True, workers: int = DEFAULT_WORKERS,
+               cache_dir: Optional[str] = CACHE_DIR, min_score: float = MIN_ROUTE_SCORE) -> pd.DataFrame:
+    """One manifest row per page: quality signals, scores and route"""
+    from extraction_engine import _committee_extractor
+
+    engine = ExtractionEngine(pdf_path, workers=workers, cache_dir=cache_dir)
+    extractor = _committee_extractor()
+    rows = {page['page_num']: {'page_num': page['page_num'], **score_text_page(extractor, page)}
+            for page in engine.pages('pypdf2_text')}
+    if use_words:
+        for page in engine.pages('pdfplumber_words'):
+            rows[page['page_num']].update(score_words_page(extractor, page))
+
+    manifest = pd.DataFrame([rows[page_num] for page_num in sorted(rows)])
+    manifest['route'] = [route_page(row, min_score) for row in manifest.to_dict('records')]
+    return manifest
+
+
+def manifest_path(pdf_path: str, output_dir: str = QUALITY_DIR) -> str:
+    stem = os.path.splitext(os.path.basename(pdf_path))[0].strip().replace(' ', '_')
+    return os.path.join(output_dir, f"{stem}_pages.csv")
+
+
+def load_routes(manifest_file: str) -> Dict[int, str]:
+    manifest = pd.read_csv(manifest_file, usecols=['page_num', 'route'])
+    return dict(zip(manifest['page_num'].astype(int), manifest['route']))
+
+
+def footer_line(page_number: int, committee: int) -> str:
+    """Text-layer footer for a (page number, committee) word footer; the page total is not known (0)"""
+    return f"{page_number} الصحفة رقممن 0رقم اللجنة{committee}"
+
+
+class PageRouter:
+    """Rewrites page lines per the manifest route before EgyptElectionPDFExtractor parses them
+
+    words pages get lines rebuilt from word coordinates, ocr pages go through
+    OcrFallback; both keep the text layer's footer line for committee grouping.
+    A words page whose text layer has no footer gets one from its word footer.
+    """
+
+    def __init__(self, pdf_path: str, routes: Dict[int, str], workers: int = DEFAULT_WORKERS,
+                 cache_dir: Optional[str] = CACHE_DIR, ocr: Optional[OcrFallback] = None):
+        self.pdf_path = pdf_path
+        self.routes = routes
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.ocr = ocr or OcrFallback(pdf_path, workers=workers,
+                                      page_nums=[page for page, route in routes.items() if route == 'ocr'])
+        self.report: Dict = {}
+
+    @classmethod
+    def from_manifest(cls, pdf_path: str, manifest_file: str, **kwargs) -> 'PageRouter':
+        return cls(pdf_path, load_routes(manifest_file), **kwargs)
+
+    def apply(self, extractor, pages: Iterable[Tuple[int, List[str]]]) -> List[Tuple[int, List[str]]]:
+        pages = list(pages)
+        word_pages = {}
+        if any(self.routes.get(page_num) == 'words' for page_num, _ in pages):
+            engine = ExtractionEngine(self.pdf_path, workers=self.workers, cache_dir=self.cache_dir)
+            word_pages = {page['page_num']: page for page in engine.pages('pdfplumber_words')}
+
+        routed = []
+        for page_num, page_lines in pages:
+            if self.routes.get(page_num) == 'words' and page_num in word_pages:
+                footer = [line for line in page_lines if extractor.extract_committee_number([line])]
+                if not footer and word_pages[page_num]['footer'] is not None:
+                    footer = [footer_line(*word_pages[page_num]['footer'])]
+                page_lines = words_to_lines(word_pages[page_num]['words']) + footer
+            routed.append((page_num, page_lines))
+        routed = self.ocr.apply(extractor, routed)
+
+        counts = {route: 0 for route in ROUTES}
+        for page_num, _ in pages:
+            counts[self.routes.get(page_num, 'text')] += 1
+        self.report = {'pdf_file': self.pdf_path, 'routes': counts, 'ocr': self.ocr.report}
+        return routed
+
+    def save_report(self, output_dir: str = QUALITY_DIR) -> str:
+        """Route counts with the OCR stage's report nested under 'ocr', in one file of its own"""
+        os.makedirs(output_dir, exist_ok=True)
+        report_file = manifest_path(self.pdf_path, output_dir).replace('_pages.csv', '_route_report.json')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report, f, ensure_ascii=False, indent=2)
+        return report_file
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Score PDF pages and route each to text, words or OCR")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--text-only', action='store_true', help="Skip the pdfplumber word pass (text or OCR only)")
+    parser.add_argument('--min-score', type=float, default=MIN_ROUTE_SCORE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--no-cache', action='store_true', help="Do not read or write the page cache")
+    parser.add_argument('--output-dir', default=QUALITY_DIR)
+    parser.add_argument('--extract', action='store_true', help="Run the extractor with the page routes")
+    parser.add_argument('--extract-dir', default='output', help="Output directory for --extract")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🩺 PAGE QUALITY TRIAGE")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    cache_dir = None if args.no_cache else CACHE_DIR
+    start = time.perf_counter()
+    manifest = triage_pdf(args.pdf, not args.text_only, args.workers, cache_dir, args.min_score)
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_file = manifest_path(args.pdf, args.output_dir)
+    manifest.to_csv(manifest_file, index=False, encoding='utf-8-sig')
+
+    counts = manifest['route'].value_counts().to_dict()
+    summary = {
+        'pdf_file': args.pdf,
+        'pages': len(manifest),
+        'routes': {route: int(counts.get(route, 0)) for route in ROUTES},
+        'text_footer_pages': int(manifest['text_footer'].sum()),
+        'seconds': round(time.perf_counter() - start, 2),
+        'manifest_file': manifest_file,
+    }
+    with open(manifest_file.replace('_pages.csv', '_summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"📄 {summary['pages']} pages in {summary['seconds']:.1f}s")
+    for route in ROUTES:
+        print(f"   {route:<6} {summary['routes'][route]:>6,} pages")
+    print(f"📁 {manifest_file}")
+
+    if args.extract:
+        from ai_agent_pdf_extractor import EgyptElectionPDFExtractor
+
+        router = PageRouter(args.pdf, load_routes(manifest_file), args.workers, cache_dir)
+        result = EgyptElectionPDFExtractor(args.pdf, args.extract_dir, page_router=router).run_extraction()
+        if result['status'] != 'success':
+            print(f"❌ Extraction failed: {result['error']}")
+            return False
+        print(f"✅ {result['total_locations']:,} locations, {result['total_voters']:,} voters")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Page Template Learning
+Every page of a roll repeats the same header block (انتخابات مجلس النواب, the
+محافظة/مركز/school line, the column headings) and the same footer. A PageTemplate
+learns those static regions once, so that layout code can tell the voter table
+(the body band) from the page furniture around it:
+
+1. sample : text lines of the first N pages (pdfplumber extract_text_lines)
+2. static : lines whose text (digits masked, so page / committee numbers match)
+            recurs at the same position on most sampled pages
+3. bands  : header = top of page to the lowest static line in the upper half,
+            footer = highest static line in the lower half to the bottom,
+            body   = everything in between
+4. lead   : pages that carry a longer committee header (logic.pdf prints it on
+            the committee's first page only) end it at the same column headings,
+            found further down; that band is used for a committee's first page
+
+table_calibration.py clips the sampled words to the body band when a roll has no
+ruled grid. The bands are not an extraction speed-up: pdfplumber parses a page's
+whole content stream before any bbox filter applies, so reading only the body band
+costs the same as reading the page.
+
+Usage:
+    python page_template.py "motobus .pdf"              # learn, print the bands, save
+    python page_template.py logic.pdf --sample-pages 20
+
+    template = load_or_learn(pdf)
+    body = template.bands(page.width, page.height)['body']    # (x0, top, x1, bottom)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TEMPLATE_DIR = os.path.join('output', 'templates')
+# Pages sampled to learn the template
+SAMPLE_PAGES = 10
+# A line is static when it appears on at least this share of the sampled pages ...
+STATIC_SHARE = 0.6
+# ... within this many points of its median position
+POSITION_TOLERANCE = 2.0
+# Points between a static line and a band edge when no body line bounds the gap
+MARGIN = 1.0
+
+# Digit runs (page numbers, committee numbers, years) are masked before comparing lines
+DIGITS = re.compile(r'\d[\d\s]*')
+
+BBox = Tuple[float, float, float, float]
+
+
+def line_key(text: str) -> str:
+    """Line text with digit runs masked, so '1 الصحفة ... ٧٦' and '2 الصحفة ... ٧٧' match"""
+    return DIGITS.sub('#', text.replace('\x00', '')).strip()
+
+
+def sample_lines(page) -> List[Tuple[str, float, float]]:
+    """(key, top, bottom) for every text line of one pdfplumber page"""
+    lines = []
+    for line in page.extract_text_lines(return_chars=False):
+        key = line_key(line['text'])
+        if key:
+            lines.append((key, float(line['top']), float(line['bottom'])))
+    return lines
+
+
+def _gap_middle(static_edge: float, body_edge: Optional[float], offset: float) -> float:
+    """Band edge between a static line and the nearest body line; static_edge + offset without one"""
+    if body_edge is None:
+        return static_edge + offset
+    return (static_edge + body_edge) / 2
+
+
+class PageTemplate:
+    """Header / body / footer bands of a roll's pages, learned from a sample"""
+
+    def __init__(self, width: float, height: float, header_bottom: float, footer_top: float,
+                 lead_header_bottom: Optional[float] = None, static_lines: Optional[List[Dict]] = None,
+                 sample_pages: int = 0, pdf_file: Optional[str] = None):
+        self.width = width
+        self.height = height
+        self.header_bottom = header_bottom
+        self.footer_top = footer_top
+        # Committee first pages with a longer header; None when every page has the same header
+        self.lead_header_bottom = lead_header_bottom
+        self.static_lines = static_lines or []
+        self.sample_pages = sample_pages
+        self.pdf_file = pdf_file
+
+    @classmethod
+    def learn(cls, pdf_path: str, sample_pages: int = SAMPLE_PAGES, static_share: float = STATIC_SHARE,
+              tolerance: float = POSITION_TOLERANCE) -> 'PageTemplate':
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            width, height = float(pdf.pages[0].width), float(pdf.pages[0].height)
+            pages = []
+            for page in pdf.pages[:sample_pages]:
+                pages.append(sample_lines(page))
+                page.flush_cache()
+
+        # First position of every line text on every page
+        positions: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+        for lines in pages:
+            seen = set()
+            for key, top, bottom in lines:
+                if key not in seen:
+                    seen.add(key)
+                    positions[key].append((top, bottom))
+
+        static_lines = []
+        for key, boxes in positions.items():
+            boxes = np.array(boxes)
+            top = float(np.median(boxes[:, 0]))
+            in_place = np.abs(boxes[:, 0] - top) <= tolerance
+            if in_place.sum() >= static_share * len(pages):
+                static_lines.append({'text': key, 'top': round(top, 2),
+                                     'bottom': round(float(np.median(boxes[in_place, 1])), 2),
+                                     'pages': int(in_place.sum())})
+        static_lines.sort(key=lambda line: line['top'])
+
+        header = [line for line in static_lines if line['top'] < height / 2]
+        footer = [line for line in static_lines if line['top'] >= height / 2]
+        static_bottom = max(line['bottom'] for line in header) if header else 0.0
+        static_top = min(line['top'] for line in footer) if footer else height
+
+        # Band edges go in the middle of the gap between the static lines and the body lines
+        body = np.array([(top, bottom) for lines in pages for key, top, bottom in lines
+                         if static_bottom <= top and bottom <= static_top]).reshape(-1, 2)
+        header_bottom = _gap_middle(static_bottom, body[:, 0].min() if len(body) else None, MARGIN) if header else 0.0
+        footer_top = _gap_middle(static_top, body[:, 1].max() if len(body) else None, -MARGIN) if footer else height
+
+        # Lead pages: the static header lines are there, but lower down the page
+        header_tops = {line['text']: line['top'] for line in header}
+        lead_bottoms = []
+        for lines in pages:
+            moved = [bottom for key, top, bottom in lines
+                     if key in header_tops and abs(top - header_tops[key]) > tolerance and bottom < static_top]
+            if moved:
+                below = [top for key, top, bottom in lines if max(moved) <= top < static_top]
+                lead_bottoms.append(_gap_middle(max(moved), min(below) if below else None, MARGIN))
+        lead_header_bottom = round(max(lead_bottoms), 2) if lead_bottoms else None
+
+        return cls(width, height, round(header_bottom, 2), round(footer_top, 2), lead_header_bottom,
+                   static_lines, len(pages), os.path.basename(pdf_path))
+
+    def bands(self, page_width: float, page_height: float, lead: bool = False) -> Dict[str, BBox]:
+        """header / body / footer bboxes for a page of the given size"""
+        header_bottom = self.lead_header_bottom if lead and self.lead_header_bottom else self.header_bottom
+        header_bottom = min(header_bottom, page_height)
+        footer_top = max(min(self.footer_top, page_height), header_bottom)
+        return {
+            'header': (0, 0, page_width, header_bottom),
+            'body': (0, header_bottom, page_width, footer_top),
+            'footer': (0, footer_top, page_width, page_height),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'pdf_file': self.pdf_file,
+            'sample_pages': self.sample_pages,
+            'width': self.width,
+            'height': self.height,
+            'header_bottom': self.header_bottom,
+            'lead_header_bottom': self.lead_header_bottom,
+            'footer_top': self.footer_top,
+            'static_lines': self.static_lines,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PageTemplate':
+        return cls(data['width'], data['height'], data['header_bottom'], data['footer_top'],
+                   data.get('lead_header_bottom'), data.get('static_lines'), data.get('sample_pages', 0),
+                   data.get('pdf_file'))
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'PageTemplate':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def template_path(pdf_path: str, template_dir: str = TEMPLATE_DIR) -> str:
+    """Template file of a PDF, keyed by content digest so an edited PDF is re-learned"""
+    from extraction_engine import file_digest
+    stem = os.path.splitext(os.path.basename(pdf_path))[0].strip().replace(' ', '_')
+    return os.path.join(template_dir, f"{stem}_{file_digest(pdf_path)}.json")
+
+
+def load_or_learn(pdf_path: str, template_dir: Optional[str] = TEMPLATE_DIR,
+                  sample_pages: int = SAMPLE_PAGES) -> PageTemplate:
+    """Saved template of the PDF, learning (and saving) it on first use; template_dir None: no cache"""
+    path = template_path(pdf_path, template_dir) if template_dir else None
+    if path and os.path.exists(path):
+        return PageTemplate.load(path)
+    template = PageTemplate.learn(pdf_path, sample_pages)
+    if path:
+        template.save(path)
+    return template
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Learn the static header/footer regions of a roll PDF")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--sample-pages', type=int, default=SAMPLE_PAGES)
+    parser.add_argument('--output-dir', default=TEMPLATE_DIR)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🧩 PAGE TEMPLATE LEARNING")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    start = time.perf_counter()
+    template = PageTemplate.learn(args.pdf, args.sample_pages)
+    seconds = time.perf_counter() - start
+    print(f"📄 Learned from {template.sample_pages} pages in {seconds:.2f}s: "
+          f"{len(template.static_lines)} static lines")
+    print(f"   header 0-{template.header_bottom:.1f}pt, body {template.header_bottom:.1f}-"
+          f"{template.footer_top:.1f}pt, footer {template.footer_top:.1f}-{template.height:.1f}pt")
+    if template.lead_header_bottom:
+        print(f"   committee first pages: header 0-{template.lead_header_bottom:.1f}pt")
+    for line in template.static_lines:
+        print(f"   {line['top']:7.1f}pt  x{line['pages']}  {line['text'][:60]}")
+
+    print(f"📁 {template.save(template_path(args.pdf, args.output_dir))}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
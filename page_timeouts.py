@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Page Timeouts and Quarantine
+One malformed page can keep page.extract_text() or pdfminer's layout analysis
+busy for minutes, and in the serial loop of
+EgyptElectionPDFExtractor.extract_text_from_pdf every later page waits for it.
+PageGuard reads pages in worker processes that the parent can kill:
+
+- each page read has a wall-clock limit (timeout) and a memory limit (address
+  space growth per worker, RLIMIT_AS; Linux only)
+- a page over either limit has its worker killed and replaced, and is retried
+  with the next, cheaper strategy in FALLBACKS
+- a page that fails every strategy goes into the quarantine manifest
+  (output/quarantine/<pdf>_quarantine.csv) and is read as empty text
+
+Strategies (without --extract the run also counts the pages whose committee footer
+the parser can read, so a strategy that reads pages but loses the footer shows up):
+- chars      : pdfplumber character boxes -> logical-order text (char_line_reassembly.py)
+- pypdf2     : PyPDF2 extract_text
+- text_layer : the native text layer of the fastest installed backend (pdf_backends.py),
+               no layout analysis
+
+Usage:
+    guard = PageGuard(pdf, timeout=30, memory_mb=1024, workers=2)
+    extractor = EgyptElectionPDFExtractor(pdf, page_guard=guard)
+
+    python page_timeouts.py "motobus .pdf" --timeout 30 --memory-mb 1024
+    python page_timeouts.py "motobus .pdf" --extract
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: time limits only
+    resource = None
+
+import pandas as pd
+
+from extraction_engine import PAGES_PER_WORKER, count_pages
+
+QUARANTINE_DIR = os.path.join('output', 'quarantine')
+# Seconds one strategy may spend on one page
+PAGE_TIMEOUT = 60.0
+# Address space a worker may grow by, in MB (4 GB extraction VMs run 2-3 workers)
+PAGE_MEMORY_MB = 1024
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+
+STRATEGIES = ('chars', 'pypdf2', 'text_layer')
+# extraction_engine page sources behind the strategies that have one
+STRATEGY_SOURCES = {'chars': 'pdfplumber_chars', 'pypdf2': 'pypdf2_text'}
+# Cheaper strategies to retry with, in order, after a page fails
+FALLBACKS = {
+    'chars': ('pypdf2', 'text_layer'),
+    'pypdf2': ('text_layer',),
+    'text_layer': (),
+}
+
+
+class _PageReader:
+    """Per-worker open documents, one per strategy, opened on first use
+
+    chars and pypdf2 read pages with the extraction_engine page sources, the same
+    functions the engine's page loop and cache use.
+    """
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        self._open: Dict[str, object] = {}
+
+    def _document(self, strategy: str):
+        if strategy not in self._open:
+            if strategy == 'chars':
+                import pdfplumber
+                self._open[strategy] = pdfplumber.open(self.pdf_path)
+            elif strategy == 'pypdf2':
+                import PyPDF2
+                self._open[strategy] = PyPDF2.PdfReader(self.pdf_path)
+            else:
+                from pdf_backends import open_backend
+                self._open[strategy] = open_backend(self.pdf_path, 'auto')
+        return self._open[strategy]
+
+    def read(self, page_num: int, strategy: str) -> str:
+        document = self._document(strategy)
+        if strategy in STRATEGY_SOURCES:
+            from extraction_engine import PAGE_SOURCES
+            page = document.pages[page_num - 1]
+            try:
+                return PAGE_SOURCES[STRATEGY_SOURCES[strategy]].read(page, page_num)['text']
+            finally:
+                if strategy == 'chars':
+                    page.close()
+        return document.page_text(page_num - 1)
+
+
+def _address_space_bytes() -> Optional[int]:
+    """Current virtual memory size of this process (Linux /proc), None elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def _is_memory_error(error: BaseException) -> bool:
+    """MemoryError, also when a parser re-raised it as its own exception (pdfminer does)"""
+    while error is not None:
+        if isinstance(error, MemoryError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _worker_main(conn, pdf_path: str, memory_mb: Optional[int]):
+    """Read (page_num, strategy) tasks until None; reply (status, text or error)"""
+    current = _address_space_bytes()
+    if memory_mb and resource is not None and current is not None:
+        limit = current + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    reader = _PageReader(pdf_path)
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        page_num, strategy = task
+        try:
+            conn.send(('ok', reader.read(page_num, strategy)))
+        except Exception as e:
+            if _is_memory_error(e):
+                # The heap may be left fragmented at the limit: let the parent start a fresh worker
+                conn.send(('memory', f"over {memory_mb} MB"))
+                break
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, context, pdf_path: str, memory_mb: Optional[int]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, pdf_path, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.pages = 0
+        self.task: Optional[Tuple[int, int]] = None
+        self.started = 0.0
+
+    def send(self, page_num: int, attempt: int, strategy: str):
+        self.task = (page_num, attempt)
+        self.started = time.monotonic()
+        self.pages += 1
+        self.conn.send((page_num, strategy))
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class PageGuard:
+    """Page texts read by killable workers with per-page time / memory limits"""
+
+    def __init__(self, pdf_path: str, timeout: float = PAGE_TIMEOUT, memory_mb: Optional[int] = PAGE_MEMORY_MB,
+                 workers: int = DEFAULT_WORKERS, pages_per_worker: int = PAGES_PER_WORKER):
+        self.pdf_path = pdf_path
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.workers = max(1, workers)
+        self.pages_per_worker = pages_per_worker
+        # page_num -> failed attempts: {'strategy', 'status', 'detail', 'seconds'}
+        self.failures: Dict[int, List[Dict]] = {}
+        self.quarantined: List[int] = []
+        self.report: Dict = {}
+        self.manifest_file: Optional[str] = None
+
+    def read_pages(self, strategy: str = 'pypdf2',
+                   page_nums: Optional[Sequence[int]] = None) -> Iterator[Tuple[int, str]]:
+        """(page_num, text) in page order; quarantined pages give ''"""
+        if strategy not in FALLBACKS:
+            raise ValueError(f"Unknown strategy {strategy!r} (choose from {', '.join(STRATEGIES)})")
+        chain = (strategy,) + FALLBACKS[strategy]
+        page_nums = list(page_nums) if page_nums is not None else list(range(1, count_pages(self.pdf_path) + 1))
+        start = time.perf_counter()
+        self.failures, self.quarantined = {}, []
+
+        context = multiprocessing.get_context()
+        pending = deque((page_num, 0) for page_num in page_nums)
+        idle: List[_Worker] = []
+        busy: Dict[object, _Worker] = {}
+        done: Dict[int, str] = {}
+        next_index = 0
+
+        def fail(page_num: int, attempt: int, status: str, detail: str, seconds: float):
+            self.failures.setdefault(page_num, []).append({
+                'strategy': chain[attempt], 'status': status, 'detail': detail, 'seconds': round(seconds, 2)})
+            if attempt + 1 < len(chain):
+                # Retry ahead of unread pages so the page does not hold back in-order output
+                pending.appendleft((page_num, attempt + 1))
+            else:
+                self.quarantined.append(page_num)
+                done[page_num] = ''
+
+        try:
+            while pending or busy:
+                while pending and len(busy) < self.workers:
+                    worker = idle.pop() if idle else _Worker(context, self.pdf_path, self.memory_mb)
+                    page_num, attempt = pending.popleft()
+                    worker.send(page_num, attempt, chain[attempt])
+                    busy[worker.conn] = worker
+
+                now = time.monotonic()
+                deadline = min(worker.started + self.timeout for worker in busy.values())
+                for conn in wait(list(busy), timeout=max(0.0, deadline - now)):
+                    worker = busy.pop(conn)
+                    page_num, attempt = worker.task
+                    seconds = time.monotonic() - worker.started
+                    try:
+                        status, payload = conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join()
+                        status, payload = 'crash', f"worker exited with code {worker.process.exitcode}"
+                    if status == 'ok':
+                        done[page_num] = payload
+                    else:
+                        fail(page_num, attempt, status, payload, seconds)
+                    if status in ('ok', 'error') and worker.pages < self.pages_per_worker:
+                        idle.append(worker)
+                    else:
+                        worker.stop()
+
+                now = time.monotonic()
+                for conn, worker in list(busy.items()):
+                    if now - worker.started >= self.timeout:
+                        del busy[conn]
+                        worker.kill()
+                        page_num, attempt = worker.task
+                        fail(page_num, attempt, 'timeout', f"over {self.timeout:g}s", now - worker.started)
+
+                while next_index < len(page_nums) and page_nums[next_index] in done:
+                    page_num = page_nums[next_index]
+                    yield page_num, done.pop(page_num)
+                    next_index += 1
+        finally:
+            for worker in idle + list(busy.values()):
+                worker.stop()
+
+        self.quarantined.sort()
+        self.report = {
+            'pdf_file': self.pdf_path,
+            'strategy': strategy,
+            'pages': len(page_nums),
+            'retried': sorted(page for page in self.failures if page not in self.quarantined),
+            'quarantined': self.quarantined,
+            'timeout': self.timeout,
+            'memory_mb': self.memory_mb,
+            'seconds': round(time.perf_counter() - start, 2),
+        }
+
+    def manifest(self) -> pd.DataFrame:
+        """One row per failed attempt; 'quarantined' marks pages no strategy could read"""
+        rows = [{'page_num': page_num, 'quarantined': page_num in self.quarantined, **failure}
+                for page_num, failures in sorted(self.failures.items()) for failure in failures]
+        return pd.DataFrame(rows, columns=['page_num', 'quarantined', 'strategy', 'status', 'detail', 'seconds'])
+
+    def save_manifest(self, output_dir: str = QUARANTINE_DIR) -> str:
+        """Write the quarantine manifest (CSV) and the report (JSON); returns the CSV path"""
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(self.pdf_path))[0].strip().replace(' ', '_')
+        manifest_file = os.path.join(output_dir, f"{stem}_quarantine.csv")
+        self.manifest().to_csv(manifest_file, index=False, encoding='utf-8-sig')
+        with open(manifest_file.replace('_quarantine.csv', '_quarantine.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.report, f, ensure_ascii=False, indent=2)
+        self.manifest_file = manifest_file
+        return manifest_file
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Read PDF pages with per-page time/memory limits and a quarantine")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='pypdf2', help="First strategy per page")
+    parser.add_argument('--timeout', type=float, default=PAGE_TIMEOUT, help="Seconds per page and strategy")
+    parser.add_argument('--memory-mb', type=int, default=PAGE_MEMORY_MB, help="Memory growth per worker (0: no limit)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--output-dir', default=QUARANTINE_DIR)
+    parser.add_argument('--extract', action='store_true', help="Run the extractor through the page guard")
+    parser.add_argument('--extract-dir', default='output', help="Output directory for --extract")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("⏱️  PAGE TIMEOUTS AND QUARANTINE")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    guard = PageGuard(args.pdf, args.timeout, args.memory_mb or None, args.workers)
+    if args.extract:
+        from ai_agent_pdf_extractor import TEXT_SOURCES, EgyptElectionPDFExtractor
+
+        if args.strategy not in TEXT_SOURCES:
+            print(f"❌ --extract reads pages with an extractor text source ({', '.join(TEXT_SOURCES)})")
+            return False
+        result = EgyptElectionPDFExtractor(args.pdf, args.extract_dir, page_guard=guard,
+                                           text_source=args.strategy).run_extraction()
+        if result['status'] != 'success':
+            print(f"❌ Extraction failed: {result['error']}")
+            return False
+        print(f"✅ {result['total_locations']:,} locations, {result['total_voters']:,} voters")
+    else:
+        from ai_agent_pdf_extractor import FOOTER_PATTERN
+
+        # A page can read fine and still be useless to the parser: count the footers it can see
+        characters = footers = 0
+        for _, text in guard.read_pages(args.strategy):
+            characters += len(text)
+            footers += FOOTER_PATTERN.search(text) is not None
+        print(f"📝 {characters:,} characters, committee footer on {footers} of {guard.report['pages']} pages")
+
+    report = guard.report
+    print(f"📄 {report['pages']} pages in {report['seconds']:.1f}s "
+          f"(limits: {report['timeout']:g}s, {report['memory_mb'] or 'no'} MB per worker)")
+    print(f"   🔁 retried with a cheaper strategy: {len(report['retried'])}")
+    print(f"   🚫 quarantined: {len(report['quarantined'])} {report['quarantined'][:20]}")
+    print(f"📁 {guard.save_manifest(args.output_dir)}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+PDF Backends
+One interface over the PDF libraries the extractors use, so a script picks a
+backend by name instead of hard-coding PyPDF2.PdfReader or pdfplumber.open:
+
+- pypdf2     : page text only (no coordinates)
+- pdfplumber : text, words, chars via pdfminer (slow: most of a page's time is layout)
+- pymupdf    : text, words, chars via MuPDF (optional: pip install pymupdf)
+- pypdfium2  : text, words, chars via PDFium (installed with pdfplumber)
+
+Words and chars are dicts with text / x0 / x1 / top / bottom in points from the
+top-left corner, the shape extract_onepage.parse_rows and char_line_reassembly
+read. The native backends build words from character boxes (chars_to_words):
+rows and gaps decide where words end, since PDFium and MuPDF do not list
+characters in content-stream order. Word text follows pdfplumber's text-flow
+words, which keep content-stream order: PDFium chars carry a 'stream' rank (the
+text object they come from), so a word of the rolls, stored in visual order,
+reads exactly as pdfplumber gives it (onepage.pdf: the same 132 (number, name)
+pairs). Chars without a rank (MuPDF) are put in logical order instead, which
+matches pdfplumber only for logically stored PDFs. PDFium folds presentation
+forms to base letters; unmapped glyphs come back as NUL, as from pdfplumber.
+
+Usage:
+    with open_backend(pdf_path, 'auto') as pdf:     # fastest installed backend
+        for index in range(len(pdf)):
+            rows = parse_rows(pdf.page_words(index), page_number, location_number, pdf.page_size(index)[1])
+
+    python pdf_backends.py "motobus .pdf" --pages 20   # per-page latency and word agreement of every backend
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import pymupdf
+except ImportError:  # Optional; older releases only install the 'fitz' module
+    try:
+        import fitz as pymupdf
+    except ImportError:
+        pymupdf = None
+
+try:
+    import pypdfium2
+    import pypdfium2.raw as pdfium_raw
+except ImportError:  # Installed with pdfplumber
+    pypdfium2 = None
+
+BACKENDS = ('pypdf2', 'pdfplumber', 'pymupdf', 'pypdfium2')
+# Tried in this order by open_backend(..., 'auto')
+FAST_BACKENDS = ('pymupdf', 'pypdfium2', 'pdfplumber')
+
+# extraction_engine.WORD_SETTINGS x_tolerance: wider gaps inside a row end a word
+X_TOLERANCE = 1.5
+
+# extract_onepage.extract_footer_numbers reads the bottom 120pt of the page
+FOOTER_HEIGHT = 120
+
+# Glyphs without a Unicode mapping: pdfplumber gives NUL, PDFium U+FFFE, MuPDF U+FFFD
+UNMAPPED = {'\ufffe': '\x00', '\ufffd': '\x00'}
+
+
+def chars_to_words(chars: Sequence[Dict], x_tolerance: float = X_TOLERANCE) -> List[Dict]:
+    """Words from character boxes, independent of the order the PDF stores them in
+
+    Rows come from layout_clustering.row_ids; inside a row characters run right to
+    left and a gap wider than x_tolerance ends the word. Word text is in content-
+    stream order when every character has a 'stream' rank (pdfplumber's text-flow
+    order), otherwise in logical order with digit runs left to right
+    (char_line_reassembly.order_word).
+    """
+    from char_line_reassembly import order_word
+    from layout_clustering import row_ids
+
+    # Blanks are dropped rather than used as breaks: PDFium places zero-width spaces
+    # where they can sort inside a neighbouring word's glyph boxes
+    chars = [char for char in chars if not char['text'].isspace()]
+    if not chars:
+        return []
+    top = np.fromiter((char['top'] for char in chars), float, len(chars))
+    bottom = np.fromiter((char['bottom'] for char in chars), float, len(chars))
+    x1 = np.fromiter((char['x1'] for char in chars), float, len(chars))
+    rows = row_ids(top, bottom)
+    order = np.lexsort((-x1, rows))
+    rows = rows[order]
+
+    words = []
+    word: List[Dict] = []
+    for position, index in enumerate(order.tolist()):
+        char = chars[index]
+        if word and (rows[position] != rows[position - 1] or word[-1]['x0'] - char['x1'] > x_tolerance):
+            words.append(word)
+            word = []
+        word.append(char)
+    if word:
+        words.append(word)
+
+    def word_text(word: List[Dict]) -> str:
+        if all('stream' in char for char in word):
+            return ''.join(char['text'] for char in sorted(word, key=lambda char: char['stream']))
+        return order_word([char['text'] for char in word], drop='')
+
+    return [{'text': word_text(word),
+             'x0': min(char['x0'] for char in word), 'x1': max(char['x1'] for char in word),
+             'top': min(char['top'] for char in word), 'bottom': max(char['bottom'] for char in word)}
+            for word in words]
+
+
+class PdfBackend:
+    """One open PDF; pages are 0-based indexes"""
+
+    name = ''
+
+    def __init__(self, pdf_path: str):
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        self.pdf_path = pdf_path
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        raise NotImplementedError
+
+    def page_text(self, index: int) -> str:
+        raise NotImplementedError
+
+    def page_chars(self, index: int) -> List[Dict]:
+        raise NotImplementedError(f"{self.name} gives no character coordinates")
+
+    def page_words(self, index: int) -> List[Dict]:
+        return chars_to_words(self.page_chars(index))
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'PdfBackend':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PyPDF2Backend(PdfBackend):
+    name = 'pypdf2'
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import PyPDF2
+        self._file = open(pdf_path, 'rb')
+        self.reader = PyPDF2.PdfReader(self._file)
+
+    def __len__(self) -> int:
+        return len(self.reader.pages)
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        box = self.reader.pages[index].mediabox
+        return float(box.width), float(box.height)
+
+    def page_text(self, index: int) -> str:
+        return self.reader.pages[index].extract_text() or ''
+
+    def page_words(self, index: int) -> List[Dict]:
+        raise NotImplementedError("pypdf2 gives no word coordinates")
+
+    def close(self):
+        self._file.close()
+
+
+class PdfplumberBackend(PdfBackend):
+    name = 'pdfplumber'
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import pdfplumber
+        self.pdf = pdfplumber.open(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self.pdf.pages)
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        page = self.pdf.pages[index]
+        return float(page.width), float(page.height)
+
+    def page_text(self, index: int) -> str:
+        page = self.pdf.pages[index]
+        text = page.extract_text() or ''
+        page.flush_cache()
+        return text
+
+    def page_chars(self, index: int) -> List[Dict]:
+        page = self.pdf.pages[index]
+        chars = [{'text': char['text'], 'x0': char['x0'], 'x1': char['x1'], 'top': char['top'],
+                  'bottom': char['bottom']} for char in page.chars]
+        page.flush_cache()
+        return chars
+
+    def page_words(self, index: int) -> List[Dict]:
+        from extraction_engine import WORD_KEYS, WORD_SETTINGS
+        page = self.pdf.pages[index]
+        words = [{key: word[key] for key in WORD_KEYS} for word in page.extract_words(**WORD_SETTINGS)]
+        page.flush_cache()
+        return words
+
+    def close(self):
+        self.pdf.close()
+
+
+class PyMuPDFBackend(PdfBackend):
+    name = 'pymupdf'
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        if pymupdf is None:
+            raise ImportError("pymupdf is not installed (pip install pymupdf)")
+        self.doc = pymupdf.open(pdf_path)
+
+    def __len__(self) -> int:
+        return self.doc.page_count
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        rect = self.doc[index].rect
+        return float(rect.width), float(rect.height)
+
+    def page_text(self, index: int) -> str:
+        return self.doc[index].get_text()
+
+    def page_chars(self, index: int) -> List[Dict]:
+        # rawdict boxes already have a top-left origin
+        chars = []
+        for block in self.doc[index].get_text('rawdict').get('blocks', []):
+            for line in block.get('lines', []):
+                for span in line['spans']:
+                    for char in span['chars']:
+                        x0, top, x1, bottom = char['bbox']
+                        chars.append({'text': UNMAPPED.get(char['c'], char['c']),
+                                      'x0': x0, 'x1': x1, 'top': top, 'bottom': bottom})
+        return chars
+
+    def close(self):
+        self.doc.close()
+
+
+class PdfiumBackend(PdfBackend):
+    name = 'pypdfium2'
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        if pypdfium2 is None:
+            raise ImportError("pypdfium2 is not installed (pip install pypdfium2)")
+        self.doc = pypdfium2.PdfDocument(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self.doc)
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        width, height = self.doc.get_page_size(index)
+        return float(width), float(height)
+
+    def page_text(self, index: int) -> str:
+        page = self.doc[index]
+        textpage = page.get_textpage()
+        text = textpage.get_text_range().replace('\r\n', '\n')
+        textpage.close()
+        page.close()
+        return ''.join(UNMAPPED.get(ch, ch) for ch in text)
+
+    def page_chars(self, index: int) -> List[Dict]:
+        """Chars with 'stream': (text object index, x0), the content-stream order of the glyphs"""
+        page = self.doc[index]
+        height = page.get_height()
+        textpage = page.get_textpage()
+        # PDFium lists characters in its own reading order; the page's objects are in stream order
+        objects = {ctypes.cast(pdfium_raw.FPDFPage_GetObject(page.raw, number), ctypes.c_void_p).value: number
+                   for number in range(pdfium_raw.FPDFPage_CountObjects(page.raw))}
+        chars = []
+        for position in range(textpage.count_chars()):
+            # Spaces and line breaks PDFium inserts itself have no glyph
+            if pdfium_raw.FPDFText_IsGenerated(textpage.raw, position):
+                continue
+            text = chr(pdfium_raw.FPDFText_GetUnicode(textpage.raw, position))
+            # Loose boxes use the font's ascent / descent, like pdfminer's
+            left, bottom, right, top = textpage.get_charbox(position, loose=True)
+            char = {'text': UNMAPPED.get(text, text), 'x0': left, 'x1': right,
+                    'top': height - top, 'bottom': height - bottom}
+            # Glyphs of one text object advance left to right; objects inside form XObjects have no rank
+            text_object = ctypes.cast(pdfium_raw.FPDFText_GetTextObject(textpage.raw, position), ctypes.c_void_p).value
+            if text_object in objects:
+                char['stream'] = (objects[text_object], left)
+            chars.append(char)
+        textpage.close()
+        page.close()
+        return chars
+
+    def close(self):
+        self.doc.close()
+
+
+def footer_numbers(pdf: PdfBackend, index: int, words: List[Dict]) -> Tuple[int, int]:
+    """(page_number, location_number) from a page's words, as extract_onepage.extract_footer_numbers
+
+    Numbers are taken bottom row first, right to left: native backends' glyph
+    boxes do not reproduce the per-font top offsets pdfminer's ordering relies on.
+    Raises ValueError when the footer has no numbers, like extract_footer_numbers.
+    """
+    from extract_onepage import footer_numbers_from_words
+
+    height = pdf.page_size(index)[1]
+    footer_words = [word for word in words if word['top'] >= height - FOOTER_HEIGHT and word['bottom'] <= height]
+    footer_text = ' '.join(word['text'] for word in sorted(footer_words, key=lambda word: (word['top'], -word['x1'])))
+    return footer_numbers_from_words(footer_words, footer_text, rtl_rows=True)
+
+
+BACKEND_CLASSES = {
+    'pypdf2': PyPDF2Backend,
+    'pdfplumber': PdfplumberBackend,
+    'pymupdf': PyMuPDFBackend,
+    'pypdfium2': PdfiumBackend,
+}
+
+
+def available_backends() -> List[str]:
+    available = ['pypdf2', 'pdfplumber']
+    if pymupdf is not None:
+        available.append('pymupdf')
+    if pypdfium2 is not None:
+        available.append('pypdfium2')
+    return [name for name in BACKENDS if name in available]
+
+
+def open_backend(pdf_path: str, name: str = 'auto') -> PdfBackend:
+    """Open a PDF with a named backend; 'auto' picks the fastest installed one with coordinates"""
+    if name == 'auto':
+        name = next(backend for backend in FAST_BACKENDS if backend in available_backends())
+    if name not in BACKEND_CLASSES:
+        raise ValueError(f"Unknown PDF backend {name!r} (choose from auto, {', '.join(BACKENDS)})")
+    return BACKEND_CLASSES[name](pdf_path)
+
+
+def word_texts(pdf: PdfBackend, page_indexes: List[int]) -> Counter:
+    """Word texts of the pages, NFKC folded (PDFium folds presentation forms itself)"""
+    return Counter(unicodedata.normalize('NFKC', word['text']) for index in page_indexes
+                   for word in pdf.page_words(index))
+
+
+def time_backend(pdf_path: str, name: str, page_indexes: List[int],
+                 reference: Optional[Counter] = None) -> Dict:
+    """Milliseconds per page for text, words and chars with one backend
+
+    reference: pdfplumber's word texts; adds the share of them this backend reproduces
+    exactly ('same_words'), so a backend that finds the right words in the wrong letter
+    order shows up, not only its word count.
+    """
+    result = {'backend': name}
+    start = time.perf_counter()
+    with open_backend(pdf_path, name) as pdf:
+        result['open_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        for kind in ('text', 'words', 'chars'):
+            read = getattr(pdf, f'page_{kind}')
+            start = time.perf_counter()
+            try:
+                counts = [len(read(index)) for index in page_indexes]
+            except NotImplementedError:
+                result[f'{kind}_ms'] = None
+                continue
+            result[f'{kind}_ms'] = round((time.perf_counter() - start) * 1000 / len(page_indexes), 1)
+            result[f'{kind}_per_page'] = round(sum(counts) / len(page_indexes))
+        if reference and result.get('words_ms') is not None:
+            result['same_words'] = round(sum((word_texts(pdf, page_indexes) & reference).values())
+                                         / sum(reference.values()), 3)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Per-page latency of every installed PDF backend")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--pages', type=int, default=20, help="Pages to read (from the start)")
+    parser.add_argument('--backends', help="Comma separated backends (default: all installed)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("📚 PDF BACKENDS")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    backends = args.backends.split(',') if args.backends else available_backends()
+    missing = [name for name in BACKENDS if name not in available_backends()]
+    if missing:
+        print(f"⚠️  Not installed: {', '.join(missing)}")
+
+    with open_backend(args.pdf, 'pypdf2') as pdf:
+        page_indexes = list(range(min(args.pages, len(pdf))))
+    print(f"📄 {len(page_indexes)} pages of {args.pdf}")
+    with open_backend(args.pdf, 'pdfplumber') as pdf:
+        reference = word_texts(pdf, page_indexes)
+    print(f"{'backend':<12}{'open ms':>9}{'text ms':>9}{'words ms':>10}{'chars ms':>10}{'words/page':>12}"
+          f"{'same words':>12}")
+    for name in backends:
+        result = time_backend(args.pdf, name, page_indexes, reference)
+        cells = [f"{result[key]:.1f}" if result.get(key) is not None else '-'
+                 for key in ('open_ms', 'text_ms', 'words_ms', 'chars_ms')]
+        print(f"{name:<12}{cells[0]:>9}{cells[1]:>9}{cells[2]:>10}{cells[3]:>10}"
+              f"{result.get('words_per_page', '-'):>12}{result.get('same_words', '-'):>12}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+PDF Page Streaming
+Memory-bounded page loop for pdfplumber. `for page in pdf.pages` inside one
+pdfplumber.open keeps every visited page's parsed layout (chars, words, table
+edges) cached on its Page object, and pdfminer keeps every resolved PDF object
+on the document, so RSS grows with the page count and a full 1,000-page roll
+gets a 4 GB extraction VM OOM-killed. This module:
+
+- closes each page (layout cache and text map) as soon as the caller moves on
+- reopens the PDF every PAGES_PER_OPEN pages, dropping pdfminer's object cache
+- with workers > 1, reads pages in worker processes that are replaced after
+  PAGES_PER_WORKER pages, so a leak in one worker cannot outlive its budget
+  (map_pages runs on extraction_engine.iter_pages, which opens pages with PageStream)
+- reports peak RSS of this process and of its workers
+
+Workers default to the PDF_WORKERS environment variable (1: read in-process).
+
+Usage:
+    for page_num, page in PageStream('108.pdf'):
+        text = page.extract_text()
+
+    for page_num, text in map_pages('108.pdf', page_text):
+        ...
+    print_memory_report()
+
+    python pdf_page_streaming.py 108.pdf --compare     # peak RSS: plain loop vs streamed
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: worker peaks are not available
+    resource = None
+
+import pdfplumber
+
+from extraction_engine import PAGES_PER_TASK, PAGES_PER_WORKER, PageSource, count_pages, iter_pages
+from pipeline_metrics import peak_rss_mb
+
+# Reopen the PDF after this many pages; pdfminer's object cache goes with it
+PAGES_PER_OPEN = 50
+DEFAULT_WORKERS = int(os.getenv('PDF_WORKERS', '1'))
+
+
+def page_count(pdf_path: str) -> int:
+    """Number of pages, without building pdfplumber Page objects"""
+    return count_pages(pdf_path)
+
+
+def page_text(page) -> str:
+    """Page function: extract_text ('' for pages without text)"""
+    return page.extract_text() or ''
+
+
+def page_tables(page) -> List[List[List[Optional[str]]]]:
+    """Page function: extract_tables"""
+    return page.extract_tables()
+
+
+class PageStream:
+    """(page_num, page) for the pages of one PDF, each page closed once the loop moves on
+
+    Pages must not be kept past their iteration step: the PDF they belong to is
+    closed when the stream reopens it.
+    """
+
+    def __init__(self, pdf_path: str, page_numbers: Optional[Sequence[int]] = None,
+                 pages_per_open: int = PAGES_PER_OPEN):
+        self.pdf_path = pdf_path
+        self.page_numbers = list(page_numbers) if page_numbers is not None else None
+        self.pages_per_open = pages_per_open
+        self.opens = 0
+
+    def __len__(self) -> int:
+        if self.page_numbers is None:
+            self.page_numbers = list(range(1, page_count(self.pdf_path) + 1))
+        return len(self.page_numbers)
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        numbers = self.page_numbers or list(range(1, len(self) + 1))
+        for start in range(0, len(numbers), self.pages_per_open):
+            window = numbers[start:start + self.pages_per_open]
+            with pdfplumber.open(self.pdf_path, pages=window) as pdf:
+                self.opens += 1
+                for page in pdf.pages:
+                    try:
+                        yield page.page_number, page
+                    finally:
+                        page.close()
+
+
+def _page_result(func: Callable, page, page_num: int) -> Tuple[int, Any]:
+    return page_num, func(page)
+
+
+def map_pages(pdf_path: str, func: Callable, workers: int = DEFAULT_WORKERS,
+              pages_per_task: int = PAGES_PER_TASK, pages_per_worker: int = PAGES_PER_WORKER) -> Iterator[Tuple[int, Any]]:
+    """(page_num, func(page)) for every page, in document order
+
+    Runs on extraction_engine.iter_pages, the engine's page loop. func must be a
+    module-level function (workers pickle it) and should return plain data rather
+    than pdfplumber objects.
+    """
+    source = PageSource('pdfplumber', partial(_page_result, func))
+    yield from iter_pages(pdf_path, source, workers, pages_per_task=pages_per_task, pages_per_worker=pages_per_worker)
+
+
+def worker_peak_rss_mb() -> Optional[float]:
+    """Largest peak RSS of any finished worker process, in MB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if not peak:
+        return None
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def memory_report() -> Dict[str, Optional[float]]:
+    return {'peak_rss_mb': peak_rss_mb(), 'worker_peak_rss_mb': worker_peak_rss_mb()}
+
+
+def print_memory_report():
+    report = memory_report()
+    line = f"🧠 Peak RSS: {report['peak_rss_mb']} MB"
+    if report['worker_peak_rss_mb'] is not None:
+        line += f" (largest worker {report['worker_peak_rss_mb']} MB)"
+    print(line)
+
+
+def _plain_loop(pdf_path: str) -> int:
+    """The loop the extract_108_* scripts used: every page stays cached until the PDF closes"""
+    pages = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page.extract_text()
+            page.extract_tables()
+            pages += 1
+    return pages
+
+
+def _streamed_loop(pdf_path: str, workers: int) -> int:
+    pages = 0
+    for _ in map_pages(pdf_path, _text_and_tables, workers=workers):
+        pages += 1
+    return pages
+
+
+def _text_and_tables(page) -> int:
+    page.extract_text()
+    page.extract_tables()
+    return 0
+
+
+def _measure(pdf_path: str, mode: str, workers: int) -> Dict:
+    """Run one loop in a fresh interpreter so peak RSS figures do not mix"""
+    code = (f"import json, time, pdf_page_streaming as s; start = time.perf_counter(); "
+            f"pages = s._plain_loop({pdf_path!r}) if {mode!r} == 'plain' else s._streamed_loop({pdf_path!r}, {workers}); "
+            f"print(json.dumps(dict(s.memory_report(), pages=pages, seconds=time.perf_counter() - start)))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Stream a PDF's pages with bounded memory")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--compare', action='store_true', help="Also run the plain pdf.pages loop")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🌊 PDF PAGE STREAMING")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    modes = (['plain'] if args.compare else []) + ['streamed']
+    for mode in modes:
+        result = _measure(args.pdf, mode, args.workers)
+        label = mode if mode == 'plain' else f"streamed ({args.workers} worker{'s' if args.workers != 1 else ''})"
+        line = (f"📄 {label:<22} {result['pages']} pages in {result['seconds']:.1f}s, "
+                f"peak RSS {result['peak_rss_mb']} MB")
+        if result['worker_peak_rss_mb'] is not None:
+            line += f", largest worker {result['worker_peak_rss_mb']} MB"
+        print(line)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
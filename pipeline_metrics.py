@@ -0,0 +1,229 @@
+"""
+Stage-level timing and throughput metrics for the extraction/transfer pipeline
+Records wall time, CPU time, peak RSS, pages/sec, rows/sec and HTTP round trips
+per stage and writes them as a machine-readable run report (output/run_report.json)
+so runs can be compared between commits and PDF releases.
+
+Usage:
+    from pipeline_metrics import metrics
+
+    @metrics.timed('process_pdf', rows=lambda result: len(result[1]))
+    def process_pdf(self): ...
+
+    with metrics.stage('transfer_voters') as stage:
+        ...
+        stage.rows = len(records)
+
+    metrics.record(pages=total_pages)   # attach counts to the innermost running stage
+    metrics.count_http()                # one Supabase/PostgREST request
+"""
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: fall back to psutil below
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # Optional: only needed for memory figures on Windows
+    psutil = None
+
+RUN_REPORT_FILE = 'run_report.json'
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB (None if unavailable)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1)
+    return None
+
+
+def git_revision() -> Optional[str]:
+    """Short commit hash of the working tree, if this is a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class StageRecord:
+    """Measurements for one run of one stage"""
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+        self.thread = threading.current_thread().name
+        self.pages: Optional[int] = None
+        self.rows: Optional[int] = None
+        self.http_requests = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rss_start_mb = peak_rss_mb()
+        self.rss_peak_mb: Optional[float] = None
+        self.status = 'running'
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+
+    def finish(self, status: str):
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        # Per-thread CPU so the uploader and the parser do not count each other's work
+        self.cpu_seconds = time.thread_time() - self._cpu_start
+        self.rss_peak_mb = peak_rss_mb()
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            'stage': self.name,
+            'depth': self.depth,
+            'thread': self.thread,
+            'status': self.status,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'rss_peak_mb': self.rss_peak_mb,
+            'rss_growth_mb': (round(self.rss_peak_mb - self.rss_start_mb, 1)
+                              if self.rss_peak_mb is not None and self.rss_start_mb is not None else None),
+            'http_requests': self.http_requests,
+        }
+        for unit in ('pages', 'rows'):
+            count = getattr(self, unit)
+            if count is not None:
+                result[unit] = count
+                result[f'{unit}_per_sec'] = round(count / self.wall_seconds, 1) if self.wall_seconds > 0 else None
+        return result
+
+
+class PipelineMetrics:
+    """Collects StageRecords for one run; safe to use from the uploader thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stages: List[StageRecord] = []
+        self.started_at = datetime.now()
+
+    def reset(self):
+        with self._lock:
+            self.stages = []
+            self.started_at = datetime.now()
+
+    def _stack(self) -> List[StageRecord]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageRecord]:
+        """Measure the enclosed block as one stage; nested stages record their depth"""
+        stack = self._stack()
+        record = StageRecord(name, len(stack))
+        with self._lock:
+            self.stages.append(record)
+        stack.append(record)
+        status = 'error'
+        try:
+            yield record
+            status = 'ok'
+        finally:
+            stack.pop()
+            record.finish(status)
+
+    def timed(self, name: str, rows: Optional[Callable[[Any], int]] = None):
+        """Decorator form of stage(); rows(result) sets the row count from the return value"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name) as record:
+                    result = func(*args, **kwargs)
+                    if rows is not None and record.rows is None:
+                        try:
+                            record.rows = rows(result)
+                        except (TypeError, KeyError, IndexError):
+                            pass
+                    return result
+            return wrapper
+        return decorator
+
+    def record(self, pages: Optional[int] = None, rows: Optional[int] = None):
+        """Set page/row counts on the innermost running stage of this thread"""
+        stack = self._stack()
+        if not stack:
+            return
+        if pages is not None:
+            stack[-1].pages = pages
+        if rows is not None:
+            stack[-1].rows = rows
+
+    def count_http(self, requests: int = 1):
+        """Count HTTP round trips on every running stage of this thread"""
+        for record in self._stack():
+            record.http_requests += requests
+
+    def report(self, **extra) -> Dict[str, Any]:
+        with self._lock:
+            stages = [record.to_dict() for record in self.stages]
+        # Worker-thread stages overlap the main thread, so only main-thread stages add up to the run
+        top_level = [stage for stage in stages if stage['depth'] == 0 and stage['thread'] == 'MainThread']
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'started_at': self.started_at.isoformat(),
+            'git_commit': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            **extra,
+            'totals': {
+                'wall_seconds': round(sum(s['wall_seconds'] for s in top_level), 4),
+                'cpu_seconds': round(sum(s['cpu_seconds'] for s in top_level), 4),
+                'http_requests': sum(s['http_requests'] for s in stages if s['depth'] == 0),
+                'rss_peak_mb': peak_rss_mb(),
+            },
+            'stages': stages,
+        }
+
+    def write_report(self, output_dir: str = 'output', **extra) -> str:
+        """Write the run report JSON next to the markdown reports"""
+        os.makedirs(output_dir, exist_ok=True)
+        report_file = os.path.join(output_dir, RUN_REPORT_FILE)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(**extra), f, ensure_ascii=False, indent=2)
+        return report_file
+
+    def summary_lines(self) -> List[str]:
+        """One line per stage for the log / markdown report"""
+        lines = []
+        for stage in self.report()['stages']:
+            line = f"{'  ' * stage['depth']}{stage['stage']}"
+            if stage['thread'] != 'MainThread':
+                line += f" [{stage['thread']} thread]"
+            line += f": {stage['wall_seconds']:.2f}s wall, {stage['cpu_seconds']:.2f}s CPU"
+            if 'pages_per_sec' in stage and stage['pages_per_sec'] is not None:
+                line += f", {stage['pages_per_sec']:,} pages/s"
+            if 'rows_per_sec' in stage and stage['rows_per_sec'] is not None:
+                line += f", {stage['rows_per_sec']:,} rows/s"
+            if stage['http_requests']:
+                line += f", {stage['http_requests']} HTTP requests"
+            if stage['rss_peak_mb'] is not None:
+                line += f", peak RSS {stage['rss_peak_mb']} MB"
+            lines.append(line)
+        return lines
+
+
+# Shared collector for one process run
+metrics = PipelineMetrics()
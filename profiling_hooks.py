@@ -0,0 +1,188 @@
+"""
+Profiling hooks for the extraction and upload scripts
+Adds a --profile switch to a script's main() without editing code per investigation:
+
+- CPU: pyinstrument (sampling) when installed, otherwise cProfile. Per-function
+  stats go to output/profiles/<script>_<timestamp>.*, with a summary of the
+  hot spots we keep asking about (PyPDF2 extract_text, regex, DataFrame.iterrows).
+- Memory: memory_snapshot('label') blocks record tracemalloc current/peak and the top
+  allocation sites while profiling; they cost nothing on a normal run.
+
+Usage:
+    from profiling_hooks import memory_snapshot, run_main
+
+    with memory_snapshot('process_pdf'):
+        locations, voters = self.process_pdf()
+
+    if __name__ == "__main__":
+        success = run_main(main)          # python script.py --profile
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import pyinstrument
+except ImportError:  # Optional: cProfile is always available
+    pyinstrument = None
+
+PROFILE_FLAG = '--profile'
+PROFILE_DIR = os.path.join('output', 'profiles')
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 10
+
+# Hot spots summarised from cProfile stats: label -> match(filename, function name)
+FOCUS_FUNCTIONS: Dict[str, Callable[[str, str], bool]] = {
+    'PyPDF2 extract_text': lambda filename, name: 'PyPDF2' in filename and name == 'extract_text',
+    'regex (re module)': lambda filename, name: ("re.Pattern" in name
+                                                 or filename.endswith(os.path.join('re', '__init__.py'))),
+    'DataFrame.iterrows': lambda filename, name: name == 'iterrows',
+    'pandas read_csv': lambda filename, name: name == 'read_csv',
+    'pandas DataFrame init': lambda filename, name: 'pandas' in filename and 'frame' in filename
+                                                    and name == '__init__',
+}
+
+# Set by run_main(); memory_snapshot() is a no-op unless profiling
+enabled = False
+_memory_records: List[Dict[str, Any]] = []
+
+
+def profile_requested(argv: Optional[List[str]] = None) -> bool:
+    return PROFILE_FLAG in (sys.argv if argv is None else argv)
+
+
+@contextmanager
+def memory_snapshot(label: str) -> Iterator[None]:
+    """Record tracemalloc growth and top allocation sites for the enclosed block"""
+    if not enabled:
+        yield
+        return
+
+    before = tracemalloc.take_snapshot()
+    current_before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_after, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        top = after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]
+        _memory_records.append({
+            'label': label,
+            'seconds': round(time.perf_counter() - start, 3),
+            'retained_mb': round((current_after - current_before) / (1024 * 1024), 2),
+            'peak_mb': round(peak / (1024 * 1024), 2),
+            'top_allocations': [
+                {'site': str(stat.traceback[0]), 'size_diff_kb': round(stat.size_diff / 1024, 1),
+                 'count_diff': stat.count_diff}
+                for stat in top
+            ],
+        })
+
+
+def focus_summary(stats: pstats.Stats) -> Dict[str, Dict[str, float]]:
+    """Total time in the FOCUS_FUNCTIONS, from cProfile stats"""
+    summary = {label: {'calls': 0, 'own_seconds': 0.0, 'cumulative_seconds': 0.0} for label in FOCUS_FUNCTIONS}
+    for (filename, _, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        for label, match in FOCUS_FUNCTIONS.items():
+            if match(filename, name):
+                summary[label]['calls'] += calls
+                summary[label]['own_seconds'] += own
+                summary[label]['cumulative_seconds'] += cumulative
+    return {label: {key: round(value, 4) for key, value in values.items()}
+            for label, values in summary.items()}
+
+
+def _write_cprofile(profiler: cProfile.Profile, prefix: str) -> Dict[str, Any]:
+    profiler.dump_stats(f"{prefix}.prof")
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    stats.sort_stats('tottime').print_stats(TOP_FUNCTIONS)
+    with open(f"{prefix}_stats.txt", 'w', encoding='utf-8') as f:
+        f.write(text.getvalue())
+    # strip_dirs() dropped the package paths the focus matchers look at
+    return {'profiler': 'cProfile', 'stats_file': f"{prefix}.prof", 'text_file': f"{prefix}_stats.txt",
+            'focus': focus_summary(pstats.Stats(f"{prefix}.prof"))}
+
+
+def run_profiled(func: Callable, *args, name: Optional[str] = None, output_dir: str = PROFILE_DIR,
+                 **kwargs) -> Any:
+    """Run func under the CPU profiler and tracemalloc, then write the profile files"""
+    global enabled
+    name = name or getattr(func, '__module__', 'run')
+    if name == '__main__':
+        name = os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'run'
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    enabled = True
+    _memory_records.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    if pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if pyinstrument is not None:
+            profiler.stop()
+            with open(f"{prefix}_profile.txt", 'w', encoding='utf-8') as f:
+                f.write(profiler.output_text(unicode=True, color=False))
+            with open(f"{prefix}_profile.html", 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            cpu = {'profiler': 'pyinstrument', 'text_file': f"{prefix}_profile.txt",
+                   'html_file': f"{prefix}_profile.html"}
+        else:
+            profiler.disable()
+            cpu = _write_cprofile(profiler, prefix)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        enabled = False
+
+        summary = {
+            'script': name,
+            'argv': sys.argv[1:],
+            'wall_seconds': round(time.perf_counter() - start, 3),
+            'tracemalloc_peak_mb': round(traced_peak / (1024 * 1024), 2),
+            **cpu,
+            'memory_snapshots': list(_memory_records),
+        }
+        with open(f"{prefix}_summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print_summary(summary, f"{prefix}_summary.json")
+
+
+def print_summary(summary: Dict[str, Any], summary_file: str):
+    print("\n" + "=" * 70)
+    print(f"🔬 PROFILE ({summary['profiler']}): {summary['wall_seconds']:.2f}s wall, "
+          f"tracemalloc peak {summary['tracemalloc_peak_mb']} MB")
+    for label, values in summary.get('focus', {}).items():
+        if values['calls']:
+            print(f"   {label:<24} {values['cumulative_seconds']:>8.3f}s cumulative "
+                  f"({values['own_seconds']:.3f}s own, {values['calls']:,} calls)")
+    for record in summary['memory_snapshots']:
+        print(f"   🧠 {record['label']:<21} retained {record['retained_mb']} MB, peak {record['peak_mb']} MB")
+    print(f"📁 {summary_file}")
+    print("=" * 70)
+
+
+def run_main(main: Callable[[], Any], name: Optional[str] = None) -> Any:
+    """Call a script's main(), under the profiler when --profile is on the command line"""
+    if not profile_requested():
+        return main()
+    sys.argv = [arg for arg in sys.argv if arg != PROFILE_FLAG]
+    return run_profiled(main, name=name)
@@ -5,11 +5,12 @@ Re-extracts location data with proper column separation and type handling
 """
 
 import pandas as pd
-import json
 import re
 import os
 from datetime import datetime
 
+from voter_roll_io import iter_records
+
 def safe_int(value, default=0):
     """Safely convert value to integer"""
     try:
@@ -33,18 +34,15 @@ def re_extract_locations():
         print(f"❌ Voter data file not found: {voter_data_file}")
         return False
     
-    print("📖 Loading original voter data...")
+    print("📖 Reading locations from original voter data...")
     try:
-        with open(voter_data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if 'locations' not in data:
-            print("❌ No 'locations' key found in data")
-            return False
-        
-        locations_data = data['locations']
+        # Only the locations stream is read; the voters are never loaded
+        locations_data = list(iter_records(voter_data_file, 'locations'))
         print(f"📍 Found {len(locations_data)} location records in original data")
         
+    except KeyError:
+        print("❌ No 'locations' stream found in data")
+        return False
     except Exception as e:
         print(f"❌ Error loading voter data: {e}")
         return False
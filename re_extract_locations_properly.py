@@ -9,11 +9,12 @@ Re-extracts location data with proper column separation:
 """
 
 import pandas as pd
-import json
 import re
 import os
 from datetime import datetime
 
+from voter_roll_io import iter_records
+
 def re_extract_locations():
     """Re-extract locations with proper column separation"""
     
@@ -28,21 +29,10 @@ def re_extract_locations():
         print(f"❌ Voter data file not found: {voter_data_file}")
         return False
     
-    print("📖 Loading original voter data...")
-    try:
-        with open(voter_data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if 'locations' not in data:
-            print("❌ No 'locations' key found in data")
-            return False
-        
-        locations_data = data['locations']
-        print(f"📍 Found {len(locations_data)} location records in original data")
-        
-    except Exception as e:
-        print(f"❌ Error loading voter data: {e}")
-        return False
+    print("📖 Reading locations from original voter data...")
+    # Only the locations stream is read, one record at a time; the voters are never loaded
+    locations_data = iter_records(voter_data_file, 'locations')
+    location_records = 0
     
     # Process each location to extract proper fields
     print("\n🔍 Processing locations to extract proper fields...")
@@ -50,82 +40,88 @@ def re_extract_locations():
     processed_locations = []
     location_names_found = set()
     
-    for i, location in enumerate(locations_data):
-        try:
-            # Extract basic info
-            location_id = location.get('location_id', i + 1)
-            raw_name = location.get('location_name', '').strip()
-            raw_address = location.get('location_address', '').strip()
-            total_voters = location.get('total_voters', 0)
+    try:
+        for i, location in enumerate(locations_data):
+            location_records += 1
+            try:
+                # Extract basic info
+                location_id = location.get('location_id', i + 1)
+                raw_name = location.get('location_name', '').strip()
+                raw_address = location.get('location_address', '').strip()
+                total_voters = location.get('total_voters', 0)
             
-            # Skip empty records
-            if not raw_name and not raw_address:
-                continue
+                # Skip empty records
+                if not raw_name and not raw_address:
+                    continue
             
-            # Try to extract location number from various sources
-            location_number = None
+                # Try to extract location number from various sources
+                location_number = None
             
-            # Method 1: Look for number in the raw data
-            if 'location_number' in location and location['location_number']:
-                location_number = location['location_number']
+                # Method 1: Look for number in the raw data
+                if 'location_number' in location and location['location_number']:
+                    location_number = location['location_number']
             
-            # Method 2: Extract from committee info or other fields
-            if not location_number:
-                # Look for numbers in committee_id or other fields
-                for field in ['main_committee_id', 'committee_id', 'page_number']:
-                    if field in location and location[field]:
-                        try:
-                            location_number = int(location[field])
-                            break
-                        except:
-                            pass
+                # Method 2: Extract from committee info or other fields
+                if not location_number:
+                    # Look for numbers in committee_id or other fields
+                    for field in ['main_committee_id', 'committee_id', 'page_number']:
+                        if field in location and location[field]:
+                            try:
+                                location_number = int(location[field])
+                                break
+                            except:
+                                pass
             
-            # Method 3: Use location_id as fallback
-            if not location_number:
-                location_number = location_id
+                # Method 3: Use location_id as fallback
+                if not location_number:
+                    location_number = location_id
             
-            # Clean and separate location name and address
-            location_name = raw_name if raw_name else "غير محدد"
-            location_address = raw_address if raw_address else "غير محدد"
+                # Clean and separate location name and address
+                location_name = raw_name if raw_name else "غير محدد"
+                location_address = raw_address if raw_address else "غير محدد"
             
-            # If we have a combined field, try to separate
-            if raw_name and not raw_address:
-                # Sometimes name and address are combined
-                parts = raw_name.split('،')
-                if len(parts) > 1:
-                    location_name = parts[0].strip()
-                    location_address = '،'.join(parts[1:]).strip()
+                # If we have a combined field, try to separate
+                if raw_name and not raw_address:
+                    # Sometimes name and address are combined
+                    parts = raw_name.split('،')
+                    if len(parts) > 1:
+                        location_name = parts[0].strip()
+                        location_address = '،'.join(parts[1:]).strip()
             
-            # Standard fields
-            governorate = location.get('governorate', 'كفر الشيخ')
-            district = location.get('district', 'مطوبس')
+                # Standard fields
+                governorate = location.get('governorate', 'كفر الشيخ')
+                district = location.get('district', 'مطوبس')
             
-            # Create processed location record
-            processed_location = {
-                'location_id': location_id,
-                'location_number': location_number,
-                'location_name': location_name,
-                'location_address': location_address,
-                'governorate': governorate,
-                'district': district,
-                'main_committee_id': location.get('main_committee_id'),
-                'police_department': location.get('police_department'),
-                'total_voters': total_voters
-            }
+                # Create processed location record
+                processed_location = {
+                    'location_id': location_id,
+                    'location_number': location_number,
+                    'location_name': location_name,
+                    'location_address': location_address,
+                    'governorate': governorate,
+                    'district': district,
+                    'main_committee_id': location.get('main_committee_id'),
+                    'police_department': location.get('police_department'),
+                    'total_voters': total_voters
+                }
             
-            # Only add if we have a meaningful location name
-            if location_name and location_name != "غير محدد" and location_name not in location_names_found:
-                processed_locations.append(processed_location)
-                location_names_found.add(location_name)
+                # Only add if we have a meaningful location name
+                if location_name and location_name != "غير محدد" and location_name not in location_names_found:
+                    processed_locations.append(processed_location)
+                    location_names_found.add(location_name)
                 
-                # Show progress for first few
-                if len(processed_locations) <= 10:
-                    print(f"   ✅ {location_number:3d}: {location_name[:50]}")
+                    # Show progress for first few
+                    if len(processed_locations) <= 10:
+                        print(f"   ✅ {location_number:3d}: {location_name[:50]}")
             
-        except Exception as e:
-            print(f"   ⚠️ Error processing location {i}: {e}")
-            continue
+            except Exception as e:
+                print(f"   ⚠️ Error processing location {i}: {e}")
+                continue
+    except Exception as e:
+        print(f"❌ Error loading voter data: {e}")
+        return False
     
+    print(f"📍 Read {location_records} location records in original data")
     print(f"\n📊 Processed {len(processed_locations)} unique locations")
     
     # Create DataFrame and save
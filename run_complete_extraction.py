@@ -2,28 +2,104 @@
 """
 Complete Egypt 2025 Election Data Extraction Pipeline
 Orchestrates the entire process from PDF extraction to database transfer
+
+By default the PDF is extracted in full and then transferred. Run with --streaming
+to overlap the two: each committee is handed to an uploader thread through a
+bounded queue as soon as it is parsed, so wall time approaches
+max(extract, upload) instead of their sum. When the database is slower than the
+parser the queue fills and the parser waits, keeping memory flat. Streaming mode
+validates the finished voters_table.csv but writes no voters Excel or
+raw_pdf_text.txt.
+
+In streaming mode the database tables are only cleared once the first committee
+has been parsed, so a PDF that fails to open or parse leaves the loaded data in
+place. voters_table.csv is written committee by committee (VoterCsvStream)
+instead of being built from a list of every voter at the end.
 """
 
+import csv
 import os
 import sys
 import json
+import queue
+import threading
+import time
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional
 import logging
 
+import pandas as pd
+
 # Import our custom modules
-from ai_agent_pdf_extractor import EgyptElectionPDFExtractor
-from database_transfer_agent import DatabaseTransferAgent, load_supabase_config
+from ai_agent_pdf_extractor import VOTER_COLUMNS, EgyptElectionPDFExtractor
+from database_transfer_agent import (DatabaseTransferAgent, load_supabase_config,
+                                     prepare_location_record, prepare_voter_record)
+from pipeline_metrics import metrics
+from profiling_hooks import run_main
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+INT_VOTER_COLUMNS = ('voter_id', 'location_id', 'voter_sequence_number', 'source_page')
+
+
+class VoterCsvStream:
+    """voters_table.csv written one committee at a time
+
+    Applies save_to_csv's (full_name, location_id) de-duplication as rows arrive.
+    Voters come from iter_committees in voter_id order, so no sort is needed. Once
+    closed, len() and iteration read the file back as voter dicts (summary report,
+    JSON export) without holding the roll in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._names: Dict[int, set] = {}
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(VOTER_COLUMNS)
+
+    def write(self, voters: List[Dict]) -> List[Dict]:
+        """Write a committee's voters; returns the ones that were not duplicates"""
+        kept = []
+        for voter in voters:
+            seen_names = self._names.setdefault(voter['location_id'], set())
+            if voter['full_name'] in seen_names:
+                continue
+            seen_names.add(voter['full_name'])
+            self._writer.writerow([voter.get(column) for column in VOTER_COLUMNS])
+            kept.append(voter)
+        self.rows += len(kept)
+        return kept
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        self._names = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.path, 'r', newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                for column in INT_VOTER_COLUMNS:
+                    row[column] = int(row[column]) if row[column] else None
+                yield row
+
+
 class ElectionDataPipeline:
     """Complete pipeline for Egypt 2025 election data extraction and transfer"""
     
-    def __init__(self, pdf_file: str = "motobus .pdf", output_dir: str = "output"):
+    def __init__(self, pdf_file: str = "motobus .pdf", output_dir: str = "output",
+                 streaming: bool = False, queue_size: int = 8):
         self.pdf_file = pdf_file
         self.output_dir = output_dir
+        self.streaming = streaming
+        # Committees waiting for upload; bounds memory when the database is the bottleneck
+        self.queue_size = queue_size
         self.results = {}
         
         # Ensure output directory exists
@@ -51,13 +127,14 @@ class ElectionDataPipeline:
         
         # Check Supabase configuration
         config = load_supabase_config()
-        if not config.get('url') or not config.get('key'):
+        if not config.get('db_url') and (not config.get('url') or not config.get('key')):
             logger.warning("⚠️ Supabase configuration not found - database transfer will be skipped")
             logger.info("💡 Set SUPABASE_URL and SUPABASE_ANON_KEY environment variables for database transfer")
         
         logger.info("✅ Prerequisites validated")
         return True
     
+    @metrics.timed('run_pdf_extraction')
     def run_pdf_extraction(self) -> bool:
         """Run the PDF extraction process"""
         logger.info("📄 Starting PDF extraction...")
@@ -81,6 +158,7 @@ class ElectionDataPipeline:
             logger.error(f"❌ PDF extraction error: {e}")
             return False
     
+    @metrics.timed('run_database_transfer')
     def run_database_transfer(self) -> bool:
         """Run the database transfer process"""
         logger.info("🗄️ Starting database transfer...")
@@ -89,12 +167,12 @@ class ElectionDataPipeline:
             # Load Supabase configuration
             config = load_supabase_config()
             
-            if not config.get('url') or not config.get('key'):
+            if not config.get('db_url') and (not config.get('url') or not config.get('key')):
                 logger.warning("⚠️ Skipping database transfer - no Supabase configuration")
                 return True  # Not a failure, just skipped
             
-            # Initialize transfer agent
-            transfer_agent = DatabaseTransferAgent(config['url'], config['key'])
+            # Initialize transfer agent (direct COPY backend when a db_url is configured)
+            transfer_agent = DatabaseTransferAgent(config.get('url'), config.get('key'), db_url=config.get('db_url'))
             
             # Define CSV file paths
             locations_csv = os.path.join(self.output_dir, "locations_table.csv")
@@ -116,6 +194,160 @@ class ElectionDataPipeline:
             logger.error(f"❌ Database transfer error: {e}")
             return False
     
+    def _upload_worker(self, agent: DatabaseTransferAgent, work_queue: queue.Queue, state: Dict):
+        """Uploader thread: insert each committee's location and voters as they arrive"""
+        with metrics.stage('upload_worker') as stage:
+            self._upload_loop(agent, work_queue, state)
+            stage.rows = state['voters']
+
+    def _upload_loop(self, agent: DatabaseTransferAgent, work_queue: queue.Queue, state: Dict):
+        while True:
+            item = work_queue.get()
+            try:
+                if item is None:
+                    return
+                # After a failure keep draining so the extractor never blocks on a full queue
+                if state['error']:
+                    continue
+
+                location, voters, is_new = item
+                start = time.perf_counter()
+                if not state['cleared']:
+                    # Only now that a committee has parsed do the loaded rows go away
+                    if not agent.clear_existing_data():
+                        raise RuntimeError("could not clear existing data")
+                    state['cleared'] = True
+                if is_new:
+                    agent.insert_records('locations', [prepare_location_record(location)], batch_size=100)
+                    state['locations'] += 1
+                else:
+                    state['totals'][location['location_id']] = location['total_voters']
+
+                # Already de-duplicated by VoterCsvStream
+                records = [prepare_voter_record(voter) for voter in voters]
+                state['voters'] += agent.insert_records('voters', records, batch_size=500)
+                state['upload_seconds'] += time.perf_counter() - start
+
+            except Exception as e:
+                state['error'] = str(e)
+                logger.error(f"❌ Upload failed, draining remaining committees: {e}")
+            finally:
+                work_queue.task_done()
+
+    @metrics.timed('run_streaming_pipeline')
+    def run_streaming_pipeline(self) -> bool:
+        """Extract committees and upload them concurrently through a bounded queue"""
+        logger.info("🌊 Starting streaming extraction + upload...")
+
+        config = load_supabase_config()
+        agent = None
+        if config.get('db_url') or (config.get('url') and config.get('key')):
+            agent = DatabaseTransferAgent(config.get('url'), config.get('key'), db_url=config.get('db_url'))
+            if not agent.connect_to_database():
+                logger.warning("⚠️ Database not ready - extracting without upload")
+                agent.close()
+                agent = None
+        else:
+            logger.warning("⚠️ Supabase configuration not found - extracting without upload")
+
+        try:
+            return self._run_streaming(agent)
+        finally:
+            if agent is not None:
+                agent.close()
+
+    def _run_streaming(self, agent: Optional[DatabaseTransferAgent]) -> bool:
+        work_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        state = {'locations': 0, 'voters': 0, 'totals': {}, 'cleared': False,
+                 'upload_seconds': 0.0, 'error': None}
+        uploader = None
+        if agent is not None:
+            uploader = threading.Thread(target=self._upload_worker, args=(agent, work_queue, state),
+                                        name="uploader", daemon=True)
+            uploader.start()
+
+        extractor = EgyptElectionPDFExtractor(self.pdf_file, self.output_dir)
+        locations: Dict[int, Dict] = {}
+        voters = VoterCsvStream(os.path.join(self.output_dir, "voters_table.csv"))
+        blocked_seconds = 0.0
+        start = time.perf_counter()
+
+        try:
+            with metrics.stage('extract_committees') as stage:
+                for location, committee_voters, is_new in extractor.iter_committees():
+                    locations[location['location_id']] = location
+                    committee_voters = voters.write(committee_voters)
+                    if uploader is not None:
+                        put_start = time.perf_counter()
+                        work_queue.put((location, committee_voters, is_new))
+                        blocked_seconds += time.perf_counter() - put_start
+                stage.rows = len(voters)
+        finally:
+            voters.close()
+            if uploader is not None:
+                work_queue.put(None)
+                uploader.join()
+
+        extract_seconds = time.perf_counter() - start - blocked_seconds
+        wall_seconds = time.perf_counter() - start
+        logger.info(f"⏱️  Extraction {extract_seconds:.1f}s, upload {state['upload_seconds']:.1f}s, "
+                    f"wall {wall_seconds:.1f}s (extractor waited {blocked_seconds:.1f}s on a full queue)")
+
+        if not locations:
+            logger.error("❌ PDF extraction failed: No locations extracted from PDF")
+            return False
+
+        location_list = list(locations.values())
+        logger.info(f"📁 Voters CSV saved to: {voters.path} (voters Excel is not written in streaming mode)")
+        locations_df = extractor.locations_frame(location_list)
+        # Validate the finished CSV; only the columns the checks look at are read back
+        extractor.validate_extracted_data(
+            locations_df, pd.read_csv(voters.path, encoding='utf-8-sig',
+                                      usecols=['voter_id', 'full_name', 'location_id']))
+        tabular_outputs = {
+            **extractor.save_table(locations_df, 'locations'),
+            'voters_csv': voters.path,
+            'voters_excel': None,
+        }
+        self.results['extraction'] = {
+            **tabular_outputs,
+            'json_file': extractor.save_to_json(location_list, voters),
+            'report_file': extractor.generate_summary_report(location_list, voters),
+            'status': 'success',
+            'total_locations': len(location_list),
+            'total_voters': len(voters),
+        }
+        self.results['timing'] = {
+            'extract_seconds': round(extract_seconds, 2),
+            'upload_seconds': round(state['upload_seconds'], 2),
+            'wall_seconds': round(wall_seconds, 2),
+            'queue_blocked_seconds': round(blocked_seconds, 2),
+        }
+        logger.info("✅ PDF extraction completed successfully")
+
+        if agent is None:
+            return True
+
+        if state['error']:
+            logger.error(f"❌ Database transfer failed: {state['error']}")
+            logger.info("💡 CSVs are complete; rerun without --streaming to retry the upload from them")
+            return True
+
+        agent.update_location_totals(state['totals'])
+        verification_result = agent.verify_data_integrity()
+        if verification_result.get('integrity_check') != 'passed':
+            logger.error("❌ Database transfer failed: Data integrity verification failed")
+            return True
+
+        self.results['transfer'] = {
+            'status': 'success',
+            'locations_transferred': verification_result['locations_count'],
+            'voters_transferred': verification_result['voters_count'],
+            'report_file': agent.generate_transfer_report(verification_result),
+        }
+        logger.info("✅ Database transfer completed successfully")
+        return True
+
     def generate_final_report(self) -> str:
         """Generate a comprehensive final report"""
         logger.info("📋 Generating final pipeline report...")
@@ -130,9 +362,17 @@ class ElectionDataPipeline:
 - **Execution Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - **PDF File**: {self.pdf_file}
 - **Output Directory**: {self.output_dir}
+- **Mode**: {'Streaming (overlapped extraction + upload)' if self.streaming else 'Sequential'}
+"""
 
-## Extraction Results
+        timing = self.results.get('timing')
+        if timing:
+            report += f"""- **Extraction Time**: {timing['extract_seconds']:.1f}s
+- **Upload Time**: {timing['upload_seconds']:.1f}s
+- **Wall Time**: {timing['wall_seconds']:.1f}s (extractor waited {timing['queue_blocked_seconds']:.1f}s on the upload queue)
 """
+
+        report += "\n## Extraction Results\n"
         
         if extraction_result:
             report += f"""
@@ -160,6 +400,16 @@ class ElectionDataPipeline:
         else:
             report += "- **Status**: ⚠️ SKIPPED (No Supabase configuration)\n"
         
+        # Machine-readable twin of this report, for comparing runs and PDF releases
+        run_report = metrics.write_report(self.output_dir, pdf_file=self.pdf_file,
+                                          mode='streaming' if self.streaming else 'sequential',
+                                          total_voters=extraction_result.get('total_voters', 0))
+        self.results['run_report'] = run_report
+        report += "\n## Stage Metrics\n"
+        for line in metrics.summary_lines():
+            report += f"- {line}\n"
+        report += f"- Full metrics: `{run_report}`\n"
+
         report += f"""
 ## Data Schema Compliance
 - **Locations Table**: ✅ Compliant with specifications
@@ -231,12 +481,17 @@ ORDER BY voter_count DESC;
         if not self.validate_prerequisites():
             return False
         
-        # Step 2: Run PDF extraction
-        if not self.run_pdf_extraction():
-            return False
-        
-        # Step 3: Run database transfer (optional)
-        self.run_database_transfer()  # Don't fail if this step fails
+        if self.streaming:
+            # Steps 2+3 overlapped: upload each committee while the next is being parsed
+            if not self.run_streaming_pipeline():
+                return False
+        else:
+            # Step 2: Run PDF extraction
+            if not self.run_pdf_extraction():
+                return False
+
+            # Step 3: Run database transfer (optional)
+            self.run_database_transfer()  # Don't fail if this step fails
         
         # Step 4: Generate final report
         final_report = self.generate_final_report()
@@ -269,7 +524,7 @@ def main():
         return False
     
     # Initialize and run pipeline
-    pipeline = ElectionDataPipeline(pdf_file, output_dir)
+    pipeline = ElectionDataPipeline(pdf_file, output_dir, streaming='--streaming' in sys.argv)
     success = pipeline.run_complete_pipeline()
     
     # Display final results
@@ -299,6 +554,7 @@ def main():
         print(f"   📄 {output_dir}/voters_table.csv")
         print(f"   📄 {output_dir}/election_data.json")
         print(f"   📋 {output_dir}/pipeline_final_report.md")
+        print(f"   ⏱️  {output_dir}/run_report.json")
         print()
         print("🚀 Your Egypt 2025 election data is ready for analysis!")
         
@@ -310,7 +566,7 @@ def main():
     return True
 
 if __name__ == "__main__":
-    success = main()
+    success = run_main(main)
     
     if success:
         print("\n✨ All done! Check the output directory for your extracted data.")
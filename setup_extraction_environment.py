@@ -222,7 +222,7 @@ run_extraction.bat
 
 - `output/locations_table.csv` - Polling station information
 - `output/voters_table.csv` - Individual voter records
-- `output/election_data.json` - Complete dataset in JSON format
+- `output/election_data.json` - Dataset metadata; records in `election_data.locations.ndjson` and `election_data.voters.ndjson`
 - `output/pipeline_final_report.md` - Comprehensive extraction report
 
 ## Database Schema
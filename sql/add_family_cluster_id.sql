@@ -0,0 +1,49 @@
+-- ============================================================
+-- Household clusters (family_clustering.py)
+-- family_cluster_id groups voters linked by father/grandfather chains
+-- within a location; family_name stays as the plain last token.
+-- Run after update_schema_with_names.sql, then:
+--   python family_clustering.py --voters output/voters_table.csv --db-url <postgres url>
+-- ============================================================
+
+begin;
+
+alter table public.voters
+    add column if not exists family_cluster_id bigint null;
+
+comment on column public.voters.family_cluster_id is
+    'Household cluster: smallest voter_id in the cluster';
+
+-- Webapp filter: .eq('family_cluster_id', id), usually with location_id
+create index if not exists idx_voters_family_cluster_id
+    on public.voters using btree (family_cluster_id, voter_id) tablespace pg_default;
+
+create index if not exists idx_voters_location_family_cluster
+    on public.voters using btree (location_id, family_cluster_id) tablespace pg_default;
+
+create or replace view public.voters_by_family_cluster as
+select
+    v.family_cluster_id,
+    v.location_id,
+    l.location_name,
+    l.location_number,
+    count(*) as family_member_count,
+    mode() within group (order by v.family_name) as family_name,
+    array_agg(v.full_name order by v.voter_id) as family_members,
+    array_agg(v.voter_id order by v.voter_id) as voter_ids
+from public.voters v
+join public.locations l on l.location_id = v.location_id
+where v.family_cluster_id is not null
+group by v.family_cluster_id, v.location_id, l.location_name, l.location_number;
+
+create or replace view public.family_cluster_statistics as
+select
+    family_name,
+    count(*) as household_count,
+    sum(family_member_count) as total_members,
+    max(family_member_count) as largest_household
+from public.voters_by_family_cluster
+where family_member_count > 1
+group by family_name;
+
+commit;
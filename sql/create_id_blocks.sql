@@ -0,0 +1,121 @@
+-- ============================================================
+-- Reserved id blocks (id_allocator.py)
+-- Extraction workers claim location_id / voter_id ranges with one call to
+-- claim_id_block() per block instead of reading the tables before inserting.
+-- Also widens voters.voter_id to bigint, which --ids hash needs for its 53-bit ids.
+-- Run after create_locations_voters_tables.sql (or supabase_schema.sql), then:
+--   python batch_district_runner.py --input-dir pdfs/ --ids blocks --db-url <postgres url>
+-- ============================================================
+
+begin;
+
+-- Views over voters.voter_id (and views built on them) block the type change, so
+-- they are dropped and recreated from their stored definitions; grants on them
+-- must be re-applied
+do $$
+declare
+    v_view record;
+    v_views text[] := '{}';
+    v_definitions text[] := '{}';
+begin
+    if (select data_type from information_schema.columns
+         where table_schema = 'public' and table_name = 'voters' and column_name = 'voter_id') = 'bigint' then
+        return;
+    end if;
+
+    for v_view in
+        with recursive dependents (view_oid, depth) as (
+            select r.ev_class, 1
+              from pg_depend d
+              join pg_rewrite r on r.oid = d.objid
+              join pg_attribute a on a.attrelid = d.refobjid and a.attnum = d.refobjsubid
+             where d.refobjid = 'public.voters'::regclass
+               and a.attname = 'voter_id'
+            union
+            select r.ev_class, dependents.depth + 1
+              from dependents
+              join pg_depend d on d.refobjid = dependents.view_oid
+              join pg_rewrite r on r.oid = d.objid
+             where r.ev_class <> dependents.view_oid
+        )
+        select c.oid::regclass::text as name, pg_get_viewdef(c.oid) as definition
+          from dependents
+          join pg_class c on c.oid = dependents.view_oid
+         where c.relkind = 'v'
+         group by c.oid
+         order by max(dependents.depth)
+    loop
+        v_views := v_views || v_view.name;
+        v_definitions := v_definitions || v_view.definition;
+    end loop;
+
+    -- Deepest first, so no view is dropped while another still reads it
+    for i in reverse coalesce(array_length(v_views, 1), 0) .. 1 loop
+        execute format('drop view %s', v_views[i]);
+    end loop;
+
+    alter table public.voters alter column voter_id type bigint;
+
+    for i in 1 .. coalesce(array_length(v_views, 1), 0) loop
+        execute format('create view %s as %s', v_views[i], v_definitions[i]);
+    end loop;
+end;
+$$;
+
+create table if not exists public.id_blocks (
+    kind text primary key,              -- 'location' or 'voter'
+    next_id bigint not null,
+    updated_at timestamp with time zone not null default now()
+) tablespace pg_default;
+
+create table if not exists public.id_block_claims (
+    claim_id bigint generated always as identity primary key,
+    kind text not null references public.id_blocks (kind),
+    first_id bigint not null,
+    last_id bigint not null,
+    owner text null,                    -- district / worker that claimed the block
+    claimed_at timestamp with time zone not null default now()
+) tablespace pg_default;
+
+create index if not exists idx_id_block_claims_kind_first
+    on public.id_block_claims using btree (kind, first_id) tablespace pg_default;
+
+-- Start after the ids already loaded, so blocks never overlap existing rows
+insert into public.id_blocks (kind, next_id)
+select 'location', coalesce(max(location_id), 0) + 1 from public.locations
+on conflict (kind) do nothing;
+
+insert into public.id_blocks (kind, next_id)
+select 'voter', coalesce(max(voter_id), 0) + 1 from public.voters
+on conflict (kind) do nothing;
+
+-- One round trip per block: the row lock on id_blocks serialises concurrent claims
+create or replace function public.claim_id_block(p_kind text, p_size bigint, p_owner text default null)
+returns bigint
+language plpgsql
+as $$
+declare
+    v_first bigint;
+begin
+    if p_size < 1 then
+        raise exception 'block size must be positive, got %', p_size;
+    end if;
+
+    update public.id_blocks
+       set next_id = next_id + p_size,
+           updated_at = now()
+     where kind = p_kind
+    returning next_id - p_size into v_first;
+
+    if v_first is null then
+        raise exception 'unknown id kind %', p_kind;
+    end if;
+
+    insert into public.id_block_claims (kind, first_id, last_id, owner)
+    values (p_kind, v_first, v_first + p_size - 1, p_owner);
+
+    return v_first;
+end;
+$$;
+
+commit;
@@ -28,7 +28,7 @@ create index if not exists idx_locations_number
 
 create table if not exists public.voters (
   id bigserial not null,
-  voter_id integer not null,
+  voter_id bigint not null,
   full_name text not null,
   location_id bigint not null,
   source_page integer null,
@@ -22,7 +22,7 @@ CREATE TABLE IF NOT EXISTS locations (
 -- Create voters table
 CREATE TABLE IF NOT EXISTS voters (
     id BIGSERIAL PRIMARY KEY,
-    voter_id INTEGER NOT NULL,
+    voter_id BIGINT NOT NULL,
     full_name TEXT NOT NULL,
     location_id BIGINT NOT NULL REFERENCES locations(location_id) ON DELETE CASCADE,
     source_page INTEGER,
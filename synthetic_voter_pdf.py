@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Synthetic Voter-Roll PDF Generator
+Builds multi-page PDFs that copy the layout of the real committee rolls (which
+cannot be committed) together with a ground-truth CSV, for benchmarks and
+regression tests:
+- header: election title, governorate / district / school line, committee + address
+- body: three columns of (voter number, name) cells on a ruled grid, the number on
+  the right of each column as in onepage.pdf, Arabic digits
+- footer: "<page> الصحفة رقممن <total>رقم اللجنة<committee>" like the real footer text
+
+glyph_mode:
+- 'visual'  : names shaped into Arabic presentation forms and stored in visual
+              (right-to-left reversed) order, as in the real rolls
+- 'logical' : plain Unicode letters written in reading order, each letter (or
+              digit run) placed right to left from the right edge, as an RTL-aware
+              PDF writer does (a clean baseline)
+
+Both modes read back from the character boxes (char_line_reassembly.py); the
+benchmark requires pdfplumber_chars to find the ground truth names in each.
+
+Needs reportlab (pip install reportlab) and a TrueType font with Arabic glyphs
+(Arial/Tahoma on Windows, DejaVu Sans or Noto Naskh on Linux, or --font).
+
+Usage:
+    python synthetic_voter_pdf.py --pages 100 --output output/benchmarks/synthetic_100.pdf
+    (default output: output/benchmarks/ next to this script)
+"""
+
+import argparse
+import csv
+import os
+import random
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+except ImportError:  # Optional: only needed to generate PDFs
+    canvas = None
+
+ARABIC_DIGITS = str.maketrans('0123456789', '٠١٢٣٤٥٦٧٨٩')
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'benchmarks')
+# Digit runs stay left to right inside right-to-left text
+TOKENS = re.compile(r'[0-9٠-٩]+|.')
+
+FIRST_NAMES = ['محمد', 'احمد', 'على', 'ابراهيم', 'السيد', 'مصطفى', 'عبد الله', 'حسن', 'محمود', 'عبد الرحمن',
+               'فاطمة', 'زينب', 'هدى', 'نجلاء', 'سعاد', 'مريم', 'اسماء', 'رضا', 'خالد', 'يوسف', 'عبد العزيز',
+               'سعيد', 'عادل', 'فتحى', 'جمال', 'صبرى', 'عزة', 'امال', 'شيماء', 'رحاب']
+FAMILY_NAMES = ['الشاعر', 'مرعى', 'الدسوقى', 'ابو زيد', 'عبد الفتاح', 'النجار', 'الحداد', 'شلبى', 'سلامة',
+                'البنا', 'عيسى', 'الجمال', 'غنيم', 'بدوى', 'الفقى', 'حجازى', 'الصعيدى', 'عطية', 'زايد', 'خليل']
+SCHOOLS = ['مدرسة مطوبس الثانوية بنين', 'مدرسة الشهيد احمد ماهر الابتدائية', 'مدرسة الجمهورية الابتدائية المشتركة',
+           'مدرسة الثانوية للبنات مطوبس', 'مدرسة معدية مهدى للتعليم الاساسى', 'مدرسة كوم الحاصل الاعدادية']
+STREETS = ['شارع النيل', 'شارع المستشفى امام مدرسة التجارة', 'بجوار مركز الشباب', 'شارع المركز', 'امام الوحدة الصحية']
+
+FONT_CANDIDATES = [
+    r'C:\Windows\Fonts\arial.ttf',
+    r'C:\Windows\Fonts\tahoma.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf',
+    '/usr/share/fonts/noto/NotoNaskhArabic-Regular.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+]
+
+PAGE_MARGIN = 28
+ROW_HEIGHT = 17
+COLUMNS = 3
+NUMBER_CELL_WIDTH = 42
+
+
+def _presentation_forms() -> Dict[str, Dict[str, str]]:
+    """base letter -> {isolated/initial/medial/final: presentation form}, from the Unicode tables"""
+    forms: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for code in range(0xFE70, 0xFEFD):
+        decomposition = unicodedata.decomposition(chr(code)).split()
+        if len(decomposition) == 2 and decomposition[0].startswith('<'):
+            forms[chr(int(decomposition[1], 16))][decomposition[0].strip('<>')] = chr(code)
+    return forms
+
+
+def _lam_alef_ligatures() -> Dict[str, Dict[str, str]]:
+    """alef variant -> {isolated/final: lam-alef ligature}"""
+    ligatures: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for code in range(0xFEF5, 0xFEFD):
+        decomposition = unicodedata.decomposition(chr(code)).split()
+        ligatures[chr(int(decomposition[2], 16))][decomposition[0].strip('<>')] = chr(code)
+    return ligatures
+
+
+PRESENTATION_FORMS = _presentation_forms()
+LAM_ALEF = _lam_alef_ligatures()
+LAM = '\u0644'
+
+
+def _joins_forward(char: str) -> bool:
+    return 'initial' in PRESENTATION_FORMS.get(char, {})
+
+
+def _joins_backward(char: str) -> bool:
+    return 'final' in PRESENTATION_FORMS.get(char, {})
+
+
+def shape_arabic(text: str) -> str:
+    """Replace letters with contextual presentation forms (logical order kept)"""
+    shaped = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        prev_char = text[i - 1] if i > 0 else ''
+        prev_joins = _joins_forward(prev_char)
+        next_char = text[i + 1] if i + 1 < len(text) else ''
+
+        if char == LAM and next_char in LAM_ALEF:
+            shaped.append(LAM_ALEF[next_char]['final' if prev_joins else 'isolated'])
+            i += 2
+            continue
+
+        forms = PRESENTATION_FORMS.get(char)
+        if not forms:
+            shaped.append(char)
+        else:
+            next_joins = _joins_forward(char) and _joins_backward(next_char)
+            if prev_joins and next_joins:
+                form = 'medial'
+            elif prev_joins and 'final' in forms:
+                form = 'final'
+            elif next_joins:
+                form = 'initial'
+            else:
+                form = 'isolated'
+            shaped.append(forms.get(form, forms.get('isolated', char)))
+        i += 1
+    return ''.join(shaped)
+
+
+def to_visual(text: str, glyph_mode: str) -> str:
+    """Text as it is stored in the PDF content stream for the given glyph mode"""
+    if glyph_mode == 'logical':
+        return text
+    # Right-to-left display order: reverse everything except runs of digits
+    tokens = TOKENS.findall(shape_arabic(text))
+    return ''.join(reversed(tokens))
+
+
+def find_arabic_font(font_path: Optional[str] = None) -> str:
+    """First usable TrueType font with Arabic glyphs"""
+    candidates = [font_path, os.getenv('SYNTHETIC_PDF_FONT')] + FONT_CANDIDATES
+    try:
+        import matplotlib
+        candidates.append(os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf', 'DejaVuSans.ttf'))
+    except ImportError:
+        pass
+    for candidate in candidates:
+        if candidate and os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError("No Arabic TrueType font found; pass --font or set SYNTHETIC_PDF_FONT")
+
+
+def random_name(rng: random.Random) -> str:
+    """self + father + grandfather + family, like the rolls"""
+    return ' '.join([rng.choice(FIRST_NAMES) for _ in range(3)] + [rng.choice(FAMILY_NAMES)])
+
+
+def generate_voter_roll_pdf(output_pdf: str, pages: int = 100, pages_per_committee: int = 25,
+                            rows_per_column: int = 40, glyph_mode: str = 'visual',
+                            first_committee: int = 76, seed: int = 2025,
+                            font_path: Optional[str] = None) -> Dict:
+    """Write the PDF plus <output_pdf minus .pdf>_truth.csv and return a summary"""
+    if canvas is None:
+        raise ImportError("reportlab is required to generate PDFs (pip install reportlab)")
+    if glyph_mode not in ('visual', 'logical'):
+        raise ValueError(f"Unknown glyph_mode: {glyph_mode}")
+
+    rng = random.Random(seed)
+    font_file = find_arabic_font(font_path)
+    pdfmetrics.registerFont(TTFont('VoterRollArabic', font_file))
+
+    os.makedirs(os.path.dirname(output_pdf) or '.', exist_ok=True)
+    truth_csv = os.path.splitext(output_pdf)[0] + '_truth.csv'
+
+    width, height = A4
+    column_width = (width - 2 * PAGE_MARGIN) / COLUMNS
+    body_top = height - 110
+    pdf = canvas.Canvas(output_pdf, pagesize=A4)
+    pdf.setTitle("Synthetic voter roll")
+
+    def draw_right(text: str, x: float, y: float, size: float, max_width: Optional[float] = None):
+        if max_width:
+            # Shrink long names to their cell, so they do not run into the number cell
+            width = pdfmetrics.stringWidth(to_visual(text, glyph_mode), 'VoterRollArabic', size)
+            size = min(size, size * max_width / width) if width else size
+        if glyph_mode == 'visual':
+            pdf.setFont('VoterRollArabic', size)
+            pdf.drawRightString(x, y, to_visual(text, glyph_mode))
+            return
+        # Logical order in the content stream, positions right to left
+        text_object = pdf.beginText()
+        text_object.setFont('VoterRollArabic', size)
+        for token in TOKENS.findall(text):
+            x -= pdfmetrics.stringWidth(token, 'VoterRollArabic', size)
+            text_object.setTextOrigin(x, y)
+            text_object.textOut(token)
+        pdf.drawText(text_object)
+
+    truth_rows = []
+    committee = first_committee - 1
+    voter_number = 0
+    committee_page = 0
+    total_committee_pages = pages_per_committee
+
+    for page_index in range(pages):
+        if page_index % pages_per_committee == 0:
+            committee += 1
+            voter_number = 0
+            committee_page = 0
+            school = rng.choice(SCHOOLS)
+            street = rng.choice(STREETS)
+            total_committee_pages = min(pages_per_committee, pages - page_index)
+        committee_page += 1
+        committee_digits = str(committee).translate(ARABIC_DIGITS)
+
+        # Header block
+        draw_right("انتخابات مجلس النواب ٢٠٢٥ - كشوف الناخبين", width - PAGE_MARGIN, height - 40, 12)
+        draw_right(f"كفر الشيخمحافظة : مركز مطوبس{school}", width - PAGE_MARGIN, height - 60, 10)
+        draw_right(f"اللجنة الفرعية رقم {committee_digits}    {street}", width - PAGE_MARGIN, height - 78, 10)
+
+        # Column headings
+        for column in range(COLUMNS):
+            right = width - PAGE_MARGIN - column * column_width
+            draw_right("مسلسل", right - 4, body_top - 12, 9)
+            draw_right("الاسم", right - NUMBER_CELL_WIDTH - 4, body_top - 12, 9)
+
+        # Ruled grid so table extraction sees cells
+        grid_bottom = body_top - (rows_per_column + 1) * ROW_HEIGHT
+        pdf.setLineWidth(0.5)
+        for row in range(rows_per_column + 2):
+            y = body_top - row * ROW_HEIGHT
+            pdf.line(PAGE_MARGIN, y, width - PAGE_MARGIN, y)
+        for column in range(COLUMNS + 1):
+            x = width - PAGE_MARGIN - column * column_width
+            pdf.line(x, body_top, x, grid_bottom)
+            if column < COLUMNS:
+                number_x = x - NUMBER_CELL_WIDTH
+                pdf.line(number_x, body_top, number_x, grid_bottom)
+
+        # Voters run down the right column first, then the middle, then the left; as in
+        # the real rolls the number cell is on the right of each column, the name left of it
+        for column in range(COLUMNS):
+            right = width - PAGE_MARGIN - column * column_width
+            for row in range(rows_per_column):
+                voter_number += 1
+                name = random_name(rng)
+                y = body_top - (row + 2) * ROW_HEIGHT + 5
+                draw_right(str(voter_number).translate(ARABIC_DIGITS), right - 4, y, 9)
+                draw_right(name, right - NUMBER_CELL_WIDTH - 4, y, 9,
+                           max_width=column_width - NUMBER_CELL_WIDTH - 8)
+                truth_rows.append((voter_number, name, page_index + 1, committee))
+
+        # Footer in the same wording the text extractor looks for
+        draw_right(f"{committee_page} الصحفة رقممن {total_committee_pages}رقم اللجنة{committee_digits}",
+                   width - PAGE_MARGIN, 30, 9)
+        pdf.showPage()
+
+    pdf.save()
+
+    with open(truth_csv, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['voter_number', 'full_name', 'page_number', 'location_number'])
+        writer.writerows(truth_rows)
+
+    return {
+        'pdf': output_pdf,
+        'truth_csv': truth_csv,
+        'pages': pages,
+        'voters': len(truth_rows),
+        'committees': committee - first_committee + 1,
+        'glyph_mode': glyph_mode,
+        'seed': seed,
+        'font': font_file,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Arabic voter-roll PDF with ground truth")
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--output', default=os.path.join(BENCHMARK_DIR, 'synthetic_100.pdf'))
+    parser.add_argument('--pages-per-committee', type=int, default=25)
+    parser.add_argument('--glyph-mode', choices=['visual', 'logical'], default='visual')
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--font', help="TrueType font with Arabic glyphs")
+    args = parser.parse_args(argv)
+
+    result = generate_voter_roll_pdf(args.output, args.pages, args.pages_per_committee,
+                                     glyph_mode=args.glyph_mode, seed=args.seed, font_path=args.font)
+    print(f"✅ {result['pdf']}: {result['pages']} pages, {result['voters']:,} voters, "
+          f"{result['committees']} committees ({result['glyph_mode']} glyphs)")
+    print(f"📋 Ground truth: {result['truth_csv']}")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Table Calibration
+extract_108_improved.extract_with_tables called page.extract_tables() with the
+default settings on every page, so pdfplumber re-detected the grid from scratch
+each time. On rolls without ruling lines it often found no table at all and the
+page fell back to text parsing, so one document could be parsed two ways. A
+calibration pass learns the grid once and saves it as per-document table
+settings (explicit vertical and horizontal lines):
+
+1. sample : pages 2..N+1 (page 1 carries the longer committee header)
+2. lines  : vertical / horizontal ruling edges of each sampled page; without
+            rulings, column gaps and row boundaries of the words in the body
+            band (layout_clustering.py, page_template.py)
+3. keep   : positions that recur on most sampled pages (median position)
+4. page 1 : its own horizontal lines, learned from page 1 alone
+
+Every page is then read with the explicit settings; extract_with_tables
+re-detects a page only when the explicit grid yields no voter number cell.
+
+Usage:
+    python table_calibration.py 108.pdf                 # learn, save, compare with default detection
+    python table_calibration.py 108.pdf --pages 20
+
+    settings = load_or_calibrate(pdf)
+    tables = page.extract_tables(settings.for_page(page.page_number))
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from layout_clustering import column_breaks, row_ids, word_arrays
+
+SETTINGS_DIR = os.path.join('output', 'table_settings')
+# Pages sampled to learn the grid
+SAMPLE_PAGES = 5
+# A line is kept when it appears on at least this share of the sampled pages ...
+STATIC_SHARE = 0.6
+# ... within this many points of its median position
+POSITION_TOLERANCE = 2.0
+# Fewer recurring rulings than this on an axis: learn that axis from the words
+MIN_RULINGS = 3
+# Points between the outermost words and the outer grid lines
+MARGIN = 1.0
+
+
+def ruling_positions(page) -> Dict[str, List[float]]:
+    """x of vertical and top of horizontal ruling edges (lines and rectangle sides) on one page"""
+    positions: Dict[str, List[float]] = {'vertical': [], 'horizontal': []}
+    for edge in page.edges:
+        if edge['orientation'] == 'v':
+            positions['vertical'].append(float(edge['x0']))
+        else:
+            positions['horizontal'].append(float(edge['top']))
+    return positions
+
+
+def word_boxes(page) -> Dict[str, np.ndarray]:
+    """x0, x1, top, bottom arrays of the page's words (blank / NUL-only words dropped)"""
+    from extract_onepage import normalize_text
+    words = [word for word in page.extract_words() if normalize_text(word['text'])]
+    arrays = word_arrays(words)
+    return {key: arrays[key] for key in ('x0', 'x1', 'top', 'bottom')}
+
+
+def clip_boxes(boxes: Dict[str, np.ndarray], top: float, bottom: float) -> Dict[str, np.ndarray]:
+    """Words lying fully inside the band top..bottom"""
+    keep = (boxes['top'] >= top) & (boxes['bottom'] <= bottom)
+    return {key: values[keep] for key, values in boxes.items()}
+
+
+def _least_crossed(x0: np.ndarray, x1: np.ndarray, position: float, radius: float) -> float:
+    """Position within radius of `position` crossed by the fewest words, nearest first on ties"""
+    candidates = position + np.arange(-radius, radius + 0.25, 0.5)
+    crossings = ((x0[None, :] < candidates[:, None]) & (candidates[:, None] < x1[None, :])).sum(axis=1)
+    best = np.flatnonzero(crossings == crossings.min())
+    return float(candidates[best[np.argmin(np.abs(candidates[best] - position))]])
+
+
+def word_lines(samples: List[Dict[str, np.ndarray]], axis: str, share: float = STATIC_SHARE,
+               tolerance: float = POSITION_TOLERANCE, outer: Optional[Tuple[float, float]] = None) -> List[float]:
+    """Grid lines implied by the sampled pages' words
+
+    vertical   : column gaps of all pages' words together, each moved to the spot the
+                 fewest words cross (a long name can run into the gap)
+    horizontal : boundaries between rows that recur on most pages
+    Outer lines go at `outer` (page edges, body band), else just around the sampled
+    words; a wider number or name on a later page would be cut by those.
+    """
+    samples = [boxes for boxes in samples if len(boxes['x0'])]
+    if not samples:
+        return []
+    x0, x1, top, bottom = (np.concatenate([boxes[key] for boxes in samples]) for key in ('x0', 'x1', 'top', 'bottom'))
+    if axis == 'vertical':
+        page = np.repeat(np.arange(len(samples)), [len(boxes['x0']) for boxes in samples])
+        height = float(np.median(bottom - top))
+        breaks = column_breaks(x0, x1, row_ids(top, bottom, page), height=height).tolist()
+        inner = [round(_least_crossed(x0, x1, position, height), 2) for position in breaks]
+        low, high = outer or (float(x0.min()) - MARGIN, float(x1.max()) + MARGIN)
+        return [round(low, 2)] + inner + [round(high, 2)]
+
+    boundaries = []
+    for boxes in samples:
+        rows = row_ids(boxes['top'], boxes['bottom'])
+        tops = np.full(rows.max() + 1, np.inf)
+        bottoms = np.full(rows.max() + 1, -np.inf)
+        np.minimum.at(tops, rows, boxes['top'])
+        np.maximum.at(bottoms, rows, boxes['bottom'])
+        # A boundary goes in the middle of each gap between rows
+        boundaries.append(((bottoms[:-1] + tops[1:]) / 2).tolist())
+    inner = recurring_positions(boundaries, share, tolerance)
+    low, high = outer or (float(top.min()) - MARGIN, float(bottom.max()) + MARGIN)
+    return [round(low, 2)] + inner + [round(high, 2)]
+
+
+def recurring_positions(per_page: Sequence[Sequence[float]], share: float = STATIC_SHARE,
+                        tolerance: float = POSITION_TOLERANCE) -> List[float]:
+    """Median of each cluster of positions found on at least `share` of the pages"""
+    values = np.array([position for positions in per_page for position in positions])
+    pages = np.repeat(np.arange(len(per_page)), [len(positions) for positions in per_page])
+    if not len(values):
+        return []
+    order = np.argsort(values, kind='stable')
+    values, pages = values[order], pages[order]
+    cuts = np.flatnonzero(np.diff(values) > tolerance) + 1
+    kept = []
+    for cluster_values, cluster_pages in zip(np.split(values, cuts), np.split(pages, cuts)):
+        if len(np.unique(cluster_pages)) >= share * len(per_page):
+            kept.append(round(float(np.median(cluster_values)), 2))
+    return kept
+
+
+def _axis_lines(samples: List[Dict], axis: str, share: float, tolerance: float,
+                outer: Optional[Tuple[float, float]] = None) -> Dict:
+    """Recurring lines of one axis: rulings when there are enough, else word boundaries"""
+    rulings = recurring_positions([sample['rulings'][axis] for sample in samples], share, tolerance)
+    if len(rulings) >= MIN_RULINGS:
+        return {'lines': rulings, 'source': 'rulings'}
+    return {'lines': word_lines([sample['words'] for sample in samples], axis, share, tolerance, outer),
+            'source': 'words'}
+
+
+class TableSettings:
+    """Explicit grid lines of a roll's voter table, learned from a sample of pages"""
+
+    def __init__(self, vertical_lines: List[float], horizontal_lines: List[float],
+                 first_page_horizontal_lines: Optional[List[float]] = None, sources: Optional[Dict] = None,
+                 sample_pages: int = 0, pdf_file: Optional[str] = None):
+        self.vertical_lines = vertical_lines
+        self.horizontal_lines = horizontal_lines
+        # Page 1 has a longer header, so its rows start further down; None: same as every page
+        self.first_page_horizontal_lines = first_page_horizontal_lines
+        # 'rulings' or 'words' per axis
+        self.sources = sources or {}
+        self.sample_pages = sample_pages
+        self.pdf_file = pdf_file
+
+    @classmethod
+    def learn(cls, pdf_path: str, sample_pages: int = SAMPLE_PAGES, share: float = STATIC_SHARE,
+              tolerance: float = POSITION_TOLERANCE, template: Optional[Any] = None) -> 'TableSettings':
+        """template: page_template.PageTemplate of the PDF (learned when the words are needed)"""
+        import pdfplumber
+
+        def positions(page) -> Dict:
+            found = {'rulings': ruling_positions(page), 'words': word_boxes(page)}
+            page.close()
+            return found
+
+        with pdfplumber.open(pdf_path) as pdf:
+            width, height = float(pdf.pages[0].width), float(pdf.pages[0].height)
+            first = positions(pdf.pages[0])
+            sampled = [positions(page) for page in pdf.pages[1:sample_pages + 1]] or [first]
+
+        # Without a ruled grid the lines come from the words, and only the body band's
+        # words belong to the table: header and footer lines would become table rows
+        ruled = all(len(recurring_positions([sample['rulings'][axis] for sample in sampled], share, tolerance))
+                    >= MIN_RULINGS for axis in ('vertical', 'horizontal'))
+        body = first_body = None
+        if not ruled:
+            from page_template import PageTemplate
+            template = template or PageTemplate.learn(pdf_path)
+            _, top, _, bottom = template.bands(width, height)['body']
+            body = (float(top), float(bottom))
+            _, top, _, bottom = template.bands(width, height, lead=True)['body']
+            first_body = (float(top), float(bottom))
+            for sample in [first] + [sample for sample in sampled if sample is not first]:
+                sample['words'] = clip_boxes(sample['words'], *(first_body if sample is first else body))
+
+        vertical = _axis_lines(sampled, 'vertical', share, tolerance, (0.0, width) if body else None)
+        horizontal = _axis_lines(sampled, 'horizontal', share, tolerance, body)
+        first_horizontal = _axis_lines([first], 'horizontal', 1.0, tolerance, first_body)['lines']
+        if first_horizontal == horizontal['lines']:
+            first_horizontal = None
+        return cls(vertical['lines'], horizontal['lines'], first_horizontal,
+                   {'vertical': vertical['source'], 'horizontal': horizontal['source']},
+                   len(sampled), os.path.basename(pdf_path))
+
+    def for_page(self, page_num: int) -> Dict:
+        """pdfplumber table_settings for one page (1-based)"""
+        horizontal = self.horizontal_lines
+        if page_num == 1 and self.first_page_horizontal_lines:
+            horizontal = self.first_page_horizontal_lines
+        return {
+            'vertical_strategy': 'explicit',
+            'horizontal_strategy': 'explicit',
+            'explicit_vertical_lines': self.vertical_lines,
+            'explicit_horizontal_lines': horizontal,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'pdf_file': self.pdf_file,
+            'sample_pages': self.sample_pages,
+            'sources': self.sources,
+            'vertical_lines': self.vertical_lines,
+            'horizontal_lines': self.horizontal_lines,
+            'first_page_horizontal_lines': self.first_page_horizontal_lines,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TableSettings':
+        return cls(data['vertical_lines'], data['horizontal_lines'], data.get('first_page_horizontal_lines'),
+                   data.get('sources'), data.get('sample_pages', 0), data.get('pdf_file'))
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'TableSettings':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def settings_path(pdf_path: str, settings_dir: str = SETTINGS_DIR) -> str:
+    """Settings file of a PDF, keyed by content digest so an edited PDF is re-calibrated"""
+    from extraction_engine import file_digest
+    stem = os.path.splitext(os.path.basename(pdf_path))[0].strip().replace(' ', '_')
+    return os.path.join(settings_dir, f"{stem}_{file_digest(pdf_path)}.json")
+
+
+def load_or_calibrate(pdf_path: str, settings_dir: Optional[str] = SETTINGS_DIR,
+                      sample_pages: int = SAMPLE_PAGES) -> TableSettings:
+    """Saved table settings of the PDF, calibrating (and saving) on first use; settings_dir None: no cache"""
+    path = settings_path(pdf_path, settings_dir) if settings_dir else None
+    if path and os.path.exists(path):
+        return TableSettings.load(path)
+    settings = TableSettings.learn(pdf_path, sample_pages)
+    if path:
+        settings.save(path)
+    return settings
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Learn explicit table settings and compare with default detection")
+    parser.add_argument('pdf', help="PDF file")
+    parser.add_argument('--sample-pages', type=int, default=SAMPLE_PAGES)
+    parser.add_argument('--pages', type=int, default=10, help="Pages to compare (0: all)")
+    parser.add_argument('--settings-dir', default=SETTINGS_DIR)
+    args = parser.parse_args(argv)
+
+    import pdfplumber
+    from extract_108_improved import parse_table_rows
+
+    print("=" * 70)
+    print("📏 TABLE CALIBRATION")
+    print("=" * 70)
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return False
+
+    start = time.perf_counter()
+    settings = TableSettings.learn(args.pdf, args.sample_pages)
+    path = settings.save(settings_path(args.pdf, args.settings_dir))
+    print(f"📐 {len(settings.vertical_lines)} vertical lines ({settings.sources['vertical']}), "
+          f"{len(settings.horizontal_lines)} horizontal lines ({settings.sources['horizontal']}) "
+          f"from {settings.sample_pages} pages in {time.perf_counter() - start:.2f}s")
+    if settings.first_page_horizontal_lines:
+        print(f"   page 1: {len(settings.first_page_horizontal_lines)} horizontal lines")
+    print(f"📁 {path}")
+
+    # Table finding only: characters are parsed before the clock starts, as both modes need them
+    totals = {'default': [0.0, 0, 0], 'explicit': [0.0, 0, 0]}
+    same = 0
+    with pdfplumber.open(args.pdf) as pdf:
+        pages = pdf.pages[:args.pages] if args.pages else pdf.pages
+        for page in pages:
+            page.chars
+            voters = {}
+            for mode, table_settings in (('default', None), ('explicit', settings.for_page(page.page_number))):
+                started = time.perf_counter()
+                tables = page.extract_tables(table_settings)
+                totals[mode][0] += time.perf_counter() - started
+                voters[mode] = parse_table_rows(tables, page.page_number, None)
+                totals[mode][1] += len(tables)
+                totals[mode][2] += len(voters[mode])
+            same += voters['default'] == voters['explicit']
+            page.close()
+
+    print(f"\n📄 {len(pages)} pages")
+    for mode, (seconds, tables, voters) in totals.items():
+        print(f"   {mode:<9} {seconds * 1000 / max(len(pages), 1):7.1f} ms/page, {tables:>4} tables, {voters:>6,} voters")
+    print(f"   same voters on {same}/{len(pages)} pages")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -6,6 +6,8 @@ import pandas as pd
 from supabase import create_client, Client
 from tqdm import tqdm
 
+from profiling_hooks import memory_snapshot, run_main
+
 def load_config():
     """Load Supabase configuration"""
     with open('supabase_config.json', 'r') as f:
@@ -172,7 +174,8 @@ def main():
     supabase: Client = create_client(config['url'], config['key'])
     
     # Load data
-    locations_df, voters_df = load_data()
+    with memory_snapshot('load_data'):
+        locations_df, voters_df = load_data()
     
     # Upload locations first
     upload_locations(supabase, locations_df)
@@ -191,4 +194,4 @@ def main():
     print("=" * 70)
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -7,6 +7,8 @@ from supabase import create_client, Client
 from tqdm import tqdm
 import time
 
+from profiling_hooks import memory_snapshot, run_main
+
 def load_config():
     with open('supabase_config.json', 'r') as f:
         return json.load(f)
@@ -100,10 +102,11 @@ def main():
     
     # Load voters data
     print("\n📂 Loading voters CSV...")
-    voters_df = pd.read_csv('motobus voter.csv', sep=';')
-    voters_df = voters_df[['name ', 'voter number', 'location numer']]
-    voters_df.columns = ['full_name', 'voter_number', 'location_number']
-    voters_df = voters_df.dropna(subset=['voter_number', 'location_number'])
+    with memory_snapshot('load_voters'):
+        voters_df = pd.read_csv('motobus voter.csv', sep=';')
+        voters_df = voters_df[['name ', 'voter number', 'location numer']]
+        voters_df.columns = ['full_name', 'voter_number', 'location_number']
+        voters_df = voters_df.dropna(subset=['voter_number', 'location_number'])
     print(f"   Total voters in CSV: {len(voters_df)}")
     
     # Get already uploaded
@@ -117,4 +120,4 @@ def main():
     print("=" * 70)
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
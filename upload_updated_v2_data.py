@@ -9,6 +9,8 @@ from tqdm import tqdm
 import time
 import re
 
+from profiling_hooks import memory_snapshot, run_main
+
 def arabic_to_english_number(text):
     """Convert Arabic numerals to English numerals"""
     if pd.isna(text):
@@ -248,8 +250,10 @@ def main():
     clear_all_data(supabase)
     
     # Upload new data
-    locations_count = upload_locations(supabase)
-    voters_count = upload_voters(supabase)
+    with memory_snapshot('upload_locations'):
+        locations_count = upload_locations(supabase)
+    with memory_snapshot('upload_voters'):
+        voters_count = upload_voters(supabase)
     
     # Update counts
     update_voter_counts(supabase)
@@ -268,4 +272,4 @@ def main():
     print(f"\n🌐 Refresh your web app to see the updated data!")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
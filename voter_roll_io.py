@@ -0,0 +1,153 @@
+"""
+Load the voter roll from any of the formats the project produces
+- Extraction output: output/locations_table.csv, output/voters_table.csv (comma separated)
+- Source exports: "motobus  locations.csv", "motobus voter.csv" (semicolon separated)
+- Parquet copies of either
+- JSON exports (voter_data_full.json, election_data.json): a small metadata
+  document plus one newline-delimited JSON file per stream (locations, voters),
+  read record by record; older single-document exports are still read
+Columns are renamed to the database schema names (see supabase_schema.sql)
+"""
+import json
+import os
+from typing import Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from arabic_name_utils import arabic_to_english_number, clean_arabic_text, split_arabic_name
+
+# Source export headers -> schema column names
+VOTER_COLUMN_ALIASES = {
+    'name': 'full_name',
+    'voter number': 'voter_id',
+    'location numer': 'location_id',
+}
+
+LOCATION_COLUMN_ALIASES = {
+    'location numer': 'location_id',
+    'location adress': 'location_address',
+    'location name': 'location_name',
+}
+
+DEFAULT_LOCATIONS_CSV = os.path.join('output', 'locations_table.csv')
+DEFAULT_VOTERS_CSV = os.path.join('output', 'voters_table.csv')
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Read a CSV (comma or semicolon separated) or Parquet file"""
+    if path.lower().endswith('.parquet'):
+        return pd.read_parquet(path)
+
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        header = f.readline()
+    sep = ';' if header.count(';') > header.count(',') else ','
+
+    df = pd.read_csv(path, sep=sep, encoding='utf-8-sig')
+    df.columns = df.columns.str.strip()
+    # Drop the empty trailing columns left by ";;;" in the source exports
+    return df.loc[:, ~df.columns.str.startswith('Unnamed')]
+
+
+def _to_int(series: pd.Series) -> pd.Series:
+    """Convert a column that may hold Arabic digits to nullable integers"""
+    return pd.to_numeric(series.map(arabic_to_english_number), errors='coerce').astype('Int64')
+
+
+def load_locations(path: str = DEFAULT_LOCATIONS_CSV) -> pd.DataFrame:
+    """Load locations with schema column names"""
+    df = read_table(path).rename(columns=LOCATION_COLUMN_ALIASES)
+    df['location_id'] = _to_int(df['location_id'])
+    df = df.dropna(subset=['location_id'])
+
+    if 'location_number' not in df.columns:
+        df['location_number'] = df['location_id'].astype(str)
+    for col in ['location_name', 'location_address']:
+        if col not in df.columns:
+            df[col] = ''
+        df[col] = df[col].map(clean_arabic_text)
+    if 'total_voters' in df.columns:
+        df['total_voters'] = _to_int(df['total_voters']).fillna(0)
+
+    return df.reset_index(drop=True)
+
+
+def load_voters(path: str = DEFAULT_VOTERS_CSV, split_names: bool = True) -> pd.DataFrame:
+    """Load voters with schema column names, adding the name-split columns if missing"""
+    df = read_table(path).rename(columns=VOTER_COLUMN_ALIASES)
+    df['voter_id'] = _to_int(df['voter_id'])
+    df['location_id'] = _to_int(df['location_id'])
+    df = df.dropna(subset=['voter_id', 'location_id'])
+    df['full_name'] = df['full_name'].map(clean_arabic_text)
+
+    if 'source_page' in df.columns:
+        df['source_page'] = _to_int(df['source_page'])
+
+    if split_names and not {'first_name', 'family_name', 'middle_names'}.issubset(df.columns):
+        name_splits = df['full_name'].map(split_arabic_name)
+        df['first_name'] = name_splits.map(lambda x: x[0])
+        df['family_name'] = name_splits.map(lambda x: x[1])
+        df['middle_names'] = name_splits.map(lambda x: x[2])
+
+    return df.reset_index(drop=True)
+
+
+def ndjson_path(json_path: str, stream: str) -> str:
+    """Stream file next to a JSON export: voter_data_full.json -> voter_data_full.voters.ndjson"""
+    return f"{os.path.splitext(json_path)[0]}.{stream}.ndjson"
+
+
+def write_ndjson(path: str, records: Iterable[Dict]) -> int:
+    """Write one JSON object per line; returns the number of records"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def iter_ndjson(path: str) -> Iterator[Dict]:
+    """Records of an NDJSON file, one line at a time"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def save_streams(json_path: str, streams: Dict[str, Iterable[Dict]], metadata: Optional[Dict] = None) -> Dict[str, str]:
+    """Write each stream as NDJSON next to json_path, and json_path as the metadata document
+
+    The metadata document gets the record count and file name of every stream.
+    Returns {stream: path}.
+    """
+    os.makedirs(os.path.dirname(json_path) or '.', exist_ok=True)
+    paths = {}
+    counts = {}
+    for stream, records in streams.items():
+        paths[stream] = ndjson_path(json_path, stream)
+        counts[stream] = write_ndjson(paths[stream], records)
+
+    document = dict(metadata or {})
+    document['streams'] = {stream: {'file': os.path.basename(path), 'records': counts[stream]}
+                           for stream, path in paths.items()}
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2, default=str)
+    return paths
+
+
+def iter_records(json_path: str, stream: str) -> Iterator[Dict]:
+    """Records of one stream ('locations', 'voters') of a JSON export
+
+    Reads the NDJSON stream file when there is one; an older single-document export
+    (json_path holding the whole lists) is loaded and its list yielded.
+    """
+    path = ndjson_path(json_path, stream)
+    if os.path.exists(path):
+        yield from iter_ndjson(path)
+        return
+    with open(json_path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    if stream not in document:
+        raise KeyError(f"No '{stream}' stream in {json_path}")
+    yield from document[stream]
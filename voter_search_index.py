@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+In-memory voter search index for kiosk-style lookups
+Rebuilt in a few seconds from the voters CSV/Parquet output and answers the
+webapp's combined query (name substring + family + location) in microseconds.
+
+Layout (no per-row Python dicts):
+- names live in two big strings (original and normalized) addressed by an offsets array
+- voter_id / location_id / family code are typed array columns
+- trigram postings over the normalized full name: trigram -> array('I') of row numbers
+- per-family postings: family code -> array('I') of row numbers
+- per-location row ranges: rows are stored grouped by location_id, so a location
+  is one (start, end) slice of every column and posting list
+
+Usage:
+    python voter_search_index.py --voters output/voters_table.csv --name "محمد احمد" --location 76
+    python voter_search_index.py --voters output/voters_table.csv      (interactive)
+"""
+
+import argparse
+import heapq
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from arabic_name_utils import normalize_arabic_name
+from voter_roll_io import DEFAULT_VOTERS_CSV, load_voters
+
+NGRAM_SIZE = 3
+NO_FAMILY = 0
+
+# Rank buckets, lower is better
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_WORD_START = 2
+RANK_INSIDE = 3
+
+
+def name_ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    """Distinct character n-grams of a normalized name"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class VoterSearchIndex:
+    """Compact in-process index over the voters table"""
+
+    def __init__(self):
+        self.voter_ids = array('q')
+        self.location_ids = array('q')
+        self.family_codes = array('I')
+        self.offsets = array('I', [0])
+        self.name_offsets = array('I', [0])
+        self.names_blob = ''
+        self.normalized_blob = ''
+        self.family_names: List[str] = ['']
+        self.family_lookup: Dict[str, int] = {}
+        self.ngram_postings: Dict[str, array] = {}
+        self.family_postings: Dict[int, array] = {}
+        self.location_ranges: Dict[int, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.voter_ids)
+
+    @classmethod
+    def from_file(cls, voters_path: str = DEFAULT_VOTERS_CSV) -> 'VoterSearchIndex':
+        """Build the index from the voters CSV or Parquet output"""
+        voters_df = load_voters(voters_path)
+        index = cls()
+        index.build(voters_df['voter_id'].tolist(), voters_df['full_name'].tolist(),
+                    voters_df['location_id'].tolist(), voters_df['family_name'].tolist())
+        return index
+
+    def build(self, voter_ids: List[int], full_names: List[str],
+              location_ids: List[int], family_names: List[str]):
+        """Build every column and posting list in one pass
+
+        Rows are numbered in location order (input order within a location), so
+        each location's rows are one contiguous range.
+        """
+        names_parts = []
+        normalized_parts = []
+        offset = 0
+        name_offset = 0
+        postings = self.ngram_postings
+        order = sorted(range(len(voter_ids)), key=lambda i: int(location_ids[i]))
+
+        for row, source_row in enumerate(order):
+            voter_id, full_name = voter_ids[source_row], full_names[source_row]
+            location_id, family_name = location_ids[source_row], family_names[source_row]
+            # Normalization can drop characters, so original and normalized names keep separate offsets
+            normalized = normalize_arabic_name(full_name)
+            names_parts.append(full_name)
+            normalized_parts.append(normalized)
+
+            self.voter_ids.append(int(voter_id))
+            self.location_ids.append(int(location_id))
+            start = self.location_ranges.get(int(location_id), (row, row))[0]
+            self.location_ranges[int(location_id)] = (start, row + 1)
+
+            family_key = normalize_arabic_name(family_name)
+            if family_key:
+                code = self.family_lookup.get(family_key)
+                if code is None:
+                    code = len(self.family_names)
+                    self.family_lookup[family_key] = code
+                    self.family_names.append(family_name)
+                    self.family_postings[code] = array('I')
+                self.family_postings[code].append(row)
+            else:
+                code = NO_FAMILY
+            self.family_codes.append(code)
+
+            for gram in name_ngrams(normalized):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                posting.append(row)
+
+            offset += len(normalized) + 1
+            self.offsets.append(offset)
+            name_offset += len(full_name) + 1
+            self.name_offsets.append(name_offset)
+
+        # '\n' separators never appear inside a name, so blob.find cannot match across rows
+        self.names_blob = '\n'.join(names_parts) + '\n'
+        self.normalized_blob = '\n'.join(normalized_parts) + '\n'
+
+    def normalized_name(self, row: int) -> str:
+        return self.normalized_blob[self.offsets[row]:self.offsets[row + 1] - 1]
+
+    def full_name(self, row: int) -> str:
+        return self.names_blob[self.name_offsets[row]:self.name_offsets[row + 1] - 1]
+
+    def _rows_containing(self, term: str, start: int = 0, end: Optional[int] = None) -> List[int]:
+        """Rows in [start, end) whose normalized name contains term, by scanning the blob in C"""
+        rows = []
+        blob = self.normalized_blob
+        stop = self.offsets[len(self) if end is None else end]
+        position = blob.find(term, self.offsets[start], stop)
+        while position != -1:
+            row = bisect_right(self.offsets, position) - 1
+            rows.append(row)
+            # Jump to the next name so each row is reported once
+            position = blob.find(term, self.offsets[row + 1], stop)
+        return rows
+
+    def _rank(self, normalized: str, term: str) -> Optional[tuple]:
+        """Rank key for a candidate, or None if it does not contain the term"""
+        position = normalized.find(term)
+        if position == -1:
+            return None
+        if normalized == term:
+            bucket = RANK_EXACT
+        elif position == 0:
+            bucket = RANK_PREFIX
+        elif normalized[position - 1] == ' ':
+            bucket = RANK_WORD_START
+        else:
+            bucket = RANK_INSIDE
+        return (bucket, position, len(normalized))
+
+    def search(self, name: Optional[str] = None, family: Optional[str] = None,
+               location_id: Optional[int] = None, limit: int = 20) -> List[Dict]:
+        """Combined name-substring / family / location query with ranked results"""
+        term = normalize_arabic_name(name) if name else ''
+        family_code = None
+        if family:
+            family_code = self.family_lookup.get(normalize_arabic_name(family))
+            if family_code is None:
+                return []
+        row_range = None
+        if location_id is not None:
+            row_range = self.location_ranges.get(int(location_id))
+            if row_range is None:
+                return []
+
+        # Start from the smallest candidate list we have, then check the rest per row
+        candidate_lists = []
+        if term and len(term) >= NGRAM_SIZE:
+            for gram in name_ngrams(term):
+                posting = self.ngram_postings.get(gram)
+                if posting is None:
+                    return []
+                candidate_lists.append(posting)
+        if family_code is not None:
+            candidate_lists.append(self.family_postings[family_code])
+
+        if candidate_lists:
+            # Intersect postings smallest-first; arrays are sorted row numbers, viewed without copying
+            candidate_lists.sort(key=len)
+            candidates = np.frombuffer(candidate_lists[0], dtype=np.uint32)
+            for posting in candidate_lists[1:]:
+                if len(candidates) < 64:
+                    break
+                candidates = np.intersect1d(candidates, np.frombuffer(posting, dtype=np.uint32),
+                                            assume_unique=True)
+            if row_range is not None:
+                # Sorted row numbers: the location is one slice of them
+                candidates = candidates[np.searchsorted(candidates, row_range[0]):
+                                        np.searchsorted(candidates, row_range[1])]
+            candidates = candidates.tolist()
+        elif term:
+            candidates = self._rows_containing(term, *(row_range or (0, None)))
+        elif row_range is not None:
+            candidates = range(*row_range)
+        else:
+            candidates = range(len(self))
+
+        family_codes = self.family_codes
+        matches = []
+        for row in candidates:
+            if family_code is not None and family_codes[row] != family_code:
+                continue
+            if term:
+                rank = self._rank(self.normalized_name(row), term)
+                if rank is None:
+                    continue
+            else:
+                rank = (RANK_INSIDE, 0, 0)
+            matches.append((rank, self.voter_ids[row], row))
+
+        best = heapq.nsmallest(limit, matches)
+        return [
+            {
+                'voter_id': voter_id,
+                'full_name': self.full_name(row),
+                'location_id': self.location_ids[row],
+                'family_name': self.family_names[self.family_codes[row]],
+                'rank': rank[0],
+            }
+            for rank, voter_id, row in best
+        ]
+
+    def memory_report(self) -> Dict[str, int]:
+        """Approximate bytes held by each structure"""
+        postings_bytes = sum(p.itemsize * len(p) for p in self.ngram_postings.values())
+        return {
+            'rows': len(self),
+            'ngrams': len(self.ngram_postings),
+            'ngram_postings_bytes': postings_bytes,
+            'family_postings_bytes': sum(p.itemsize * len(p) for p in self.family_postings.values()),
+            'location_ranges': len(self.location_ranges),
+            'name_blobs_bytes': len(self.names_blob.encode('utf-8')) + len(self.normalized_blob.encode('utf-8')),
+            'columns_bytes': sum(a.itemsize * len(a) for a in (self.voter_ids, self.location_ids,
+                                                                self.family_codes, self.offsets,
+                                                                self.name_offsets)),
+        }
+
+
+def print_results(results: List[Dict], elapsed_us: float):
+    for voter in results:
+        print(f"{voter['voter_id']:>7}  {voter['full_name']}  |  location {voter['location_id']}")
+    print(f"📊 {len(results)} results in {elapsed_us:.0f} µs")
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="In-memory voter search index")
+    parser.add_argument('--voters', default=DEFAULT_VOTERS_CSV, help="Voters CSV or Parquet file")
+    parser.add_argument('--name', help="Name substring")
+    parser.add_argument('--family', help="Exact family name")
+    parser.add_argument('--location', type=int, help="location_id")
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"📂 Building index from {args.voters}...")
+    start = time.perf_counter()
+    index = VoterSearchIndex.from_file(args.voters)
+    print(f"✅ Indexed {len(index):,} voters in {time.perf_counter() - start:.2f}s")
+    memory = index.memory_report()
+    total_mb = sum(v for k, v in memory.items() if k.endswith('_bytes')) / (1024 * 1024)
+    print(f"   {memory['ngrams']:,} trigrams, ~{total_mb:.1f} MB of postings and columns")
+
+    if args.name or args.family or args.location is not None:
+        start = time.perf_counter()
+        results = index.search(args.name, args.family, args.location, args.limit)
+        print_results(results, (time.perf_counter() - start) * 1e6)
+        return True
+
+    # Interactive kiosk mode: "name | family | location" per line
+    print("\n🔍 Enter: name | family | location   (empty line to quit)")
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            break
+        parts = [part.strip() for part in line.split('|')] + ['', '', '']
+        location_id = int(parts[2]) if parts[2].isdigit() else None
+        start = time.perf_counter()
+        results = index.search(parts[0] or None, parts[1] or None, location_id, args.limit)
+        print_results(results, (time.perf_counter() - start) * 1e6)
+
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Voter Store
+process_pdf collected every voter as a 5-key dict in one growing list: about
+420 bytes per voter (the dict, its boxed ints and the name string), close to a
+gigabyte for a two-million-voter governorate before the first CSV was written.
+A VoterStore keeps the same records as columns:
+
+- voter_id, location_id, voter_sequence_number, source_page : array('q')
+- full_name : one UTF-8 byte buffer plus int64 offsets (Arrow large_string layout)
+
+That is about 2 bytes per Arabic letter plus 40 bytes per voter (95 bytes per
+voter in `python voter_store.py`, against 419 for the dicts). Export builds
+the DataFrame / Parquet file from the columns, without per-row dicts; with
+pyarrow installed the name column is handed over as the Arrow buffers it
+already is. Iterating a store still yields voter dicts, one at a time, for
+code written against the list (summary report, JSON export, benchmarks).
+
+Usage:
+    store = VoterStore()
+    store.append(voter_id, full_name, location_id, voter_sequence_number, source_page)
+    store.extend(page_voters)                 # voter dicts
+    df = store.to_dataframe()
+    store.to_parquet('output/voters_table.parquet')
+
+    python voter_store.py --voters 500000     # memory: list of dicts vs store
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: names are decoded in Python and Parquet goes through pandas
+    pa = None
+    pq = None
+
+VOTER_FIELDS = ('voter_id', 'full_name', 'location_id', 'voter_sequence_number', 'source_page')
+INT_FIELDS = ('voter_id', 'location_id', 'voter_sequence_number', 'source_page')
+
+
+class VoterStore:
+    """Voter records as typed columns; iterates as voter dicts"""
+
+    def __init__(self, voters: Optional[Iterable[Dict]] = None):
+        self._ints: Dict[str, array] = {field: array('q') for field in INT_FIELDS}
+        self._name_data = bytearray()
+        self._name_offsets = array('q', [0])
+        if voters is not None:
+            self.extend(voters)
+
+    def append(self, voter_id: int, full_name: str, location_id: int, voter_sequence_number: int,
+               source_page: int):
+        self._ints['voter_id'].append(voter_id)
+        self._ints['location_id'].append(location_id)
+        self._ints['voter_sequence_number'].append(voter_sequence_number)
+        self._ints['source_page'].append(source_page)
+        self._name_data += full_name.encode('utf-8')
+        self._name_offsets.append(len(self._name_data))
+
+    def extend(self, voters: Iterable[Dict]):
+        """Append voter dicts (the shape extract_voters_from_page returns)"""
+        for voter in voters:
+            self.append(voter['voter_id'], voter['full_name'], voter['location_id'],
+                        voter['voter_sequence_number'], voter['source_page'])
+
+    def __len__(self) -> int:
+        return len(self._name_offsets) - 1
+
+    def name(self, index: int) -> str:
+        return self._name_data[self._name_offsets[index]:self._name_offsets[index + 1]].decode('utf-8')
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('voter index out of range')
+        voter = {field: self._ints[field][index] for field in INT_FIELDS}
+        voter['full_name'] = self.name(index)
+        return {field: voter[field] for field in VOTER_FIELDS}
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def column(self, field: str):
+        """An integer column as an int64 NumPy array, or the names as a list"""
+        if field == 'full_name':
+            return [self.name(index) for index in range(len(self))]
+        # Copied: a live view would stop the array from growing (BufferError on append)
+        return np.frombuffer(self._ints[field], dtype=np.int64).copy() if len(self) else np.empty(0, dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers"""
+        return (sum(column.itemsize * len(column) for column in self._ints.values())
+                + len(self._name_data) + self._name_offsets.itemsize * len(self._name_offsets))
+
+    def _name_array(self):
+        return pa.LargeStringArray.from_buffers(len(self), pa.py_buffer(self._name_offsets),
+                                                pa.py_buffer(self._name_data))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Columns in VOTER_FIELDS order (int64 integers, str names)"""
+        names = self._name_array().to_pandas() if pa is not None else self.column('full_name')
+        data = {field: self.column(field) for field in INT_FIELDS}
+        data['full_name'] = names
+        return pd.DataFrame({field: data[field] for field in VOTER_FIELDS})
+
+    def to_parquet(self, path: str) -> str:
+        if pq is None:
+            self.to_dataframe().to_parquet(path, index=False)
+            return path
+        table = pa.table({field: self._name_array() if field == 'full_name' else pa.array(self.column(field))
+                          for field in VOTER_FIELDS})
+        pq.write_table(table, path)
+        return path
+
+
+def voters_dataframe(voters) -> pd.DataFrame:
+    """DataFrame of a VoterStore or a list of voter dicts"""
+    if isinstance(voters, VoterStore):
+        return voters.to_dataframe()
+    return pd.DataFrame(voters)
+
+
+def voter_column(voters, field: str) -> Iterable:
+    """One field of every voter, from a VoterStore's column or a list of voter dicts"""
+    if isinstance(voters, VoterStore):
+        return voters.column(field)
+    return [voter[field] for voter in voters]
+
+
+def _sample_voters(count: int) -> Iterator[Dict]:
+    names = ['محمد احمد عبد الرحمن السيد', 'فاطمة عادل الصعيدى', 'عبد العزيز مصطفى عبد الفتاح']
+    for index in range(count):
+        yield {'voter_id': index + 1, 'full_name': f"{names[index % len(names)]} {index}",
+               'location_id': index // 1000 + 1, 'voter_sequence_number': index % 1000 + 1,
+               'source_page': index // 40 + 1}
+
+
+def _measure(build) -> Dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build()
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {'seconds': seconds, 'current_mb': current / 1e6, 'peak_mb': peak / 1e6}
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Compare voter memory: list of dicts vs VoterStore")
+    parser.add_argument('--voters', type=int, default=500000)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🗃️  VOTER STORE")
+    print("=" * 70)
+
+    # Names are built per voter (as the parser does), so both sides pay for them
+    results = {
+        'list of dicts': _measure(lambda: list(_sample_voters(args.voters))),
+        'VoterStore': _measure(lambda: VoterStore(_sample_voters(args.voters))),
+    }
+    for label, result in results.items():
+        print(f"📦 {label:<14} {args.voters:,} voters: {result['current_mb']:8.1f} MB held, "
+              f"peak {result['peak_mb']:8.1f} MB, {result['seconds']:.2f}s "
+              f"({result['current_mb'] * 1e6 / max(args.voters, 1):.0f} bytes per voter)")
+
+    store = VoterStore(_sample_voters(min(args.voters, 100000)))
+    start = time.perf_counter()
+    df = store.to_dataframe()
+    print(f"📊 to_dataframe: {len(df):,} rows in {time.perf_counter() - start:.2f}s "
+          f"(names via {'pyarrow' if pa is not None else 'Python'})")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)